@@ -4,19 +4,50 @@ from io import StringIO
 import pandas as pd
 
 
-def open_undefined_last_column_files(filepath, skiprows=0, n_fixed_cols=None, *args, **kwargs):
-    """ Some StringDB files need manual parsing to be loaded as a pandas DataFrame."""
+def iter_undefined_last_column_files(filepath, skiprows=0, n_fixed_cols=None, sep='\t', chunksize=500000, row_filter=None, *args, **kwargs):
+    """ Streams some StringDB/EggNOG files that need manual parsing as pandas DataFrame chunks.
+
+    Each line is split on `sep` and only the first `n_fixed_cols` columns plus the last column are kept.
+    Lines are buffered `chunksize` at a time and parsed with `pd.read_csv`, so memory is bounded by the chunk size.
+    If `row_filter` is given, it is called with the list of fields of each line (the last one still holds the line break)
+    and only lines for which it returns True are parsed.
+    If no `names` are given, the first line is taken as header and reused for every chunk.
+    """
+    nrows = kwargs.pop('nrows', None)
     with gzip.open(filepath, 'rt') as f:
-        ios = u''
         # Skip header
         for i in range(skiprows):
             _ = f.readline()
+        header = []
+        if kwargs.get('names') is None:
+            # Header is reduced to the same columns as the rows
+            sline = f.readline().split(sep)
+            header = [u'\t'.join(sline[:n_fixed_cols]) + u'\t' + sline[-1]]
+        buffer = []
+        n_rows = 0
         # Loop file content
-        for i, line in enumerate(f, start=0):
-            sline = line.split('\t')
-            ios += u'\t'.join(sline[:n_fixed_cols]) + u'\t' + sline[-1]
+        for line in f:
+            sline = line.split(sep)
+            if (row_filter is not None) and (not row_filter(sline)):
+                continue
+            buffer.append(u'\t'.join(sline[:n_fixed_cols]) + u'\t' + sline[-1])
+            n_rows += 1
+            if (nrows is not None) and (n_rows >= nrows):
+                break
+            if len(buffer) >= chunksize:
+                yield pd.read_csv(StringIO(u''.join(header + buffer)), sep='\t', encoding='utf-8', *args, **kwargs)
+                buffer = []
+        if len(buffer):
+            yield pd.read_csv(StringIO(u''.join(header + buffer)), sep='\t', encoding='utf-8', *args, **kwargs)
+
 
-        return pd.read_csv(StringIO(ios), sep='\t', encoding='utf-8', *args, **kwargs)
+def open_undefined_last_column_files(filepath, skiprows=0, n_fixed_cols=None, sep='\t', chunksize=500000, row_filter=None, *args, **kwargs):
+    """ Some StringDB files need manual parsing to be loaded as a pandas DataFrame.
+    Parsing is done in chunks, see `iter_undefined_last_column_files`."""
+    chunks = list(iter_undefined_last_column_files(filepath, skiprows, n_fixed_cols, sep, chunksize, row_filter, *args, **kwargs))
+    if not len(chunks):
+        return pd.DataFrame(columns=kwargs.get('names'))
+    return pd.concat(chunks, axis='index', ignore_index=(kwargs.get('index_col') is None))
 
 
 def ensurePathExists(path):
@@ -0,0 +1,39 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Builds the EggNOG orthology index (see `orthology.py`) from `33208_members.tsv.gz`.
+#    Needs the vocabularies from `00-build-vocabulary.py`.
+#
+#
+import pandas as pd
+pd.set_option('display.max_rows', 100)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+from utils import open_undefined_last_column_files
+from orthology import OrthologyIndex
+from vocabulary import dict_taxid
+
+
+if __name__ == '__main__':
+
+    # Load EggNOG Annotation File
+    # Metazoa (33208) EggNOG - [M]embers
+    print('Loading EggNOG members')
+    wanted_taxids = set(dict_taxid[specie] for specie in ['HS', 'MM', 'DM'])
+    df_Egg = open_undefined_last_column_files(
+        "../data/EggNOG/33208_members.tsv.gz",
+        n_fixed_cols=5,
+        names=['family', 'id_eggnog', '_1', '_2', 'aliases', 'species'],
+        usecols=['id_eggnog', 'aliases'],
+        row_filter=lambda sline: any(alias.split('.', 1)[0] in wanted_taxids for alias in sline[4].split(','))  # lower the search space while parsing
+    )
+
+    print('Building index')
+    index = OrthologyIndex.from_members(df_Egg)
+    print('> {n_families:,d} families, {n_members:,d} members'.format(n_families=len(index), n_members=len(index.members)))
+
+    print('Exporting')
+    index.save()
+
+    print('Done.')
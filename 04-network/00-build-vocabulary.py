@@ -0,0 +1,76 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Builds the integer vocabularies of `id_string`, `id_gene` (per species) and `id_eggnog` used across stages.
+#    See `vocabulary.py`. Needs to be run (once) before `00-cache-stringdb-links.py`.
+#
+#
+import os
+import numpy as np
+import pandas as pd
+pd.set_option('display.max_rows', 100)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+from utils import ensurePathExists, open_undefined_last_column_files
+from vocabulary import Vocabulary, dict_taxid, dict_gene_prefix, get_vocabulary_path
+import argparse
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--species", default=['HS', 'MM', 'DM'], nargs='+', choices=['HS', 'MM', 'DM'], help="Species to build. Defaults to all.")
+    args = parser.parse_args()
+    #
+    species = args.species
+
+    for specie in species:
+        taxid = dict_taxid[specie]
+        print('Building {specie:s} vocabulary'.format(specie=specie))
+        rAliasFile = '../data/StringDB/{taxid:s}/{taxid:s}.protein.aliases.v11.0.txt.gz'.format(taxid=taxid)
+        wVocabPath = get_vocabulary_path(specie) + '/'
+        ensurePathExists(wVocabPath)
+
+        df_SA = open_undefined_last_column_files(rAliasFile, skiprows=1, n_fixed_cols=2, names=["id_string", "alias", "source"], usecols=["id_string", "alias"])
+
+        # id_string
+        vocab_string = Vocabulary.from_values(df_SA['id_string'].unique())
+        print('> {n:,d} id_string'.format(n=len(vocab_string)))
+
+        # id_gene (only aliases that are Ensembl/FlyBase gene ids)
+        df_SA = df_SA.loc[df_SA['alias'].str.startswith(dict_gene_prefix[specie]), :]
+        vocab_gene = Vocabulary.from_values(df_SA['alias'].unique())
+        print('> {n:,d} id_gene'.format(n=len(vocab_gene)))
+
+        # id_string <-> id_gene
+        pairs = np.column_stack([vocab_string.encode(df_SA['id_string'].values), vocab_gene.encode(df_SA['alias'].values)])
+        pairs = np.unique(pairs, axis=0).astype(np.int32)
+        print('> {n:,d} id_string-id_gene pairs'.format(n=len(pairs)))
+
+        vocab_string.save(os.path.join(wVocabPath, 'id_string.npy'))
+        vocab_gene.save(os.path.join(wVocabPath, 'id_gene.npy'))
+        np.save(os.path.join(wVocabPath, 'id_string-id_gene.npy'), pairs)
+
+    #
+    # EggNOG families with at least one member in our species
+    #
+    print('Building EggNOG vocabulary')
+    wVocabPath = get_vocabulary_path('EggNOG') + '/'
+    ensurePathExists(wVocabPath)
+    wanted_taxids = set(dict_taxid[specie] for specie in ['HS', 'MM', 'DM'])
+    df_Egg = open_undefined_last_column_files(
+        "../data/EggNOG/33208_members.tsv.gz",
+        n_fixed_cols=5,
+        names=['family', 'id_eggnog', '_1', '_2', 'aliases', 'species'],
+        usecols=['id_eggnog'],
+        row_filter=lambda sline: any(alias.split('.', 1)[0] in wanted_taxids for alias in sline[4].split(','))
+    )
+    vocab_eggnog = Vocabulary.from_values(df_Egg['id_eggnog'].unique())
+    print('> {n:,d} id_eggnog'.format(n=len(vocab_eggnog)))
+    vocab_eggnog.save(os.path.join(wVocabPath, 'id_eggnog.npy'))
+
+    print('Done.')
@@ -0,0 +1,61 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Converts StringDB `protein.links.full` text files to a columnar cache (one `.npy` file per column).
+#    `protein1`/`protein2` are stored as int32 `id_string` codes (see `vocabulary.py`), evidence channels as uint16.
+#    Network builds then memory-map only the columns they need, see `utils.load_string_links`.
+#
+#
+import os
+import numpy as np
+import pandas as pd
+pd.set_option('display.max_rows', 100)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+from utils import ensurePathExists
+from vocabulary import load_vocabulary, dict_taxid
+import argparse
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--species", default=['HS', 'MM', 'DM'], nargs='+', choices=['HS', 'MM', 'DM'], help="Species to convert. Defaults to all.")
+    parser.add_argument("--chunksize", default=2000000, type=int, help="Number of rows parsed per chunk. Defaults to 2,000,000.")
+    args = parser.parse_args()
+    #
+    species = args.species
+    chunksize = args.chunksize
+
+    for specie in species:
+        taxid = dict_taxid[specie]
+        rLinksFile = '../data/StringDB/{taxid:s}/{taxid:s}.protein.links.full.v11.0.txt.gz'.format(taxid=taxid)
+        wCachePath = '../data/StringDB/{taxid:s}/cache/links/'.format(taxid=taxid)
+        ensurePathExists(wCachePath)
+
+        # Vocabulary (shared codes, see `vocabulary.py`)
+        vocab_string = load_vocabulary(specie, 'id_string')
+
+        # Encode columns
+        print('Encoding {specie:s} links'.format(specie=specie))
+        dict_columns = {}
+        for df in pd.read_csv(rLinksFile, sep=' ', chunksize=chunksize):
+            for column in df.columns:
+                if column in ['protein1', 'protein2']:
+                    values = vocab_string.encode(df[column].values)
+                    if (values < 0).any():
+                        raise ValueError("Links file has proteins that are not in the {specie:s} vocabulary. Rebuild it with `00-build-vocabulary.py`.".format(specie=specie))
+                else:
+                    values = df[column].values.astype(np.uint16)
+                dict_columns.setdefault(column, []).append(values)
+        print('> {n:,d} links'.format(n=sum(len(values) for values in dict_columns['protein1'])))
+
+        print('Saving {specie:s} cache'.format(specie=specie))
+        for column, list_values in dict_columns.items():
+            np.save(os.path.join(wCachePath, column + '.npy'), np.concatenate(list_values))
+
+    print('Done.')
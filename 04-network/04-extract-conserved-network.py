@@ -3,6 +3,7 @@
 # Date: Sept 02, 2019
 #
 # Description: Reads a Multilayer network (HS, MM & DM) and extracts only conserved genes.
+#    Conserved genes are selected with sparse products, see `utils.get_conserved_nodes`.
 #
 #
 import pandas as pd
@@ -10,7 +11,7 @@ pd.set_option('display.max_rows', 100)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
 import networkx as nx
-from utils import ensurePathExists
+from utils import ensurePathExists, get_conserved_nodes
 import argparse
 
 
@@ -41,32 +42,11 @@ if __name__ == '__main__':
     #
     # Selecting conserved only
     #
-    print('Selecting nodes with cross links to both other layers')
+    print('Selecting nodes with cross links to both other layers (and intra links left)')
     print('Number of nodes: {:,d}'.format(G.number_of_nodes()))
-    nodes_to_remove = []
-    for node, nodedata in G.nodes(data=True):
-        include = True
-        set_connects_to_layers = set()
-        for node, neighbor, edgedata in G.edges(node, data=True):
-            if edgedata['type'] == 'cross':
-                neighbor_layer = G.nodes[neighbor]['layer']
-                set_connects_to_layers.add(neighbor_layer)
-                if len(set_connects_to_layers) >= 2:
-                    include = False
-        if include:
-            nodes_to_remove.append(node)
+    conserved = set(get_conserved_nodes(G))
+    nodes_to_remove = [node for node in G.nodes() if node not in conserved]
     G.remove_nodes_from(nodes_to_remove)
-    #
-    print('Number of nodes: {:,d}'.format(G.number_of_nodes()))
-
-    # Removal of Nodes with only type=='cross' edges
-    print('Removing nodes (with only cross edges)')
-    print('Number of nodes: {:,d}'.format(G.number_of_nodes()))
-    remove_isolates_nodes = []
-    for node in G.nodes():
-        if not any([True for i, j, d in G.edges(node, data=True) if d['type'] == 'intra']):
-            remove_isolates_nodes.append(node)
-    G.remove_nodes_from(remove_isolates_nodes)
     print('Number of nodes: {:,d}'.format(G.number_of_nodes()))
 
     ##
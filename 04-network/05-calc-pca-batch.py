@@ -0,0 +1,115 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Computes the PCA of network layers (as `05-calc-pca.py`) for a grid of celltypes x thresholds x layers.
+#    Layers are computed in parallel and cached by a content hash of their nodes, edges and weights, so unchanged layers are skipped.
+#    Results go to one columnar table per celltype (`columnar.py`, read back with `pca.read_pca`).
+#
+#
+import os
+import time
+import numpy as np
+import pandas as pd
+pd.set_option('display.max_rows', 100)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+import networkx as nx
+from multiprocessing import Pool
+from utils import ensurePathExists, get_network_layer, get_network_adjacency
+from pca import sparse_pca, layer_hash
+from columnar import write_table, read_table, table_file
+import argparse
+
+
+def merge_results(wFile, df, keys):
+    """ Replaces the rows of `keys` (network, threshold, layer) in the columnar table `wFile` with `df`."""
+    if os.path.exists(table_file(wFile)):
+        df_old = read_table(wFile)
+        is_replaced = pd.MultiIndex.from_frame(df_old[['network', 'threshold', 'layer']]).isin(keys)
+        df = pd.concat([df_old.loc[~is_replaced, :], df], ignore_index=True)
+    write_table(df, wFile)
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    celltypes = ['spermatocyte', 'spermatogonia', 'spermatid', 'enterocyte', 'neuron', 'muscle']
+    parser.add_argument("--celltype", default=['spermatocyte', 'enterocyte'], type=str, nargs='+', choices=celltypes, help="Cell type(s). Defaults to spermatocyte and enterocyte.")
+    parser.add_argument("--network", default='thr', type=str, help="Network to use. Defaults to 'thr'.")
+    parser.add_argument("--threshold", default=[0.5], type=float, nargs='+', help="Threshold value(s). Defaults to 0.5.")
+    parser.add_argument("--layer", default=['HS', 'MM', 'DM'], type=str, nargs='+', choices=['HS', 'MM', 'DM'], help="Network layer(s). Defaults to all three.")
+    parser.add_argument("--components", default=15, type=int, help="Number of singular values (components) to calculate. Defaults to 15.")
+    parser.add_argument("--n_jobs", default=None, type=int, help="Number of processes computing layers. Defaults to the number of cores.")
+    args = parser.parse_args()
+    #
+    network = args.network
+    components = args.components
+    path_cache = 'results/pca/cache'
+
+    #
+    # Load layers, and their cached results
+    #
+    layers, jobs = {}, {}
+    for celltype in args.celltype:
+        for threshold in args.threshold:
+            threshold_str = str(threshold).replace('.', 'p')
+            print('Reading {celltype:s}-{network:s}-{threshold:s} Network'.format(celltype=celltype, network=network, threshold=threshold_str))
+            rGfile_gpickle = 'results/network/{celltype:s}/net-{celltype:s}-{network:s}-{threshold:s}.gpickle'.format(celltype=celltype, network=network, threshold=threshold_str)
+            G = nx.read_gpickle(rGfile_gpickle)
+
+            for layer in args.layer:
+                Gt = get_network_layer(G, layer=layer, copy=False)
+                dfG = pd.DataFrame(data={'gene': [d.get('label', None) for n, d in Gt.nodes(data=True)]}, index=pd.Index(list(Gt.nodes()), name='id_gene'))
+                A = get_network_adjacency(Gt, weight='weight')
+                # Sorted nodes, so the hash does not depend on the node order of the gpickle
+                order = np.argsort(dfG.index.values, kind='stable')
+                dfG, A = dfG.iloc[order], A[order, :][:, order]
+                key = layer_hash(A, dfG.index, components)
+                layers[(celltype, threshold, layer)] = (dfG, key)
+                if (key not in jobs) and not os.path.exists(os.path.join(path_cache, key + '.npz')):
+                    jobs[key] = A
+
+    #
+    # Compute missing layers
+    #
+    print('Computing {n:,d} of {total:,d} layers ({cached:,d} cached)'.format(n=len(jobs), total=len(layers), cached=len(layers) - len(jobs)))
+    if len(jobs):
+        with Pool(args.n_jobs) as pool:
+            results = pool.starmap(sparse_pca, [(A, components) for A in jobs.values()])
+        for key, (res, explained_variance_ratio) in zip(jobs, results):
+            wCacheFile = os.path.join(path_cache, key + '.npz')
+            ensurePathExists(wCacheFile)
+            np.savez(wCacheFile, scores=res, explained_variance_ratio=explained_variance_ratio)
+
+    #
+    # Export one file per celltype
+    #
+    for celltype in args.celltype:
+        print('Saving {celltype:s} results'.format(celltype=celltype))
+        r_pca, r_s = [], []
+        for threshold in args.threshold:
+            for layer in args.layer:
+                dfG, key = layers[(celltype, threshold, layer)]
+                cache = np.load(os.path.join(path_cache, key + '.npz'))
+                res, explained_variance_ratio = cache['scores'], cache['explained_variance_ratio']
+                #
+                columns = ['{:d}c'.format(i) for i in range(1, res.shape[1] + 1)]
+                df_pca = pd.concat([dfG, pd.DataFrame(res, columns=columns, index=dfG.index)], axis='columns').reset_index()
+                # When the rows were written, so `read_pca` can tell if the `05-calc-pca.py` CSVs are newer
+                df_s = pd.DataFrame({'component': range(1, len(explained_variance_ratio) + 1), 'explained_variance_ratio': explained_variance_ratio, 'time': time.time()})
+                for df in [df_pca, df_s]:
+                    df.insert(0, 'network', network)
+                    df.insert(1, 'threshold', threshold)
+                    df.insert(2, 'layer', layer)
+                r_pca.append(df_pca)
+                r_s.append(df_s)
+
+        keys = pd.MultiIndex.from_tuples([(network, threshold, layer) for threshold in args.threshold for layer in args.layer])
+        merge_results('results/pca/{celltype:s}/pca-{celltype:s}.columns'.format(celltype=celltype), pd.concat(r_pca, ignore_index=True), keys)
+        merge_results('results/pca/{celltype:s}/pca-{celltype:s}-s.columns'.format(celltype=celltype), pd.concat(r_s, ignore_index=True), keys)
+
+    print('Done.')
@@ -11,11 +11,8 @@ pd.set_option('display.max_rows', 100)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
 import networkx as nx
-from utils import ensurePathExists, get_network_layer
-# from scipy import linalg
-# from sklearn.preprocessing import Normalizer, PowerTransformer
-# from sklearn.decomposition import TruncatedSVD
-from sklearn.decomposition import PCA
+from utils import ensurePathExists, get_network_layer, get_network_adjacency
+from pca import sparse_pca, dense_pca, compare_pca
 import argparse
 
 
@@ -31,6 +28,8 @@ if __name__ == '__main__':
     parser.add_argument("--threshold", default=0.5, type=float, help="Threshold value. Defaults to 0.5.")
     #parser.add_argument("--layer", default='DM', type=str, choices=['DM', 'MM', 'HS'], help="Network layer to compute SVD. Defaults to 'DM'.")
     parser.add_argument("--components", default=15, type=int, help="Number of singular values (components) to calculate. Defaults to 15.")
+    parser.add_argument("--validate", action='store_true', help="Also compute the full (dense) SVD of layers with up to `--validate-max-nodes` nodes and report the gap to it.")
+    parser.add_argument("--validate-max-nodes", default=5000, type=int, help="Largest layer to validate. Defaults to 5000.")
 
     args = parser.parse_args()
     #
@@ -53,22 +52,31 @@ if __name__ == '__main__':
     # SVD per Layer
     for layer in ['HS', 'MM', 'DM']:
         print('Isolate {layer:s} Layer'.format(layer=layer))
-        Gt = get_network_layer(G, layer=layer)
+        Gt = get_network_layer(G, layer=layer, copy=False)
         #
         dfG = pd.DataFrame(data={'gene': [d.get('label', None) for n, d in Gt.nodes(data=True)]}, index=Gt.nodes)
         #
         print('Extract Adjacency Matrix')
-        M = nx.to_numpy_matrix(Gt)
+        A = get_network_adjacency(Gt, weight='weight')
 
-        print('Calculating PCA (sklearn)')
-        pca = PCA(n_components=None, svd_solver='full')
-        res = pca.fit(M).transform(M)
+        print('Calculating PCA (truncated SVD, {components:d} components)'.format(components=components))
+        res, explained_variance_ratio = sparse_pca(A, n_components=components)
         #
-        columns = ['{:d}c'.format(i) for i in range(1, components + 1)]
-        df_pca = pd.DataFrame(res[:, 0:components], columns=columns, index=dfG.index)
+        columns = ['{:d}c'.format(i) for i in range(1, res.shape[1] + 1)]
+        df_pca = pd.DataFrame(res, columns=columns, index=dfG.index)
         df_pca = pd.concat([dfG, df_pca], axis='columns')
         #
-        s_pca_var = pd.Series(pca.explained_variance_ratio_, index=range(1, (res.shape[1] + 1)), name='explained_variance_ratio')
+        s_pca_var = pd.Series(explained_variance_ratio, index=range(1, (res.shape[1] + 1)), name='explained_variance_ratio')
+
+        if args.validate:
+            if A.shape[0] > args.validate_max_nodes:
+                print('Skipping validation, layer has {n:,d} nodes'.format(n=A.shape[0]))
+            else:
+                print('Validating against the full SVD')
+                res_full, explained_variance_ratio_full = dense_pca(A, n_components=components)
+                gap_ratio, gap_score = compare_pca(res, explained_variance_ratio, res_full, explained_variance_ratio_full)
+                df_gap = pd.DataFrame({'explained_variance_ratio': explained_variance_ratio_full[:len(gap_ratio)], 'gap-ratio': gap_ratio, 'gap-score': gap_score}, index=columns[:len(gap_ratio)])
+                print(df_gap)
 
         print('Saving results to .CSV')
         wPCAFile = 'results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-dim.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
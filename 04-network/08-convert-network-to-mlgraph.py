@@ -0,0 +1,51 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Converts MultiLayer network (HS, MM & DM) gpickles to the compact `MultiLayerGraph` store (see `mlgraph.py`).
+#    Use `--reverse` to write gpickles back from the store.
+#
+#
+import networkx as nx
+from utils import ensurePathExists, MultiLayerGraph
+import argparse
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    celltypes = ['spermatocyte', 'spermatogonia', 'spermatid', 'enterocyte', 'neuron', 'muscle']
+    parser.add_argument("--celltype", default=['spermatocyte'], type=str, nargs='+', choices=celltypes, help="Cell type(s). Defaults to spermatocyte")
+    parser.add_argument("--network", default='thr', type=str, choices=['full', 'thr', 'conserved', 'genome', 'genome-links'], help="Network to convert. Defaults to 'thr'.")
+    parser.add_argument("--threshold", default=0.5, type=float, help="Threshold value. Defaults to 0.5.")
+    parser.add_argument("--reverse", action='store_true', help="Convert from the store back to gpickle.")
+    args = parser.parse_args()
+    #
+    network = args.network
+    threshold = args.threshold
+    threshold_str = str(threshold).replace('.', 'p')
+
+    for celltype in (args.celltype if network not in ['genome', 'genome-links'] else [None]):
+
+        if network in ['genome', 'genome-links']:
+            rGfile = 'results/network/net-{network:s}'.format(network=network)
+        elif network == 'full':
+            rGfile = 'results/network/{celltype:s}/net-{celltype:s}-{network:s}'.format(celltype=celltype, network=network)
+        else:
+            rGfile = 'results/network/{celltype:s}/net-{celltype:s}-{network:s}-{threshold:s}'.format(celltype=celltype, network=network, threshold=threshold_str)
+
+        if not args.reverse:
+            print('Converting {file:s}.gpickle'.format(file=rGfile))
+            G = nx.read_gpickle(rGfile + '.gpickle')
+            MG = MultiLayerGraph.from_networkx(G)
+            MG.save(rGfile + '.mlgraph')
+        else:
+            print('Converting {file:s}.mlgraph'.format(file=rGfile))
+            G = MultiLayerGraph.load(rGfile + '.mlgraph').to_networkx()
+            ensurePathExists(rGfile + '.gpickle')
+            nx.write_gpickle(G, rGfile + '.gpickle')
+
+    print('Done.')
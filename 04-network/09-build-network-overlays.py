@@ -0,0 +1,55 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Stores celltype networks (full, thr & conserved) as node/edge bitmasks over the genome network with links.
+#    Build the base first with `02-build-mlayer-genome-network.py --links` and `08-convert-network-to-mlgraph.py --network genome-links`.
+#    Overlays are loaded with `mlgraph.load_network_overlay`, after which the celltype gpickles are no longer needed.
+#
+#
+import os
+import networkx as nx
+from mlgraph import MultiLayerGraph, NetworkOverlay, get_network_path
+import argparse
+
+
+def get_folder_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    celltypes = ['spermatocyte', 'spermatogonia', 'spermatid', 'enterocyte', 'neuron', 'muscle']
+    parser.add_argument("--celltype", default=celltypes, type=str, nargs='+', choices=celltypes, help="Cell type(s). Defaults to all six.")
+    parser.add_argument("--network", default=['full', 'thr', 'conserved'], type=str, nargs='+', choices=['full', 'thr', 'conserved'], help="Network(s) to store. Defaults to all three.")
+    parser.add_argument("--threshold", default=0.5, type=float, help="Threshold value. Defaults to 0.5.")
+    parser.add_argument("--check", action='store_true', help="Check each overlay gives back the gpickle nodes, edges and attributes.")
+    args = parser.parse_args()
+    #
+    threshold = args.threshold
+
+    print('Loading genome network store')
+    MG = MultiLayerGraph.load(get_network_path(network='genome-links') + '.mlgraph')
+    print('Number of nodes: {:,d}, edges: {:,d}'.format(MG.number_of_nodes(), MG.number_of_edges()))
+
+    for celltype in args.celltype:
+        for network in args.network:
+            rGfile = get_network_path(celltype, network, threshold)
+            print('Overlaying {file:s}.gpickle'.format(file=rGfile))
+            G = nx.read_gpickle(rGfile + '.gpickle')
+            overlay = NetworkOverlay.from_networkx(MG, G)
+            overlay.save(rGfile + '.overlay')
+            print('Nodes: {n_nodes:,d}, edges: {n_edges:,d}, overlay columns: {columns:}. {size:,d} bytes (gpickle {gsize:,d} bytes)'.format(
+                n_nodes=overlay.node_mask.sum(), n_edges=overlay.edge_mask.sum(), columns=list(overlay.node_columns) + list(overlay.edge_columns),
+                size=get_folder_size(rGfile + '.overlay'), gsize=os.path.getsize(rGfile + '.gpickle')))
+
+            if args.check:
+                H = NetworkOverlay.load(rGfile + '.overlay').to_networkx(MG)
+                assert dict(H.nodes(data=True)) == dict(G.nodes(data=True)), 'Nodes or node attributes differ.'
+                assert {frozenset((i, j)): d for i, j, d in H.edges(data=True)} == {frozenset((i, j)): d for i, j, d in G.edges(data=True)}, 'Edges or edge attributes differ.'
+
+    print('Done.')
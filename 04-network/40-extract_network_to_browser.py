@@ -3,6 +3,7 @@
 # Date: Sept 02, 2019
 #
 # Description: Reads a MultiLayer network (HS, MM & DM) and extracts subgraphs based on parameters for the networkbrowser.
+#    Intra-layer edges get the metric and ultrametric backbone flags and s-values of `99-calc-backbone.py`, replacing any already in the network; `--backbone` picks the one kept.
 #
 #
 import numpy as np
@@ -13,9 +14,11 @@ pd.set_option('display.width', 1000)
 import networkx as nx
 from itertools import chain, product
 from utils import ensurePathExists
+from backbone import read_backbone, backbone_kinds
 from matplotlib import colors
 import random
 import json
+import argparse
 
 
 cmap_meanfertrate = colors.LinearSegmentedColormap.from_list(name='cmap-mean-fert-rate', colors=['#d62728', '#1f77b4'], N=256)
@@ -47,14 +50,50 @@ def map_new_range_of_node_values(G, attr=''):
     print("New number of '{att:s}' attr: {n:,d}".format(att=attr, n=len(attset)))
     return G
 
+
+def set_backbone_edge_attributes(G, dfB, kinds=['metric', 'ultrametric']):
+    """ Sets the '{kind}-backbone' and '{kind}-s-value' attributes of the intra-layer edges of `G` from the backbone table `dfB`.
+    Flags and s-values already in `G` are reset first, so intra-layer edges not in `dfB` are not in any backbone."""
+    intra_edges = [(i, j) for i, j, t in G.edges(data='type') if (t == 'intra')]
+    is_edge = np.array([G.has_edge(i, j) for i, j in zip(dfB['i'], dfB['j'])], dtype=bool)
+    if not is_edge.any():
+        raise ValueError("No edge of the backbone table is in the network. Are they the same celltype and network?")
+    print('> {n:,d} of {total:,d} intra-layer edges in the backbone table'.format(n=is_edge.sum(), total=len(intra_edges)))
+    dfB = dfB.loc[is_edge, :]
+    for kind in kinds:
+        for i, j in intra_edges:
+            G[i][j][kind + '-backbone'] = False
+            G[i][j].pop(kind + '-s-value', None)
+        for attr in [kind + '-backbone', kind + '-s-value']:
+            values = {(i, j): v.item() for i, j, v in zip(dfB['i'], dfB['j'], dfB[attr].values)}
+            nx.set_edge_attributes(G, name=attr, values=values)
+    return G
+
+
 if __name__ == '__main__':
 
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--celltype", default='spermatocyte', type=str, choices=['spermatocyte', 'enterocyte'], help="Cell type of the computed backbones. Must be either 'spermatocyte' or 'enterocyte'. Defaults to spermatocyte")
+    parser.add_argument("--threshold", default=0.5, type=float, help="Threshold value of the computed backbones. Defaults to 0.5.")
+    parser.add_argument("--backbone", default='metric', type=str, choices=['metric', 'ultrametric'], help="Backbone of the intra-layer edges to keep. Defaults to 'metric'.")
+    args = parser.parse_args()
+
     network = 'complete'  # 'complete', 'meiotic-entry', 'meiotic-exit'
 
     print('Reading Network')
     rGfile_gpickle = 'results/net_{network:s}_mlayer_backbone.gpickle'.format(network=network)
     G = nx.read_gpickle(rGfile_gpickle)
 
+    print('Reading Backbones')
+    kinds = backbone_kinds(args.celltype, 'thr', args.threshold)
+    if args.backbone not in kinds:
+        raise ValueError("The '{backbone:s}' backbone was not computed. Run `99-calc-backbone.py --backbones {backbone:s}` first.".format(backbone=args.backbone))
+    dfB = read_backbone(args.celltype, 'thr', args.threshold, columns=['i', 'j'] + [kind + attr for kind in kinds for attr in ['-backbone', '-s-value']])
+    G = set_backbone_edge_attributes(G, dfB, kinds=kinds)
+
     #
     # Selecting nodes
     #
@@ -75,7 +114,7 @@ if __name__ == '__main__':
     # Only backbone/experimental evidence
     select_layer_edges = [(i, j) for i, j, d in G.edges(data=True) if (
         # ((d.get('type') == 'intra') and (d.get('combined_score', -1) >= 500))
-        ((d.get('type') == 'intra') and (d.get('metric-backbone', None) == True))
+        ((d.get('type') == 'intra') and (d.get(args.backbone + '-backbone', None) == True))
         or
         (d.get('type') == 'cross')
     )]
@@ -3,6 +3,12 @@
 # Date: Sept 02, 2019
 #
 # Description: Reads a MultiLayer network (HS, MM & DM) and computed its backbone.
+#    Shortest paths run in chunks of source nodes on a process pool (see `backbone.compute_metric_backbone`);
+#    with `--checkpoint` finished chunks are kept on disk and a rerun resumes from them.
+#    `--pruned` cuts each Dijkstra off at its source's longest edge (`backbone.compute_metric_backbone_pruned`), same results.
+#    Flags and s-values of every `--backbones` kind (metric, ultrametric) of all layers also go to one columnar table (see `backbone.read_backbone`).
+#    With several `--threshold` values, only the lowest one is computed; each higher one only removes edges,
+#    and is updated from the previous one (see `backbone.remove_edges`).
 #
 #
 import pandas as pd
@@ -11,42 +17,28 @@ pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
 import networkx as nx
 from utils import ensurePathExists, get_network_layer
-# distanceclosure
-from distanceclosure.dijkstra import Dijkstra
-# from distanceclosure._dijkstra import _py_single_source_shortest_distances
-from distanceclosure.cython._dijkstra import _cy_single_source_shortest_distances
-from distanceclosure.utils import _prox2dist as prox2dist
+from backbone import compute_backbones, remove_edges, get_backbone_path
+from columnar import write_table
 import argparse
 
 
-def compute_metric_backbone(G):
-    print('> Computing Dijkstra APSP')
-    dict_edges = {(i, j): prox2dist(d['weight']) for i, j, d in G.edges(data=True)}
-    dij = Dijkstra.from_edgelist(dict_edges, directed=False, verbose=10)
-
-    print('> Metric')
-    poolresults = list(range(len(dij.N)))
-    for node in dij.N:
-        print('> Dijkstra node {node:d} of {n_nodes:d}'.format(node=node + 1, n_nodes=len(dij.N)))
-        poolresults[node] = _cy_single_source_shortest_distances(node, dij.N, dij.E, dij.neighbors, ('min', 'sum'), verbose=2)
-    shortest_distances, local_paths = map(list, zip(*poolresults))
-    dij.shortest_distances = dict(zip(dij.N, shortest_distances))
-    MSD = dij.get_shortest_distances(format='dict', translate=True)
-    #
-    dict_edges_backbone = {}
-    dict_edges_s_values = {}
-    for (i, j), d in dict_edges.items():
-
-        # Backbone = distance == distance-closure
-        if d == MSD[i][j]:
-            dict_edges_backbone[(i, j)] = True
-        else:
-            dict_edges_backbone[(i, j)] = False
-
-        # S-Value = distance / distance-closure
-        dict_edges_s_values[(i, j)] = d / MSD[i][j]
+def export_backbones(r, celltype, network, threshold):
+    """ Exports the backbones of each layer in `r`: the metric one to a csv per layer, and all of them to one columnar table."""
+    threshold_str = str(threshold).replace('.', 'p')
+    for dfE in r:
+        layer = dfE['layer'].iloc[0]
+        if 'metric-backbone' in dfE.columns:
+            # To DataFrame
+            edges = list(zip(dfE['i'], dfE['j']))
+            dfB = pd.DataFrame({'backbone': dict(zip(edges, dfE['metric-backbone'])), 's_values': dict(zip(edges, dfE['metric-s-value']))})
+            #
+            print('Exporting ({threshold:s}, {layer:s})'.format(threshold=threshold_str, layer=layer))
+            wBfile = 'results/backbone/{celltype:s}/net-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-backbone.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
+            ensurePathExists(wBfile)
+            dfB.to_csv(wBfile)
 
-    return dict_edges_backbone, dict_edges_s_values
+    print('Exporting backbones ({threshold:s})'.format(threshold=threshold_str))
+    write_table(pd.concat(r, ignore_index=True), get_backbone_path(celltype, network, threshold))
 
 
 if __name__ == '__main__':
@@ -56,19 +48,24 @@ if __name__ == '__main__':
     #
     parser = argparse.ArgumentParser()
     parser.add_argument("--celltype", default='spermatocyte', type=str, choices=['spermatocyte', 'enterocyte'], help="Cell type. Must be either 'spermatocyte' or 'enterocyte'. Defaults to spermatocyte")
-    parser.add_argument("--threshold", default=0.5, type=float, help="Threshold value. Defaults to 0.5.")
+    parser.add_argument("--threshold", default=[0.5], type=float, nargs='+', help="Threshold value(s). Only the lowest network is read and computed, the others are updated from it. Defaults to 0.5.")
+    parser.add_argument("--n_jobs", default=None, type=int, help="Number of processes computing shortest paths. Defaults to the number of cores.")
+    parser.add_argument("--chunk_size", default=64, type=int, help="Number of source nodes per chunk. Memory grows with chunk size x number of nodes. Defaults to 64.")
+    parser.add_argument("--pruned", action='store_true', help="Only explore shortest paths up to each source's longest edge, instead of all-pairs.")
+    parser.add_argument("--backbones", default=['metric', 'ultrametric'], type=str, nargs='+', choices=['metric', 'ultrametric'], help="Backbones to compute. The metric one is also exported to the per-layer csv. Defaults to both.")
+    parser.add_argument("--checkpoint", action='store_true', help="Save finished chunks to 'results/backbone/checkpoint' and resume from them.")
     args = parser.parse_args()
     #
     celltype = args.celltype  # spermatocyte or enterocyte
     network = 'thr'
-    threshold = args.threshold
-    threshold_str = str(threshold).replace('.', 'p')
+    thresholds = sorted(args.threshold)
+    threshold_str = str(thresholds[0]).replace('.', 'p')
 
     #
     # Load Network
     #
     print('Reading {network:s} Network'.format(network=network))
-    rGfile_gpickle = 'results/net-{celltype:s}-{network:s}-{threshold:s}.gpickle'.format(celltype=celltype, network=network, threshold=threshold_str)
+    rGfile_gpickle = 'results/network/{celltype:s}/net-{celltype:s}-{network:s}-{threshold:s}.gpickle'.format(celltype=celltype, network=network, threshold=threshold_str)
     G = nx.read_gpickle(rGfile_gpickle)
 
     #
@@ -79,26 +76,24 @@ if __name__ == '__main__':
     MMG = get_network_layer(G, 'MM')
     DMG = get_network_layer(G, 'DM')
 
+    r = []
     for layer, Gtmp in zip(['HS', 'MM', 'DM'], [HSG, MMG, DMG]):
         print('Computing Backbone ({layer:s})'.format(layer=layer))
-
-        print('Create empty graph ({layer:s})'.format(layer=layer))
-        B = nx.Graph()
-        B.add_nodes_from(Gtmp.nodes())
-        B.add_edges_from(Gtmp.edges())
         #
         # Compute Backbones
         #
         print('Dijkstra ({layer:s})'.format(layer=layer))
-        dict_edges_backbone, dict_edges_s_values = compute_metric_backbone(Gtmp)
-
-        # To DataFrame
-        dfB = pd.DataFrame({'backbone': dict_edges_backbone, 's_values': dict_edges_s_values})
+        path_checkpoint = 'results/backbone/checkpoint' if args.checkpoint else None
+        dfE = compute_backbones(Gtmp, kinds=args.backbones, pruned=args.pruned, n_jobs=args.n_jobs, chunk_size=args.chunk_size, path_checkpoint=path_checkpoint)
+        dfE.insert(0, 'layer', layer)
+        dfE.insert(3, 'weight', [Gtmp[i][j]['weight'] for i, j in zip(dfE['i'], dfE['j'])])
+        r.append(dfE)
+    export_backbones(r, celltype, network, thresholds[0])
 
-        ##
-        # Export
-        ##
-        print('Exporting ({layer:s})'.format(layer=layer))
-        wBfile = 'results/backbone/{celltype:s}/net-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-backbone.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
-        ensurePathExists(wBfile)
-        dfB.to_csv(wBfile)
+    #
+    # Higher thresholds
+    #
+    for threshold in thresholds[1:]:
+        print('Updating Backbones (threshold: {threshold:.2f})'.format(threshold=threshold))
+        r = [remove_edges(dfE, dfE['weight'].values < threshold, n_jobs=args.n_jobs, chunk_size=args.chunk_size) for dfE in r]
+        export_backbones(r, celltype, network, threshold)
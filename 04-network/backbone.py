@@ -0,0 +1,314 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Metric and ultrametric backbones of (proximity) weighted networks, used by `99-calc-backbone.py`.
+#    An edge is in the metric backbone when its distance equals the shortest path distance between its endpoints,
+#    the (min, sum) semiring; in the ultrametric backbone for the (min, max) semiring, where a path is as long as its longest edge.
+#    Single-source shortest paths are computed in chunks of sources on a process pool, and each chunk is reduced right away
+#    to the shortest distance of its edges, so memory is O(E) (plus one chunk of distances) instead of all-pairs O(N^2).
+#    Chunks can be checkpointed to disk, so an interrupted run resumes where it stopped.
+#    `compute_metric_backbone_pruned` only needs to know whether some path is shorter than each edge, so it stops each Dijkstra
+#    at the largest distance of its source's edges and never computes all-pairs distances.
+#    The (min, max) distance of every edge is read from a Kruskal union-find forest, without any Dijkstra.
+#    `compute_backbones` puts the flags and s-values of every semiring in one table (see `read_backbone`).
+#    `remove_edges` updates that table when edges are removed (e.g., a higher threshold), recomputing only what may have changed.
+#
+#
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from columnar import read_table, table_columns
+
+
+def prox2dist(x):
+    """ Proximity in [0, 1] to distance in [0, inf], `1 / x - 1` (as `distanceclosure.utils._prox2dist`)."""
+    if x == 0:
+        return np.inf
+    else:
+        return (1 / float(x)) - 1
+
+
+def edge_distances(G, weight='weight'):
+    """ Nodes, edges (as node positions) and distances of a proximity network, in `G.edges` order.
+    Returns (nodes, sources, targets, distances, A), with `A` the symmetric sparse distance matrix (zero distances kept as explicit edges)."""
+    nodes = list(G.nodes())
+    index = {n: k for k, n in enumerate(nodes)}
+    edges = list(G.edges(data=weight))
+    sources = np.array([index[i] for i, j, p in edges], dtype=np.int64)
+    targets = np.array([index[j] for i, j, p in edges], dtype=np.int64)
+    distances = np.array([prox2dist(p) for i, j, p in edges], dtype=np.float64)
+    return nodes, sources, targets, distances, distance_matrix(len(nodes), sources, targets, distances)
+
+
+def distance_matrix(n_nodes, sources, targets, distances):
+    """ Symmetric sparse distance matrix of the edges (zero distances kept as explicit edges)."""
+    # Infinite distances (zero proximity) are not edges
+    is_finite = np.isfinite(distances)
+    rows = np.concatenate([sources[is_finite], targets[is_finite]])
+    cols = np.concatenate([targets[is_finite], sources[is_finite]])
+    return csr_matrix((np.concatenate([distances[is_finite]] * 2), (rows, cols)), shape=(n_nodes, n_nodes))
+
+
+def _chunks(sources, chunk_size, limits=None):
+    """ Sources (edge source positions) in chunks of `chunk_size` nodes.
+    With per-edge `limits`, each node's limit is the largest of its edges and nodes are chunked by increasing limit,
+    so a chunk's Dijkstra is cut off close to what each of its sources needs.
+    Returns a list of (sorted nodes, edge ids, limit) per chunk."""
+    order = np.argsort(sources, kind='stable')
+    nodes, starts, counts = np.unique(sources[order], return_index=True, return_counts=True)
+    if limits is None:
+        node_limits = np.full(len(nodes), np.inf)
+        node_order = np.arange(len(nodes))
+    else:
+        node_limits = np.maximum.reduceat(np.asarray(limits, dtype=np.float64)[order], starts) if len(nodes) else np.zeros(0)
+        node_order = np.argsort(node_limits, kind='stable')
+    chunks = []
+    for k in range(0, len(nodes), chunk_size):
+        chunk = np.sort(node_order[k:k + chunk_size])
+        edge_ids = np.concatenate([order[starts[p]:starts[p] + counts[p]] for p in chunk])
+        chunks.append((nodes[chunk], edge_ids, node_limits[chunk].max()))
+    return chunks
+
+
+_A = None
+
+
+def _init_worker(A):
+    global _A
+    _A = A
+
+
+def _chunk_shortest_distances(args):
+    """ Shortest distance of the edges of a chunk, from a Dijkstra of each of its source nodes."""
+    k, chunk_nodes, edge_ids, edge_sources, edge_targets, limit, wChunkFile = args
+    # Paths of length exactly `limit` are kept
+    D = dijkstra(_A, directed=False, indices=chunk_nodes, limit=np.nextafter(limit, np.inf))
+    rows = np.searchsorted(chunk_nodes, edge_sources)
+    shortest = D[rows, edge_targets]
+    if wChunkFile is not None:
+        # Written under a temporary name and then renamed, so an interrupted write never looks like a finished chunk
+        with open(wChunkFile + '.tmp', 'wb') as f:
+            np.savez(f, edge_ids=edge_ids, shortest=shortest)
+        os.replace(wChunkFile + '.tmp', wChunkFile)
+    return k, edge_ids, shortest
+
+
+def _checkpoint_path(path, sources, targets, distances, chunk_size, pruned=False):
+    """ Checkpoint folder of a network, named by a content hash of its edges, the chunk size and whether Dijkstra is pruned."""
+    h = hashlib.sha1()
+    for array in [sources, targets, distances, np.array([chunk_size, pruned], dtype=np.int64)]:
+        h.update(array.tobytes())
+    return os.path.join(path, h.hexdigest())
+
+
+def shortest_edge_distances(A, sources, targets, limits=None, n_jobs=None, chunk_size=64, path_checkpoint=None, verbose=True):
+    """ Shortest path distance between the endpoints of every edge `(sources[e], targets[e])` of the distance matrix `A`.
+
+    Dijkstra runs from the `sources` nodes, `chunk_size` at a time, on `n_jobs` processes. Chunks already in `path_checkpoint`
+    are read instead of computed, and new chunks are saved there. Distances are summed from `sources[e]`.
+    With `limits`, paths longer than `limits[e]` are not explored and their edges get `inf` (when no shorter path exists).
+    """
+    chunks = _chunks(sources, chunk_size, limits)
+    shortest = np.full(len(sources), np.inf)
+    jobs = []
+    for k, (chunk_nodes, edge_ids, limit) in enumerate(chunks):
+        wChunkFile = os.path.join(path_checkpoint, 'chunk-{k:06d}.npz'.format(k=k)) if path_checkpoint is not None else None
+        if (wChunkFile is not None) and os.path.exists(wChunkFile):
+            cache = np.load(wChunkFile)
+            shortest[cache['edge_ids']] = cache['shortest']
+        else:
+            jobs.append((k, chunk_nodes, edge_ids, sources[edge_ids], targets[edge_ids], limit, wChunkFile))
+    if verbose:
+        print('> Dijkstra on {n:,d} of {total:,d} chunks ({cached:,d} checkpointed)'.format(n=len(jobs), total=len(chunks), cached=len(chunks) - len(jobs)))
+    if path_checkpoint is not None:
+        os.makedirs(path_checkpoint, exist_ok=True)
+    if len(jobs):
+        with Pool(n_jobs, initializer=_init_worker, initargs=(A,)) as pool:
+            for i, (k, edge_ids, shortest_chunk) in enumerate(pool.imap_unordered(_chunk_shortest_distances, jobs), start=1):
+                shortest[edge_ids] = shortest_chunk
+                if verbose:
+                    print('> Chunk {i:,d} of {n:,d}'.format(i=i, n=len(jobs)))
+    return shortest
+
+
+def _backbone_dicts(nodes, sources, targets, distances, shortest):
+    """ Backbone flag (distance == shortest distance) and s-value (distance / shortest distance) of each edge, keyed by (i, j)."""
+    edges = [(nodes[i], nodes[j]) for i, j in zip(sources, targets)]
+    # Backbone = distance == distance-closure
+    is_backbone = (distances == shortest)
+    # S-Value = distance / distance-closure
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s_values = distances / shortest
+    dict_edges_backbone = dict(zip(edges, is_backbone.tolist()))
+    dict_edges_s_values = dict(zip(edges, s_values.tolist()))
+    return dict_edges_backbone, dict_edges_s_values
+
+
+def metric_edge_distances(sources, targets, distances, A, pruned=False, n_jobs=None, chunk_size=64, path_checkpoint=None):
+    """ (min, sum) shortest path distance of every edge, summed from `sources[e]`.
+
+    With `pruned`, an edge that is not longer than any other edge of one of its endpoints is the shortest path between them,
+    as any other path uses one of those edges; it needs no Dijkstra. For the other edges, the shortest distance is never longer
+    than the edge itself, so the Dijkstra from each source node is cut off at the largest distance of its edges.
+    With `path_checkpoint`, chunks are saved in a sub-folder named by a hash of the network, and reused by a later run.
+    """
+    if path_checkpoint is not None:
+        path_checkpoint = _checkpoint_path(path_checkpoint, sources, targets, distances, chunk_size, pruned=pruned)
+    if not pruned:
+        return shortest_edge_distances(A, sources, targets, n_jobs=n_jobs, chunk_size=chunk_size, path_checkpoint=path_checkpoint)
+    # Shortest edge of each node
+    min_distance = np.full(A.shape[0], np.inf)
+    np.minimum.at(min_distance, sources, distances)
+    np.minimum.at(min_distance, targets, distances)
+    is_local = (distances <= min_distance[sources]) | (distances <= min_distance[targets])
+    #
+    shortest = distances.copy()
+    edge_ids = np.flatnonzero(~is_local)
+    shortest[edge_ids] = shortest_edge_distances(A, sources[edge_ids], targets[edge_ids], limits=distances[edge_ids], n_jobs=n_jobs, chunk_size=chunk_size, path_checkpoint=path_checkpoint)
+    return shortest
+
+
+def ultrametric_edge_distances(n_nodes, sources, targets, distances):
+    """ (min, max) shortest path distance of every edge: the smallest, over all paths, of the longest edge in the path.
+
+    Edges are added by increasing distance into a union-find (by size, without path compression), and each link keeps the
+    distance that made it. The (min, max) distance between two nodes is the largest link on the way up to where they meet.
+    """
+    parent, size, link = list(range(n_nodes)), [1] * n_nodes, [np.inf] * n_nodes
+
+    def find(n):
+        while parent[n] != n:
+            n = parent[n]
+        return n
+
+    sources, targets, distances = sources.tolist(), targets.tolist(), distances.tolist()
+    for e in sorted(range(len(distances)), key=distances.__getitem__):
+        ri, rj = find(sources[e]), find(targets[e])
+        if ri != rj:
+            if size[ri] < size[rj]:
+                ri, rj = rj, ri
+            parent[rj] = ri
+            size[ri] += size[rj]
+            link[rj] = distances[e]
+    #
+    shortest = []
+    for i, j in zip(sources, targets):
+        d = -np.inf
+        # Links grow on the way up, so the lower one goes first
+        while i != j:
+            if link[i] <= link[j]:
+                d, i = link[i], parent[i]
+            else:
+                d, j = link[j], parent[j]
+        shortest.append(d)
+    return np.array(shortest, dtype=np.float64)
+
+
+def compute_metric_backbone(G, n_jobs=None, chunk_size=64, path_checkpoint=None):
+    """ Metric backbone of a proximity network `G`: for each edge `(i, j)` (in `G.edges` order) whether its distance equals
+    the shortest path distance from `i` to `j` (backbone), and their ratio (s-value).
+
+    With `path_checkpoint`, chunks are saved in a sub-folder named by a hash of the network, and reused by a later run.
+    Returns the dicts {(i, j): backbone} and {(i, j): s-value}.
+    """
+    nodes, sources, targets, distances, A = edge_distances(G)
+    shortest = metric_edge_distances(sources, targets, distances, A, n_jobs=n_jobs, chunk_size=chunk_size, path_checkpoint=path_checkpoint)
+    return _backbone_dicts(nodes, sources, targets, distances, shortest)
+
+
+def compute_metric_backbone_pruned(G, n_jobs=None, chunk_size=64, path_checkpoint=None):
+    """ `compute_metric_backbone` without all-pairs shortest paths (see `metric_edge_distances` with `pruned`). Flags and s-values are the same."""
+    nodes, sources, targets, distances, A = edge_distances(G)
+    shortest = metric_edge_distances(sources, targets, distances, A, pruned=True, n_jobs=n_jobs, chunk_size=chunk_size, path_checkpoint=path_checkpoint)
+    return _backbone_dicts(nodes, sources, targets, distances, shortest)
+
+
+# Backbones by semiring (path length aggregation)
+semirings = {
+    'metric': ('min', 'sum'),
+    'ultrametric': ('min', 'max'),
+}
+
+
+def compute_backbones(G, kinds=['metric', 'ultrametric'], pruned=True, n_jobs=None, chunk_size=64, path_checkpoint=None):
+    """ Backbones of a proximity network `G` for each of the `kinds` of `semirings`, from one set of edge distances.
+
+    Returns a DataFrame with one row per edge (in `G.edges` order): 'i', 'j', 'distance' and, for each kind,
+    its '{kind}-backbone' flag, '{kind}-s-value' (distance / shortest distance) and '{kind}-distance' (shortest distance).
+    """
+    nodes, sources, targets, distances, A = edge_distances(G)
+    df = pd.DataFrame({'i': [nodes[i] for i in sources], 'j': [nodes[j] for j in targets], 'distance': distances})
+    for kind in kinds:
+        print('> {kind:s} backbone {semiring:s}'.format(kind=kind.capitalize(), semiring=str(semirings[kind])))
+        if kind == 'metric':
+            shortest = metric_edge_distances(sources, targets, distances, A, pruned=pruned, n_jobs=n_jobs, chunk_size=chunk_size, path_checkpoint=path_checkpoint)
+        elif kind == 'ultrametric':
+            shortest = ultrametric_edge_distances(len(nodes), sources, targets, distances)
+        else:
+            raise ValueError("Unknown backbone kind '{kind:s}'. Must be one of: {kinds:s}.".format(kind=kind, kinds=', '.join(semirings)))
+        _set_backbone_columns(df, kind, distances, shortest)
+    return df
+
+
+def _set_backbone_columns(df, kind, distances, shortest):
+    df[kind + '-backbone'] = (distances == shortest)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df[kind + '-s-value'] = distances / shortest
+    df[kind + '-distance'] = shortest
+
+
+def remove_edges(df, removed, n_jobs=None, chunk_size=64):
+    """ Backbones table `df` (see `compute_backbones`) of the network without the edges where `removed` is True.
+
+    Shortest distances can only grow when edges are removed, so backbone edges stay in the backbone. And a path no longer
+    than a shortest distance cannot go through a longer removed edge, so only non-backbone edges whose shortest distance is
+    at least that of the shortest removed edge are recomputed (on the remaining edges; the metric ones cut off at their distance).
+    Raising a threshold removes edges longer than all remaining ones, so there is nothing to recompute.
+    """
+    removed = np.asarray(removed, dtype=bool)
+    dfR = df.loc[~removed, :].reset_index(drop=True)
+    if not removed.any():
+        return dfR
+    min_removed = df['distance'].values[removed].min()
+    distances = dfR['distance'].values
+    network = None
+    for kind in [kind for kind in semirings if (kind + '-distance') in dfR.columns]:
+        shortest = dfR[kind + '-distance'].values.copy()
+        edge_ids = np.flatnonzero(~dfR[kind + '-backbone'].values & (shortest >= min_removed))
+        if len(edge_ids) == 0:
+            continue
+        print('> Updating {n:,d} {kind:s} shortest distances'.format(n=len(edge_ids), kind=kind))
+        if network is None:
+            nodes, edges = np.unique(np.concatenate([dfR['i'].values, dfR['j'].values]), return_inverse=True)
+            sources, targets = edges[:len(dfR)], edges[len(dfR):]
+            network = (len(nodes), sources, targets, distance_matrix(len(nodes), sources, targets, distances))
+        n_nodes, sources, targets, A = network
+        if kind == 'metric':
+            shortest[edge_ids] = shortest_edge_distances(A, sources[edge_ids], targets[edge_ids], limits=distances[edge_ids], n_jobs=n_jobs, chunk_size=chunk_size)
+        elif kind == 'ultrametric':
+            shortest = ultrametric_edge_distances(n_nodes, sources, targets, distances)
+        _set_backbone_columns(dfR, kind, distances, shortest)
+    return dfR
+
+
+def get_backbone_path(celltype, network='thr', threshold=0.5, path='results/backbone'):
+    """ Columnar backbone table folder (all layers and kinds, see `columnar.write_table`) of a celltype network, as written by `99-calc-backbone.py`."""
+    threshold_str = str(threshold).replace('.', 'p')
+    return os.path.join(path, celltype, 'net-{celltype:s}-{network:s}-{threshold:s}-backbones.columns'.format(celltype=celltype, network=network, threshold=threshold_str))
+
+
+def read_backbone(celltype, network='thr', threshold=0.5, layer=None, columns=None, path='results/backbone'):
+    """ Backbone flags and s-values of a celltype network (only the rows of `layer`, when given), from its columnar table."""
+    filters = [('layer', layer)] if layer is not None else None
+    return read_table(get_backbone_path(celltype, network, threshold, path), columns=columns, filters=filters)
+
+
+def backbone_kinds(celltype, network='thr', threshold=0.5, path='results/backbone'):
+    """ Kinds of `semirings` whose backbones are in the columnar table of a celltype network (see `99-calc-backbone.py --backbones`)."""
+    columns = table_columns(get_backbone_path(celltype, network, threshold, path))
+    return [kind for kind in semirings if (kind + '-backbone') in columns]
@@ -0,0 +1,113 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Times the intra-layer edge construction of `01-build-mlayer-full-network.py`:
+#    the previous DataFrame `to_dict` path against the typed-column path (`utils.load_intra_edges`).
+#    Runs on the real FPKM/StringDB cache of one species, or on a synthetic layer with `--synthetic`.
+#
+#
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+pd.set_option('display.max_rows', 100)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+import networkx as nx
+from utils import load_string_links, load_intra_edges, edge_tuples_from_columns
+from vocabulary import Vocabulary, get_vocabulary_path, dict_taxid
+import argparse
+
+
+columns = ['textmining', 'database', 'experiments', 'coexpression', 'neighborhood', 'fusion', 'cooccurence', 'combined_score']
+
+
+def build_legacy(specie, dict_id_string_to_id_gene, path):
+    df_links = load_string_links(specie, id_strings=set(dict_id_string_to_id_gene.keys()), columns=columns, path=path)
+    df_links = df_links.rename(columns={'protein1': 'id_string_i', 'protein2': 'id_string_j'})
+    df_links['id_gene_i'] = df_links['id_string_i'].map(lambda x: dict_id_string_to_id_gene[x])
+    df_links['id_gene_j'] = df_links['id_string_j'].map(lambda x: dict_id_string_to_id_gene[x])
+    df_links.drop(['id_string_i', 'id_string_j'], axis='columns', inplace=True)
+    df_links = df_links.replace({0.0: np.nan})
+    df_links['type'] = 'intra'
+    df_links['weight'] = df_links['combined_score'] / 1000
+    df_links = df_links.set_index(['id_gene_i', 'id_gene_j'])
+    idxs = df_links.index.to_list()
+    attrs = [{k: v for k, v in m.items() if pd.notnull(v)} for m in df_links.to_dict(orient='records')]
+    G = nx.Graph()
+    G.add_edges_from([(i, j, d) for (i, j), d in zip(idxs, attrs)])
+    return G
+
+
+def build_columns(specie, dict_id_string_to_id_gene, path):
+    id_gene_i, id_gene_j, dict_links = load_intra_edges(specie, dict_id_string_to_id_gene, columns=columns, path=path)
+    G = nx.Graph()
+    G.add_edges_from(edge_tuples_from_columns(id_gene_i, id_gene_j, dict_links, type='intra'))
+    return G
+
+
+def write_synthetic_layer(specie, n_genes, n_links, path, seed=1):
+    """ Writes a vocabulary & link cache for a synthetic layer. Returns the id_string -> id_gene dict of the genes."""
+    rng = np.random.RandomState(seed)
+    taxid = dict_taxid[specie]
+    id_strings = np.array(['{taxid:s}.P{i:011d}'.format(taxid=taxid, i=i) for i in range(n_genes)])
+    wVocabPath = get_vocabulary_path(specie, path)
+    os.makedirs(wVocabPath)
+    Vocabulary(id_strings).save(os.path.join(wVocabPath, 'id_string.npy'))
+    wCachePath = os.path.join(path, 'StringDB', taxid, 'cache', 'links')
+    os.makedirs(wCachePath)
+    np.save(os.path.join(wCachePath, 'protein1.npy'), rng.randint(0, n_genes, n_links).astype(np.int32))
+    np.save(os.path.join(wCachePath, 'protein2.npy'), rng.randint(0, n_genes, n_links).astype(np.int32))
+    for column in columns:
+        # Most evidence channels are zero for most links
+        values = rng.randint(150, 1000, n_links) * (rng.rand(n_links) < (0.3 if column != 'combined_score' else 1.0))
+        np.save(os.path.join(wCachePath, column + '.npy'), values.astype(np.uint16))
+    # Genes with 80% of the proteins
+    wanted = rng.rand(n_genes) < 0.8
+    return {s: 'G{i:011d}'.format(i=i) for i, s in enumerate(id_strings[wanted])}
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    celltypes = ['spermatocyte', 'spermatogonia', 'spermatid', 'enterocyte', 'neuron', 'muscle']
+    parser.add_argument("--specie", default='HS', type=str, choices=['HS', 'MM', 'DM'], help="Layer to time. Defaults to 'HS' (the largest).")
+    parser.add_argument("--celltype", default='spermatocyte', type=str, choices=celltypes, help="Cell type. Defaults to spermatocyte")
+    parser.add_argument("--minTPM", default=1, type=int, help="minTPM = 1. Defaults to 1.")
+    parser.add_argument("--synthetic", default=None, type=int, nargs=2, metavar=('GENES', 'LINKS'), help="Time a synthetic layer instead.")
+    args = parser.parse_args()
+    #
+    specie = args.specie
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if args.synthetic is not None:
+            n_genes, n_links = args.synthetic
+            print('Writing synthetic {specie:s} layer ({n_genes:,d} genes, {n_links:,d} links)'.format(specie=specie, n_genes=n_genes, n_links=n_links))
+            path = tmpdir
+            dict_id_string_to_id_gene = write_synthetic_layer(specie, n_genes, n_links, path)
+        else:
+            path = '../data'
+            df = pd.read_csv("../02-core_genes/results/FPKM/{specie:s}/{specie:s}-FPKM-{celltype:s}.csv.gz".format(specie=specie, celltype=args.celltype), index_col='id_gene', usecols=['id_string', 'id_gene', 'TPM'])
+            df = df.loc[(df['TPM'] >= args.minTPM), :]
+            dict_id_string_to_id_gene = df.explode('id_string').reset_index().set_index('id_string')['id_gene'].to_dict()
+
+        r = []
+        for method, func in [('legacy', build_legacy), ('columns', build_columns)]:
+            print('> {method:s}'.format(method=method))
+            t0 = time.perf_counter()
+            G = func(specie, dict_id_string_to_id_gene, path)
+            r.append((method, time.perf_counter() - t0, G.number_of_edges()))
+            if method == 'legacy':
+                edges_legacy = {frozenset((i, j)): d for i, j, d in G.edges(data=True)}
+            else:
+                edges_columns = {frozenset((i, j)): d for i, j, d in G.edges(data=True)}
+        assert edges_legacy == edges_columns, 'Edge sets or attributes differ.'
+
+    df = pd.DataFrame(r, columns=['method', 'seconds', '#-edges'])
+    df['speedup'] = df.loc[0, 'seconds'] / df['seconds']
+    print(df)
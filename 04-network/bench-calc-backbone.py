@@ -0,0 +1,133 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Times the metric backbone of `99-calc-backbone.py`: the previous serial distanceclosure APSP path,
+#    the chunked APSP (`backbone.compute_metric_backbone`) and the pruned edge-local test (`backbone.compute_metric_backbone_pruned`),
+#    and checks they give the same backbone flags and s-values.
+#    With `--sweep`, also times backbones at each higher threshold computed anew vs. updated with `backbone.remove_edges`.
+#    Runs on each layer of a thresholded network, and on synthetic scale-free graphs.
+#
+#
+import time
+import numpy as np
+import pandas as pd
+pd.set_option('display.max_rows', 100)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+import networkx as nx
+from utils import get_network_layer
+from backbone import prox2dist, compute_metric_backbone, compute_metric_backbone_pruned, compute_backbones, remove_edges
+import argparse
+
+
+def compute_metric_backbone_legacy(G):
+    """ Serial distanceclosure APSP version of `backbone.compute_metric_backbone`, as it was in `99-calc-backbone.py`."""
+    from distanceclosure.dijkstra import Dijkstra
+    from distanceclosure.cython._dijkstra import _cy_single_source_shortest_distances
+    dict_edges = {(i, j): prox2dist(d['weight']) for i, j, d in G.edges(data=True)}
+    dij = Dijkstra.from_edgelist(dict_edges, directed=False, verbose=10)
+    poolresults = list(range(len(dij.N)))
+    for node in dij.N:
+        poolresults[node] = _cy_single_source_shortest_distances(node, dij.N, dij.E, dij.neighbors, ('min', 'sum'), verbose=2)
+    shortest_distances, local_paths = map(list, zip(*poolresults))
+    dij.shortest_distances = dict(zip(dij.N, shortest_distances))
+    MSD = dij.get_shortest_distances(format='dict', translate=True)
+    #
+    dict_edges_backbone = {}
+    dict_edges_s_values = {}
+    for (i, j), d in dict_edges.items():
+        dict_edges_backbone[(i, j)] = (d == MSD[i][j])
+        dict_edges_s_values[(i, j)] = d / MSD[i][j]
+    return dict_edges_backbone, dict_edges_s_values
+
+
+def edge_keys(df):
+    """ Backbones table sorted by undirected edge, to compare tables with edges in a different order or orientation."""
+    i, j = df['i'].values, df['j'].values
+    df = df.assign(i=np.where(i < j, i, j), j=np.where(i < j, j, i))
+    return df.sort_values(['i', 'j']).reset_index(drop=True)
+
+
+def synthetic_network(n_nodes, m=3, seed=1):
+    """ Scale-free (Barabasi-Albert) graph with proximity weights uniform in [0.5, 1), as a thr-0.5 layer."""
+    G = nx.barabasi_albert_graph(n_nodes, m, seed=seed)
+    rng = np.random.RandomState(seed)
+    nx.set_edge_attributes(G, dict(zip(G.edges(), rng.uniform(0.5, 1.0, size=G.number_of_edges()))), name='weight')
+    return G
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--celltype", default=['spermatocyte', 'enterocyte'], type=str, nargs='*', choices=['spermatocyte', 'enterocyte'], help="Cell type(s) of the thresholded networks. Defaults to spermatocyte and enterocyte.")
+    parser.add_argument("--threshold", default=0.5, type=float, help="Threshold value. Defaults to 0.5.")
+    parser.add_argument("--nodes", default=[2000, 10000], type=int, nargs='*', help="Number of nodes of the synthetic scale-free graphs. Defaults to 2000 and 10000.")
+    parser.add_argument("--methods", default=['legacy', 'apsp', 'pruned'], type=str, nargs='+', choices=['legacy', 'apsp', 'pruned'], help="Methods to time. 'legacy' needs distanceclosure. Defaults to all.")
+    parser.add_argument("--n_jobs", default=None, type=int, help="Number of processes of the chunked methods. Defaults to the number of cores.")
+    parser.add_argument("--chunk_size", default=64, type=int, help="Number of source nodes per chunk. Defaults to 64.")
+    parser.add_argument("--sweep", default=[], type=float, nargs='*', help="Higher thresholds to time with and without `backbone.remove_edges`. Defaults to none.")
+    args = parser.parse_args()
+    #
+    network = 'thr'
+    threshold_str = str(args.threshold).replace('.', 'p')
+    methods = {
+        'legacy': compute_metric_backbone_legacy,
+        'apsp': lambda G: compute_metric_backbone(G, n_jobs=args.n_jobs, chunk_size=args.chunk_size),
+        'pruned': lambda G: compute_metric_backbone_pruned(G, n_jobs=args.n_jobs, chunk_size=args.chunk_size),
+    }
+
+    graphs = []
+    for celltype in args.celltype:
+        print('Reading {celltype:s}-{network:s}-{threshold:s} Network'.format(celltype=celltype, network=network, threshold=threshold_str))
+        rGfile_gpickle = 'results/network/{celltype:s}/net-{celltype:s}-{network:s}-{threshold:s}.gpickle'.format(celltype=celltype, network=network, threshold=threshold_str)
+        G = nx.read_gpickle(rGfile_gpickle)
+        for layer in ['HS', 'MM', 'DM']:
+            graphs.append(('{celltype:s}-{layer:s}'.format(celltype=celltype, layer=layer), get_network_layer(G, layer)))
+    for n_nodes in args.nodes:
+        print('Building synthetic scale-free graph ({n:,d} nodes)'.format(n=n_nodes))
+        graphs.append(('scale-free-{n:d}'.format(n=n_nodes), synthetic_network(n_nodes)))
+
+    r = []
+    for name, G in graphs:
+        print('Computing backbones of {name:s}'.format(name=name))
+        results = {}
+        for method in args.methods:
+            print('> {method:s}'.format(method=method))
+            t0 = time.perf_counter()
+            results[method] = methods[method](G)
+            r.append((name, G.number_of_nodes(), G.number_of_edges(), method, time.perf_counter() - t0, sum(results[method][0].values())))
+        # Same flags and s-values as the first method
+        dfB = pd.DataFrame({'backbone': results[args.methods[0]][0], 's_values': results[args.methods[0]][1]})
+        for method in args.methods[1:]:
+            pd.testing.assert_frame_equal(pd.DataFrame({'backbone': results[method][0], 's_values': results[method][1]}), dfB, check_exact=True)
+
+    df = pd.DataFrame(r, columns=['network', '#-nodes', '#-edges', 'method', 'seconds', '#-backbone'])
+    df['speedup'] = df.groupby('network')['seconds'].transform('first') / df['seconds']
+    print(df)
+
+    if len(args.sweep):
+        r = []
+        for name, G in graphs:
+            print('Sweeping thresholds of {name:s}'.format(name=name))
+            dfE = compute_backbones(G, pruned=True, n_jobs=args.n_jobs, chunk_size=args.chunk_size)
+            dfE['weight'] = [G[i][j]['weight'] for i, j in zip(dfE['i'], dfE['j'])]
+            for threshold in sorted(args.sweep):
+                t0 = time.perf_counter()
+                dfE = remove_edges(dfE, dfE['weight'].values < threshold, n_jobs=args.n_jobs, chunk_size=args.chunk_size)
+                t_update = time.perf_counter() - t0
+                #
+                t0 = time.perf_counter()
+                H = G.edge_subgraph([(i, j) for i, j, w in G.edges(data='weight') if w >= threshold])
+                dfF = compute_backbones(H, pruned=True, n_jobs=args.n_jobs, chunk_size=args.chunk_size)
+                t_fresh = time.perf_counter() - t0
+                # Same flags as computed anew
+                columns = ['i', 'j', 'metric-backbone', 'ultrametric-backbone']
+                pd.testing.assert_frame_equal(edge_keys(dfE)[columns], edge_keys(dfF)[columns], check_exact=True)
+                r.append((name, threshold, len(dfE), t_fresh, t_update))
+        df = pd.DataFrame(r, columns=['network', 'threshold', '#-edges', 'fresh-seconds', 'update-seconds'])
+        df['speedup'] = df['fresh-seconds'] / df['update-seconds']
+        print(df)
@@ -0,0 +1,165 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Times the PCA entropy of `06-calc-pca-entropy.py`: the previous per-window `pd.Series` path
+#    against the prefix-sum count grid (`entropy.compute_entropy`), and checks both give the same `df_ent`.
+#    Runs on a synthetic PCA table (20k genes by default), or on a computed one with `--celltype`.
+#
+#
+import time
+import numpy as np
+import pandas as pd
+pd.set_option('display.max_rows', 100)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+from scipy import stats
+from entropy import compute_entropy
+from pca import read_pca
+import argparse
+
+
+def in_ranges(x, bins):
+    return [((x >= lower) & (x <= upper)) for lower, upper in bins]
+
+
+def compute_entropy_legacy(df_dec,
+                    radius_window=1.0,
+                    radius_overlap=0.1,
+                    angle_window=30,
+                    angle_overlap=15,
+                    min_points=10,
+                    n_cut_points=3,
+                    components=9):
+    """ Per-window `pd.Series` version of `entropy.compute_entropy`, as it was in `06-calc-pca-entropy.py`."""
+    df_dec = df_dec.copy()
+    #
+    angle_items = int(angle_window / angle_overlap)
+    a = np.arange(-180, (181), angle_overlap)
+    angle_bins = [(i, j) for i, j in zip(a[0:-angle_items], a[angle_items:])]
+    n_bins = len(angle_bins)
+    max_entropy = stats.entropy((np.ones(shape=n_bins) / n_bins), base=2)
+    list_df_ent = []
+    #
+    for dim in range(1, (components + 1)):
+        print('Computing projection: {dim1:d} vs {dim2:d}'.format(dim1=dim, dim2=(dim + 1)))
+        #
+        cx = str(dim) + 'c'
+        cy = str(dim + 1) + 'c'
+        dist_label = '{cx:s}-{cy:s}-dist'.format(cx=cx, cy=cy)
+        angle_label = '{cx:s}-{cy:s}-angle'.format(cx=cx, cy=cy)
+        df_dec[dist_label] = np.hypot(df_dec[cx], df_dec[cy])
+        df_dec[angle_label] = np.degrees(np.arctan2(df_dec[cy], df_dec[cx]))
+        #
+        df_dec.sort_values(dist_label, ascending=True, inplace=True)
+        radius_max = df_dec[dist_label].max()
+        #
+        radius_items = int(radius_window / radius_overlap)
+        #
+        b = np.arange(0, (radius_max + radius_overlap), radius_overlap)
+        radius_intervals = [(s, e) for s, e in zip(b[0:-radius_items], b[radius_items:])]
+
+        # Loop radius intervals
+        r = []
+        for radius_start, radius_end in radius_intervals:
+
+            df_dian_tmp = df_dec.loc[(df_dec[dist_label] >= radius_start) & (df_dec[dist_label] <= radius_end), :]
+
+            dfc = df_dian_tmp[angle_label].apply(lambda x: pd.Series(in_ranges(x, angle_bins), angle_bins))
+
+            if len(dfc) > min_points:
+                dfp = (dfc.sum(axis=0) / dfc.sum().sum()).rename('prob').to_frame()
+                dfp['log2'] = dfp['prob'].apply(np.log2)
+                #
+                entropy = stats.entropy(dfp['prob'], base=2)
+
+            else:
+                entropy = np.nan
+
+            entropy_norm = entropy / max_entropy
+            r.append((dim, radius_start, radius_end, entropy, entropy_norm))
+
+        #
+        df_ent_tmp = pd.DataFrame(r, columns=['dim', 'radius-start', 'radius-end', 'entropy', 'entropy-norm'])
+
+        # Interpolation
+        df_ent_tmp['entropy-smooth'] = df_ent_tmp['entropy-norm'].interpolate(method='linear', limit_direction='both')
+        # Rank
+        df_ent_tmp['radius-rank'] = df_ent_tmp['radius-start'].rank(method='min')
+        df_ent_tmp['entropy-rank'] = df_ent_tmp['entropy-norm'].rank(method='min')
+        # Rank Sum
+        df_ent_tmp['rank-sum'] = ((df_ent_tmp['radius-rank']) + (df_ent_tmp['entropy-rank']))
+
+        # Define Cut Pointns
+        cut_points = []
+        # Index % Sort
+        df_cp = df_ent_tmp.sort_values('rank-sum').loc[(df_ent_tmp['radius-start'] > 1.0), :]
+        possible_rank = 1
+        for possible_id, row in df_cp.iterrows():
+            possible_value = row['radius-start']
+            if not any([True if abs(possible_value - existing_value) <= 1.0 else False for existing_id, existing_value, existing_rank in cut_points]):
+                cut_points.append((possible_id, possible_value, possible_rank))
+                possible_rank += 1
+
+            if len(cut_points) >= n_cut_points:
+                break
+        #
+        dict_cut_points = {idx: rank for idx, value, rank in cut_points}
+        df_ent_tmp['cut-rank'] = df_ent_tmp.index.map(dict_cut_points)
+        #
+        # Add to list
+        list_df_ent.append(df_ent_tmp)
+    #
+    df_ent = pd.concat(list_df_ent, axis='index')
+    #
+    return df_ent, df_dec
+
+
+def synthetic_pca(n_genes, components, seed=1):
+    """ PCA-like table: heavy-tailed scores with decreasing variance, and some genes exactly on the axes (on angle window edges)."""
+    rng = np.random.RandomState(seed)
+    columns = ['{:d}c'.format(i) for i in range(1, components + 1)]
+    scores = rng.standard_t(df=3, size=(n_genes, components)) * (2.0 / np.sqrt(np.arange(1, components + 1)))
+    scores[rng.rand(n_genes, components) < 0.05] = 0.0
+    df = pd.DataFrame(scores, columns=columns, index=['G{i:011d}'.format(i=i) for i in range(n_genes)])
+    df.insert(0, 'gene', df.index)
+    return df
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    celltypes = ['spermatocyte', 'spermatogonia', 'spermatid', 'enterocyte', 'neuron', 'muscle']
+    parser.add_argument("--genes", default=20000, type=int, help="Number of genes of the synthetic PCA table. Defaults to 20000.")
+    parser.add_argument("--celltype", default=None, type=str, choices=celltypes, help="Time a computed PCA table of this cell type instead.")
+    parser.add_argument("--network", default='thr', type=str, help="Network to use. Defaults to 'thr'.")
+    parser.add_argument("--threshold", default=0.5, type=float, help="Threshold value. Defaults to 0.5.")
+    parser.add_argument("--layer", default='HS', type=str, choices=['DM', 'MM', 'HS'], help="Network layer. Defaults to 'HS'.")
+    parser.add_argument("--components", default=9, type=int, help="Number of component pairs. Defaults to 9.")
+    args = parser.parse_args()
+    #
+    components = args.components
+
+    if args.celltype is None:
+        print('Building synthetic PCA table ({n:,d} genes)'.format(n=args.genes))
+        df_pca = synthetic_pca(args.genes, components + 1)
+    else:
+        df_pca, _ = read_pca(args.celltype, args.network, args.threshold, args.layer)
+
+    r = []
+    for method, func in [('legacy', compute_entropy_legacy), ('grid', compute_entropy)]:
+        print('> {method:s}'.format(method=method))
+        t0 = time.perf_counter()
+        df_ent, df_dian = func(df_pca, components=components)
+        r.append((method, time.perf_counter() - t0, len(df_ent)))
+        if method == 'legacy':
+            df_ent_legacy, df_dian_legacy = df_ent, df_dian
+    pd.testing.assert_frame_equal(df_ent, df_ent_legacy, check_exact=True)
+    pd.testing.assert_frame_equal(df_dian, df_dian_legacy, check_exact=True)
+
+    df = pd.DataFrame(r, columns=['method', 'seconds', '#-windows'])
+    df['speedup'] = df.loc[0, 'seconds'] / df['seconds']
+    print(df)
@@ -0,0 +1,105 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Benchmarks the chunked `open_undefined_last_column_files` against the previous string-concatenation parser
+#    on a synthetic EggNOG members-like file.
+#
+#
+import os
+import gzip
+import time
+import random
+import tempfile
+import tracemalloc
+from io import StringIO
+import pandas as pd
+pd.set_option('display.max_rows', 100)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+from utils import open_undefined_last_column_files
+import argparse
+
+
+def open_undefined_last_column_files_legacy(filepath, skiprows=0, n_fixed_cols=None, sep='\t', *args, **kwargs):
+    """ Previous implementation, kept here for comparison."""
+    with gzip.open(filepath, 'rt') as f:
+        ios = u''
+        # Skip header
+        for i in range(skiprows):
+            _ = f.readline()
+        # Loop file content
+        for i, line in enumerate(f, start=0):
+            sline = line.split(sep)
+            ios += u'\t'.join(sline[:n_fixed_cols]) + u'\t' + sline[-1]
+
+        return pd.read_csv(StringIO(ios), sep='\t', encoding='utf-8', *args, **kwargs)
+
+
+def write_synthetic_members_file(filepath, n_lines, seed=1):
+    """ Writes a gzipped file with the same layout as `33208_members.tsv.gz`."""
+    rng = random.Random(seed)
+    species = ['9606', '10090', '7227', '6239', '7955', '9031']
+    with gzip.open(filepath, 'wt') as f:
+        for i in range(n_lines):
+            n_members = rng.randint(1, 6)
+            taxids = [rng.choice(species) for _ in range(n_members)]
+            aliases = ','.join('{taxid:s}.P{i:08d}{k:d}'.format(taxid=taxid, i=i, k=k) for k, taxid in enumerate(taxids))
+            f.write('33208\tFAM{i:08d}\t{n:d}\t{s:d}\t{aliases:s}\t{species:s}\n'.format(
+                i=i, n=n_members, s=len(set(taxids)), aliases=aliases, species=','.join(sorted(set(taxids)))))
+
+
+def run(func, *args, **kwargs):
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    df = func(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return df, elapsed, peak
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", default=5000000, type=int, help="Number of lines in the synthetic file. Defaults to 5,000,000.")
+    parser.add_argument("--chunksize", default=500000, type=int, help="Number of lines parsed per chunk. Defaults to 500,000.")
+    parser.add_argument("--memory", action='store_true', help="Also report peak memory (tracemalloc, slower).")
+    args = parser.parse_args()
+    #
+    n_lines = args.lines
+    chunksize = args.chunksize
+    trace_memory = args.memory
+
+    names = ['family', 'id_eggnog', '_1', '_2', 'aliases', 'species']
+    wanted = {'9606', '10090', '7227'}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = os.path.join(tmpdir, 'members.tsv.gz')
+        print('Writing synthetic file ({n:,d} lines)'.format(n=n_lines))
+        write_synthetic_members_file(filepath, n_lines)
+
+        r = []
+        print('> legacy')
+        df_legacy, t, m = run(open_undefined_last_column_files_legacy, filepath, n_fixed_cols=5, names=names)
+        r.append(('legacy', t, m, len(df_legacy)))
+
+        print('> chunked')
+        df_chunked, t, m = run(open_undefined_last_column_files, filepath, n_fixed_cols=5, chunksize=chunksize, names=names)
+        r.append(('chunked', t, m, len(df_chunked)))
+        pd.testing.assert_frame_equal(df_legacy, df_chunked)
+
+        print('> chunked + row_filter')
+        df_filtered, t, m = run(open_undefined_last_column_files, filepath, n_fixed_cols=5, chunksize=chunksize, names=names,
+                                row_filter=lambda sline: any(alias.split('.', 1)[0] in wanted for alias in sline[4].split(',')))
+        r.append(('chunked+filter', t, m, len(df_filtered)))
+
+    df = pd.DataFrame(r, columns=['method', 'seconds', 'peak-bytes', '#-rows'])
+    df['speedup'] = df.loc[0, 'seconds'] / df['seconds']
+    print(df)
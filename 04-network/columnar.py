@@ -0,0 +1,59 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: DataFrames stored as one `.npy` file per column in a folder, as the StringDB link cache of `00-cache-stringdb-links.py`.
+#    Columns are memory-mapped on read, so only the requested columns (and, with `filters`, rows) are loaded.
+#    Used by `05-calc-pca-batch.py` and `99-calc-backbone.py` for their per-celltype results.
+#
+#
+import os
+import numpy as np
+import pandas as pd
+
+
+def write_table(df, path):
+    """ Saves the columns of `df` (not its index) as `.npy` files in the `path` folder, replacing any previous table.
+    Text columns are saved as fixed-width strings, with missing values as ''."""
+    if not os.path.exists(path):
+        os.makedirs(path)
+    for f in os.listdir(path):
+        if f.endswith('.npy'):
+            os.remove(os.path.join(path, f))
+    for column in df.columns:
+        values = df[column].values
+        if values.dtype.kind not in 'biuf':
+            values = np.array(['' if pd.isnull(v) else str(v) for v in values], dtype=str)
+        np.save(os.path.join(path, column + '.npy'), values)
+    # Column order
+    np.save(os.path.join(path, '_columns.npy'), np.asarray(df.columns, dtype=str))
+
+
+def read_table(path, columns=None, filters=None):
+    """ Reads a table saved with `write_table`. `columns` selects columns; `filters`, a list of (column, value), keeps the rows equal to every value.
+    Missing text values ('') are read as NaN."""
+    def load(column):
+        return np.load(os.path.join(path, column + '.npy'), mmap_mode='r')
+    if columns is None:
+        columns = table_columns(path)
+    mask = slice(None)
+    if filters:
+        mask = np.logical_and.reduce([load(column) == value for column, value in filters])
+    data = {}
+    for column in columns:
+        values = np.asarray(load(column)[mask])
+        if values.dtype.kind == 'U':
+            values = values.astype(object)
+            values[values == ''] = np.nan
+        data[column] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+def table_columns(path):
+    """ Columns of a table saved with `write_table`, in order."""
+    return np.load(os.path.join(path, '_columns.npy')).tolist()
+
+
+def table_file(path):
+    """ File written last by `write_table`, e.g. to check if a table exists or when it was written."""
+    return os.path.join(path, '_columns.npy')
@@ -0,0 +1,228 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Entropy of the angle distribution of genes in sliding radius windows of PCA projections, used by `06-calc-pca-entropy.py`.
+#    Each gene is placed once in a 2-D grid of radius x angle counts. The overlapping radius and angle windows are then read from prefix sums,
+#    so all windows of a pair of components are computed in a few array operations. `entropy_sweep` reuses one grid over the edges
+#    of many window/overlap sizes for all of them.
+#
+#
+import math
+import numpy as np
+import pandas as pd
+from scipy import stats, special
+
+
+def _atoms(x, edges):
+    """ Position of each `x` in the elementary pieces of the sorted window `edges`: `2m` if `x == edges[m]`,
+    `2m - 1` if `edges[m - 1] < x < edges[m]` and -1 outside (or NaN). Windows `[edges[k], edges[k + items]]` are the pieces `2k` to `2(k + items)`."""
+    left = np.searchsorted(edges, x, side='left')
+    right = np.searchsorted(edges, x, side='right')
+    atoms = np.where(right > left, 2 * left, 2 * left - 1)
+    atoms[(right == left) & ((left == 0) | (left == len(edges)))] = -1
+    return atoms
+
+
+class CountGrid(object):
+    """ 2-D prefix sums of the points over the elementary pieces of fine radius and angle edges.
+
+    Any closed window `[lo, hi]` whose ends are among the edges is a rectangle of pieces, so the counts of every (coarser)
+    window configuration built on these edges are read without going back to the points.
+    Points with an angle outside the angle edges are kept in an extra last column, they still count in their radius window.
+    """
+
+    def __init__(self, dist, angle, radius_edges, angle_edges):
+        self.radius_edges = np.unique(radius_edges)
+        self.angle_edges = np.unique(angle_edges)
+        n_radius_atoms, n_angle_atoms = max(2 * len(self.radius_edges) - 1, 0), max(2 * len(self.angle_edges) - 1, 0)
+        atoms_r = _atoms(np.asarray(dist), self.radius_edges)
+        atoms_a = _atoms(np.asarray(angle), self.angle_edges)
+        atoms_a = np.where(atoms_a >= 0, atoms_a, n_angle_atoms)
+        is_in = (atoms_r >= 0)
+        grid = np.bincount(atoms_r[is_in] * (n_angle_atoms + 1) + atoms_a[is_in], minlength=n_radius_atoms * (n_angle_atoms + 1))
+        grid = grid.reshape(n_radius_atoms, n_angle_atoms + 1)
+        self.cumsum = np.zeros((n_radius_atoms + 1, n_angle_atoms + 2), dtype=np.int64)
+        self.cumsum[1:, 1:] = grid.cumsum(axis=0).cumsum(axis=1)
+
+    def _pieces(self, edges, starts, ends):
+        """ First and last piece of the windows `[starts, ends]` (values in `edges`)."""
+        return 2 * np.searchsorted(edges, starts), 2 * np.searchsorted(edges, ends)
+
+    def counts(self, radius_starts, radius_ends, angle_starts, angle_ends):
+        """ Number of points in each radius window, and in each (radius window, angle window)."""
+        r0, r1 = self._pieces(self.radius_edges, radius_starts, radius_ends)
+        a0, a1 = self._pieces(self.angle_edges, angle_starts, angle_ends)
+        S = self.cumsum
+        n_points = S[r1 + 1, -1] - S[r0, -1]
+        counts = S[(r1 + 1)[:, None], (a1 + 1)[None, :]] - S[r0[:, None], (a1 + 1)[None, :]] - S[(r1 + 1)[:, None], a0[None, :]] + S[r0[:, None], a0[None, :]]
+        return n_points, counts
+
+
+def _windows(edges, items):
+    """ Start and end of the closed windows of `items` steps over `edges`."""
+    if items <= 0:
+        return edges[0:0], edges[0:0]
+    return edges[0:-items], edges[items:]
+
+
+def window_counts(dist, angle, radius_edges, radius_items, angle_edges, angle_items):
+    """ Number of points in each radius window, and in each (radius window, angle window).
+
+    Windows are closed intervals `[edges[k], edges[k + items]]`, as in the original per-window loop, so points on an edge count in every window sharing it.
+    Returns (n_points, counts), with shapes (radius windows,) and (radius windows, angle windows).
+    """
+    grid = CountGrid(dist, angle, radius_edges, angle_edges)
+    return grid.counts(*_windows(radius_edges, radius_items), *_windows(angle_edges, angle_items))
+
+
+def _entropy_curve(dim, radius_starts, radius_ends, n_points, counts, min_points, n_cut_points, max_entropy):
+    """ Entropy DataFrame of the radius windows of one pair of components, with smoothing, ranks and cut points."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        prob = counts / counts.sum(axis=1, keepdims=True)
+        # `stats.entropy(prob, base=2)` of every window; its `axis` falls back to a per-row loop when rows have NaNs
+        prob = prob / prob.sum(axis=1, keepdims=True)
+        entropy = special.entr(prob).sum(axis=1) / math.log(2)
+    entropy = np.where(n_points > min_points, entropy, np.nan)
+    entropy_norm = entropy / max_entropy
+
+    df_ent_tmp = pd.DataFrame({
+        'dim': dim,
+        'radius-start': radius_starts,
+        'radius-end': radius_ends,
+        'entropy': entropy,
+        'entropy-norm': entropy_norm
+    }, columns=['dim', 'radius-start', 'radius-end', 'entropy', 'entropy-norm'])
+
+    # Interpolation
+    df_ent_tmp['entropy-smooth'] = df_ent_tmp['entropy-norm'].interpolate(method='linear', limit_direction='both')
+    # Rank
+    df_ent_tmp['radius-rank'] = df_ent_tmp['radius-start'].rank(method='min')
+    df_ent_tmp['entropy-rank'] = df_ent_tmp['entropy-norm'].rank(method='min')
+    # Rank Sum
+    df_ent_tmp['rank-sum'] = ((df_ent_tmp['radius-rank']) + (df_ent_tmp['entropy-rank']))
+
+    # Define Cut Pointns
+    cut_points = []
+    # Index % Sort
+    df_cp = df_ent_tmp.sort_values('rank-sum').loc[(df_ent_tmp['radius-start'] > 1.0), :]
+    possible_rank = 1
+    for possible_id, row in df_cp.iterrows():
+        possible_value = row['radius-start']
+        if not any([True if abs(possible_value - existing_value) <= 1.0 else False for existing_id, existing_value, existing_rank in cut_points]):
+            cut_points.append((possible_id, possible_value, possible_rank))
+            possible_rank += 1
+
+        if len(cut_points) >= n_cut_points:
+            break
+    #
+    dict_cut_points = {idx: rank for idx, value, rank in cut_points}
+    df_ent_tmp['cut-rank'] = df_ent_tmp.index.map(dict_cut_points)
+    return df_ent_tmp
+
+
+def _distance_angle(df_dec, dim):
+    """ Adds the distance and angle of components `dim` & `dim + 1` to `df_dec` and sorts it by distance. Returns the column labels."""
+    cx = str(dim) + 'c'
+    cy = str(dim + 1) + 'c'
+    dist_label = '{cx:s}-{cy:s}-dist'.format(cx=cx, cy=cy)
+    angle_label = '{cx:s}-{cy:s}-angle'.format(cx=cx, cy=cy)
+    df_dec[dist_label] = np.hypot(df_dec[cx], df_dec[cy])
+    df_dec[angle_label] = np.degrees(np.arctan2(df_dec[cy], df_dec[cx]))
+    #
+    df_dec.sort_values(dist_label, ascending=True, inplace=True)
+    return dist_label, angle_label
+
+
+def _max_entropy(angle_window, angle_overlap):
+    angle_items = int(angle_window / angle_overlap)
+    a = np.arange(-180, (181), angle_overlap)
+    n_bins = len(_windows(a, angle_items)[0])
+    return stats.entropy((np.ones(shape=n_bins) / n_bins), base=2)
+
+
+def compute_entropy(df_dec,
+                    radius_window=1.0,
+                    radius_overlap=0.1,
+                    angle_window=30,
+                    angle_overlap=15,
+                    min_points=10,
+                    n_cut_points=3,
+                    components=9):
+    """ Normalized entropy of the angle distribution in sliding radius windows of each pair of consecutive components.
+
+    Windows with no more than `min_points` genes have NaN entropy. Up to `n_cut_points` radius windows of low entropy and large radius are ranked as cut points.
+    Returns the entropy DataFrame and `df_dec` with the distance and angle of each pair of components (sorted by the last distance).
+    """
+    df_dec = df_dec.copy()
+    #
+    angle_items = int(angle_window / angle_overlap)
+    a = np.arange(-180, (181), angle_overlap)
+    max_entropy = _max_entropy(angle_window, angle_overlap)
+    list_df_ent = []
+    #
+    for dim in range(1, (components + 1)):
+        print('Computing projection: {dim1:d} vs {dim2:d}'.format(dim1=dim, dim2=(dim + 1)))
+        #
+        dist_label, angle_label = _distance_angle(df_dec, dim)
+        radius_max = df_dec[dist_label].max()
+        #
+        radius_items = int(radius_window / radius_overlap)
+        #
+        b = np.arange(0, (radius_max + radius_overlap), radius_overlap)
+        radius_starts, radius_ends = _windows(b, radius_items)
+
+        # All radius windows at once
+        n_points, counts = window_counts(df_dec[dist_label].values, df_dec[angle_label].values, b, radius_items, a, angle_items)
+        df_ent_tmp = _entropy_curve(dim, radius_starts, radius_ends, n_points, counts, min_points, n_cut_points, max_entropy)
+        #
+        # Add to list
+        list_df_ent.append(df_ent_tmp)
+    #
+    df_ent = pd.concat(list_df_ent, axis='index')
+    #
+    return df_ent, df_dec
+
+
+def entropy_sweep(df_dec,
+                  radius_windows=[1.0],
+                  radius_overlaps=[0.1],
+                  angle_windows=[30],
+                  angle_overlaps=[15],
+                  min_points=10,
+                  n_cut_points=3,
+                  components=9):
+    """ `compute_entropy` for every combination of window and overlap sizes, in one long-format DataFrame.
+
+    For each pair of components, the points are counted once in a `CountGrid` over the union of the edges of all configurations,
+    and each configuration's windows are aggregated from it. Rows of each configuration are the `compute_entropy` rows,
+    with the `radius-window`, `radius-overlap`, `angle-window` and `angle-overlap` columns first.
+    """
+    df_dec = df_dec.copy()
+    configs = [(rw, ro, aw, ao) for rw in radius_windows for ro in radius_overlaps for aw in angle_windows for ao in angle_overlaps]
+    angle_edges = {ao: np.arange(-180, (181), ao) for ao in angle_overlaps}
+    list_df_ent = []
+    #
+    for dim in range(1, (components + 1)):
+        print('Computing projection: {dim1:d} vs {dim2:d} ({n:d} configurations)'.format(dim1=dim, dim2=(dim + 1), n=len(configs)))
+        #
+        dist_label, angle_label = _distance_angle(df_dec, dim)
+        radius_max = df_dec[dist_label].max()
+        radius_edges = {ro: np.arange(0, (radius_max + ro), ro) for ro in radius_overlaps}
+        # Fine grid over every edge of every configuration
+        grid = CountGrid(df_dec[dist_label].values, df_dec[angle_label].values, np.concatenate(list(radius_edges.values())), np.concatenate(list(angle_edges.values())))
+        #
+        for radius_window, radius_overlap, angle_window, angle_overlap in configs:
+            radius_starts, radius_ends = _windows(radius_edges[radius_overlap], int(radius_window / radius_overlap))
+            angle_starts, angle_ends = _windows(angle_edges[angle_overlap], int(angle_window / angle_overlap))
+            n_points, counts = grid.counts(radius_starts, radius_ends, angle_starts, angle_ends)
+            df_ent_tmp = _entropy_curve(dim, radius_starts, radius_ends, n_points, counts, min_points, n_cut_points, _max_entropy(angle_window, angle_overlap))
+            for i, (column, value) in enumerate([('radius-window', radius_window), ('radius-overlap', radius_overlap), ('angle-window', angle_window), ('angle-overlap', angle_overlap)]):
+                df_ent_tmp.insert(i, column, value)
+            list_df_ent.append(df_ent_tmp)
+    #
+    df_ent = pd.concat(list_df_ent, axis='index')
+    sort_columns = ['radius-window', 'radius-overlap', 'angle-window', 'angle-overlap', 'dim']
+    df_ent = df_ent.rename_axis('window').reset_index().sort_values(sort_columns + ['window'], kind='stable').reset_index(drop=True)
+    #
+    return df_ent, df_dec
@@ -0,0 +1,152 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Species-pair homolog index of a MultiLayer network (HS, MM & DM), built from its cross edges.
+#    Answers "how many genes of set A have a homolog in set B" with sparse matrix products over gene-set indicators,
+#    instead of copying the subgraph of A + B, removing intra edges and isolates and counting what is left.
+#
+#
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from itertools import combinations
+
+
+class HomologIndex(object):
+    """ Boolean sparse bipartite matrix of the cross edges of each pair of layers.
+
+    dict_genes: {layer: pd.Index} genes of each layer, in network order.
+    dict_matrices: {(layer_i, layer_j): csr_matrix} with a True at [a, b] when gene `a` of `layer_i` and gene `b` of `layer_j` are homologs.
+        Only one of (layer_i, layer_j) and (layer_j, layer_i) is stored, the other is its transpose.
+    """
+
+    def __init__(self, dict_genes, dict_matrices):
+        self.dict_genes = dict_genes
+        self.dict_matrices = dict_matrices
+
+    @classmethod
+    def from_networkx(cls, G, layers=['HS', 'MM', 'DM']):
+        """ Index of the 'cross' edges of G. Nodes need a 'layer' attribute."""
+        dict_node_layer = dict(G.nodes(data='layer'))
+        dict_genes = {layer: pd.Index([n for n, l in dict_node_layer.items() if l == layer]) for layer in layers}
+        dict_node_position = {n: p for layer in layers for p, n in enumerate(dict_genes[layer])}
+        dict_edges = {pair: ([], []) for pair in combinations(layers, 2)}
+        for i, j, t in G.edges(data='type'):
+            if t != 'cross':
+                continue
+            layer_i, layer_j = dict_node_layer[i], dict_node_layer[j]
+            if (layer_i, layer_j) not in dict_edges:
+                if (layer_j, layer_i) not in dict_edges:
+                    continue
+                i, j, layer_i, layer_j = j, i, layer_j, layer_i
+            dict_edges[(layer_i, layer_j)][0].append(dict_node_position[i])
+            dict_edges[(layer_i, layer_j)][1].append(dict_node_position[j])
+        dict_matrices = {}
+        for (layer_i, layer_j), (ii, jj) in dict_edges.items():
+            shape = (len(dict_genes[layer_i]), len(dict_genes[layer_j]))
+            dict_matrices[(layer_i, layer_j)] = csr_matrix((np.ones(len(ii), dtype=bool), (ii, jj)), shape=shape)
+        return cls(dict_genes, dict_matrices)
+
+    def matrix(self, layer_i, layer_j):
+        """ Bipartite homolog matrix (genes of `layer_i` x genes of `layer_j`)."""
+        if (layer_i, layer_j) in self.dict_matrices:
+            return self.dict_matrices[(layer_i, layer_j)]
+        return self.dict_matrices[(layer_j, layer_i)].T.tocsr()
+
+    def indicators(self, layer, list_genes):
+        """ Sparse indicator matrix (genes of `layer` x sets) of a list of gene sets. Genes not in the network are left out."""
+        index = self.dict_genes[layer]
+        rows, cols = [], []
+        for k, genes in enumerate(list_genes):
+            positions = np.unique(index.get_indexer(list(genes)))
+            positions = positions[positions >= 0]
+            rows.append(positions)
+            cols.append(np.full(len(positions), k))
+        rows = np.concatenate(rows) if len(rows) else np.zeros(0, dtype=np.int64)
+        cols = np.concatenate(cols) if len(cols) else np.zeros(0, dtype=np.int64)
+        return csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(len(index), len(list_genes)))
+
+    def has_homolog(self, layer_i, list_genes_i, layer_j, list_genes_j):
+        """ For each pair (A, B) of gene sets, boolean matrices (genes x pairs) of the genes of A with a homolog in B and of B with a homolog in A."""
+        H = self.matrix(layer_i, layer_j).astype(np.int32)
+        Si = self.indicators(layer_i, list_genes_i)
+        Sj = self.indicators(layer_j, list_genes_j)
+        Hi = (H @ Sj).astype(bool).multiply(Si.astype(bool)).tocsc()
+        Hj = (H.T @ Si).astype(bool).multiply(Sj.astype(bool)).tocsc()
+        Hi.eliminate_zeros()
+        Hj.eliminate_zeros()
+        Hi.sort_indices()
+        Hj.sort_indices()
+        return Hi, Hj
+
+    def count_homologs(self, layer_i, list_genes_i, layer_j, list_genes_j):
+        """ For each pair (A, B) of gene sets, the number of genes of A with a homolog in B and of B with a homolog in A."""
+        Hi, Hj = self.has_homolog(layer_i, list_genes_i, layer_j, list_genes_j)
+        return np.asarray(Hi.sum(axis=0)).ravel(), np.asarray(Hj.sum(axis=0)).ravel()
+
+    def homologs(self, layer_i, genes_i, layer_j, genes_j):
+        """ Genes of `genes_i` with a homolog in `genes_j`, and vice-versa (in network order)."""
+        Hi, Hj = self.has_homolog(layer_i, [genes_i], layer_j, [genes_j])
+        return self.dict_genes[layer_i][Hi.indices].tolist(), self.dict_genes[layer_j][Hj.indices].tolist()
+
+    def jaccard(self, layer_i, list_genes_i, layer_j, list_genes_j):
+        """ For each pair (A, B) of gene sets of two different layers, the genes with a homolog in the other set over the genes in either set."""
+        n_i, n_j = self.count_homologs(layer_i, list_genes_i, layer_j, list_genes_j)
+        n_union = np.array([len(set(genes_i)) + len(set(genes_j)) for genes_i, genes_j in zip(list_genes_i, list_genes_j)])
+        return (n_i + n_j) / n_union
+
+    def max_over_homologs(self, layer_i, layer_j, values_j):
+        """ For each gene of `layer_i`, the largest of `values_j` (aligned with the genes of `layer_j`) over its homologs. -inf without homologs."""
+        H = self.matrix(layer_i, layer_j)
+        values = np.asarray(values_j, dtype=np.float64)[H.indices]
+        result = np.full(H.shape[0], -np.inf)
+        has_homolog = np.diff(H.indptr) > 0
+        if len(values):
+            result[has_homolog] = np.maximum.reduceat(values, H.indptr[:-1][has_homolog])
+        return result
+
+    def jaccard_curve(self, layer_i, values_i, layer_j, values_j, thresholds):
+        """ `jaccard` of the genes with `values >= threshold` (e.g. TPM), for every threshold, in one pass.
+
+        values_i, values_j: pd.Series of the candidate genes (index) of each layer; genes not in the network count only in the union.
+        Since thresholded gene sets are nested, a gene of A(t) has a homolog in B(t) iff both its value and the largest value among its homologs are `>= t`.
+        Counts at all thresholds are then binary searches on sorted values.
+        """
+        def count_at_least(values, thresholds):
+            values = np.sort(values)
+            return len(values) - np.searchsorted(values, thresholds, side='left')
+
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        values_i = values_i.groupby(level=0).max().fillna(-np.inf)
+        values_j = values_j.groupby(level=0).max().fillna(-np.inf)
+        # Values aligned with the network genes
+        aligned_i = values_i.reindex(self.dict_genes[layer_i]).fillna(-np.inf).values
+        aligned_j = values_j.reindex(self.dict_genes[layer_j]).fillna(-np.inf).values
+        # Largest threshold at which each gene is in its set with a homolog in the other set
+        key_i = np.minimum(aligned_i, self.max_over_homologs(layer_i, layer_j, aligned_j))
+        key_j = np.minimum(aligned_j, self.max_over_homologs(layer_j, layer_i, aligned_i))
+        n_inter = count_at_least(key_i, thresholds) + count_at_least(key_j, thresholds)
+        n_union = count_at_least(values_i.values, thresholds) + count_at_least(values_j.values, thresholds)
+        return n_inter / n_union
+
+    def count_homologs_all_pairs(self, layer_i, list_genes_i, layer_j, list_genes_j):
+        """ For every pair of gene sets (A of `layer_i`, B of `layer_j`), the number of genes of A with a homolog in B and of B with a homolog in A.
+
+        Two sparse products, instead of one per pair: `(H @ Sj) > 0` marks the genes of `layer_i` with a homolog in each B,
+        and `Si.T @` it counts them in each A. Returns two (sets i x sets j) arrays.
+        """
+        H = self.matrix(layer_i, layer_j).astype(np.int32)
+        Si = self.indicators(layer_i, list_genes_i).astype(bool).astype(np.int32)
+        Sj = self.indicators(layer_j, list_genes_j).astype(bool).astype(np.int32)
+        n_i = Si.T @ ((H @ Sj) > 0).astype(np.int32)
+        n_j = ((H.T @ Si) > 0).astype(np.int32).T @ Sj
+        return n_i.toarray(), n_j.toarray()
+
+    def jaccard_all_pairs(self, layer_i, list_genes_i, layer_j, list_genes_j):
+        """ `jaccard` of every pair of gene sets (A of `layer_i`, B of `layer_j`), as a (sets i x sets j) array. Pairs of empty sets are NaN."""
+        n_i, n_j = self.count_homologs_all_pairs(layer_i, list_genes_i, layer_j, list_genes_j)
+        size_i = np.array([len(set(genes)) for genes in list_genes_i])
+        size_j = np.array([len(set(genes)) for genes in list_genes_j])
+        with np.errstate(invalid='ignore'):
+            return (n_i + n_j) / (size_i[:, np.newaxis] + size_j[np.newaxis, :])
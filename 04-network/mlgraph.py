@@ -0,0 +1,493 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Compact multilayer (HS, MM & DM) graph store, an alternative to networkx gpickles.
+#    Nodes are grouped by layer, edges are stored once with typed attribute columns, and a CSR adjacency indexes them.
+#    Intra-layer edges are grouped by layer as well, so a layer can be viewed (`layer_view`) without copying.
+#    Everything is a numpy array saved with `numpy.save`, so networks can be memory-mapped on load.
+#
+#
+import os
+import numpy as np
+import pandas as pd
+import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+class MultiLayerGraph(object):
+    """ Undirected multilayer graph in CSR form.
+
+    layers: layer names; nodes of layer `l` are positions `layer_ptr[l]:layer_ptr[l + 1]`.
+    node_ids: node id (e.g. `id_gene`) of each position. node_layer: layer (as a position in `layers`) of each node.
+    node_columns: {name: array} node attributes. Missing values are NaN (float columns), '' (string columns) or `MISSING_INT` (integer columns).
+    edge_i, edge_j: node positions of each edge (stored once). edge_type: 0 for 'intra', 1 for 'cross'.
+    edge_ptr: intra edges of layer `l` are `edge_ptr[l]:edge_ptr[l + 1]`, cross edges come last (`edge_ptr[-2]:edge_ptr[-1]`).
+    edge_columns: {name: array} edge attributes, missing values as in `node_columns`.
+    indptr, indices, edge_index: CSR adjacency. Neighbors of node `n` are `indices[indptr[n]:indptr[n + 1]]`,
+        and `edge_index` gives the edge of each of these entries.
+    """
+    edge_types = ['intra', 'cross']
+
+    def __init__(self, layers, layer_ptr, node_ids, node_columns, edge_i, edge_j, edge_type, edge_columns, indptr=None, indices=None, edge_index=None, node_layer=None, edge_ptr=None):
+        self.layers = list(layers)
+        self.layer_ptr = layer_ptr
+        self.node_ids = node_ids
+        self.node_columns = node_columns
+        if node_layer is None:
+            node_layer = np.repeat(np.arange(len(self.layers), dtype=np.int8), np.diff(layer_ptr))
+        self.node_layer = node_layer
+        self.edge_i = edge_i
+        self.edge_j = edge_j
+        self.edge_type = edge_type
+        self.edge_columns = edge_columns
+        if edge_ptr is None:
+            # Reordering edges invalidates any given CSR
+            edge_ptr = self._sort_edges()
+            indptr = None
+        self.edge_ptr = edge_ptr
+        if indptr is None:
+            indptr, indices, edge_index = self._build_csr()
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_index = edge_index
+        self._node_index = None
+
+    def _sort_edges(self):
+        """ Groups intra edges by layer, followed by cross edges. Returns `edge_ptr`."""
+        n_layers = len(self.layers)
+        group = np.where(self.edge_type == 0, np.asarray(self.node_layer)[self.edge_i], n_layers)
+        order = np.argsort(group, kind='stable')
+        self.edge_i = np.asarray(self.edge_i)[order]
+        self.edge_j = np.asarray(self.edge_j)[order]
+        self.edge_type = np.asarray(self.edge_type)[order]
+        self.edge_columns = {name: np.asarray(values)[order] for name, values in self.edge_columns.items()}
+        return np.concatenate([[0], np.cumsum(np.bincount(group, minlength=n_layers + 1))]).astype(np.int64)
+
+    def _build_csr(self):
+        n_edges = len(self.edge_i)
+        edges = np.arange(n_edges, dtype=np.int32)
+        # Both directions, self-loops only once
+        not_loop = (self.edge_i != self.edge_j)
+        i = np.concatenate([self.edge_i, self.edge_j[not_loop]])
+        j = np.concatenate([self.edge_j, self.edge_i[not_loop]])
+        e = np.concatenate([edges, edges[not_loop]])
+        order = np.lexsort((j, i))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(i, minlength=len(self.node_ids)))]).astype(np.int64)
+        return indptr, j[order].astype(np.int32), e[order].astype(np.int32)
+
+    #
+    # Info
+    #
+    def number_of_nodes(self):
+        return len(self.node_ids)
+
+    def number_of_edges(self):
+        return len(self.edge_i)
+
+    def layer_range(self, layer):
+        """ (start, end) node positions of `layer`."""
+        l = self.layers.index(layer)
+        return int(self.layer_ptr[l]), int(self.layer_ptr[l + 1])
+
+    def node_index(self, ids):
+        """ Positions of node `ids` (-1 if not in the graph)."""
+        if self._node_index is None:
+            self._node_index = pd.Index(np.asarray(self.node_ids))
+        return self._node_index.get_indexer(ids)
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def neighbors(self, n):
+        return self.indices[self.indptr[n]:self.indptr[n + 1]]
+
+    def layer_view(self, layer):
+        """ Read-only `LayerView` of `layer` (its nodes and intra edges)."""
+        return LayerView(self, layer)
+
+    def edge_ids(self, i, j):
+        """ Edge connecting each pair of node positions `i`, `j` (-1 if not connected)."""
+        n = np.int64(len(self.node_ids))
+        # CSR entries are sorted by (row, neighbor)
+        keys = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.indptr)) * n + self.indices
+        query = np.asarray(i, dtype=np.int64) * n + np.asarray(j, dtype=np.int64)
+        if len(keys) == 0:
+            return np.full(len(query), -1, dtype=np.int64)
+        p = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        return np.where(keys[p] == query, np.asarray(self.edge_index)[p], -1).astype(np.int64)
+
+    def subgraph(self, node_mask, edge_mask, node_columns=None, edge_columns=None):
+        """ New graph with the nodes and edges selected by the boolean masks (edges need both nodes selected).
+        `node_columns`/`edge_columns` replace the attribute columns, aligned with the selected nodes/edges."""
+        nodes = np.flatnonzero(node_mask)
+        edges = np.flatnonzero(edge_mask)
+        position = np.cumsum(node_mask) - 1
+        layer_ptr = np.concatenate([[0], np.cumsum(np.bincount(np.asarray(self.node_layer)[nodes], minlength=len(self.layers)))]).astype(np.int64)
+        if node_columns is None:
+            node_columns = {name: np.asarray(values)[nodes] for name, values in self.node_columns.items()}
+        if edge_columns is None:
+            edge_columns = {name: np.asarray(values)[edges] for name, values in self.edge_columns.items()}
+        return MultiLayerGraph(
+            self.layers, layer_ptr, np.asarray(self.node_ids)[nodes], node_columns,
+            position[np.asarray(self.edge_i)[edges]].astype(np.int32), position[np.asarray(self.edge_j)[edges]].astype(np.int32), np.asarray(self.edge_type)[edges], edge_columns)
+
+    #
+    # networkx
+    #
+    @classmethod
+    def from_networkx(cls, G, layers=['HS', 'MM', 'DM']):
+        """ Converts a networkx multilayer graph. Nodes need a 'layer' attribute, edges a 'type' attribute ('intra' or 'cross')."""
+        dict_node_layer = dict(G.nodes(data='layer'))
+        nodes = []
+        layer_ptr = [0]
+        for layer in layers:
+            nodes.extend([n for n, l in dict_node_layer.items() if l == layer])
+            layer_ptr.append(len(nodes))
+        if len(nodes) != G.number_of_nodes():
+            raise ValueError("All nodes need a 'layer' attribute in {layers:}.".format(layers=layers))
+        dict_node_position = {n: p for p, n in enumerate(nodes)}
+        # Nodes
+        node_attrs = [G.nodes[n] for n in nodes]
+        node_columns = {name: _to_column([d.get(name, None) for d in node_attrs]) for name in _attribute_names(node_attrs) if name != 'layer'}
+        # Edges
+        edges = list(G.edges(data=True))
+        edge_i = np.array([dict_node_position[i] for i, j, d in edges], dtype=np.int32)
+        edge_j = np.array([dict_node_position[j] for i, j, d in edges], dtype=np.int32)
+        edge_type = np.array([cls.edge_types.index(d['type']) for i, j, d in edges], dtype=np.int8)
+        edge_attrs = [d for i, j, d in edges]
+        edge_columns = {name: _to_column([d.get(name, None) for d in edge_attrs]) for name in _attribute_names(edge_attrs) if name != 'type'}
+        return cls(layers, np.array(layer_ptr, dtype=np.int64), np.asarray(nodes, dtype=str), node_columns, edge_i, edge_j, edge_type, edge_columns)
+
+    def to_networkx(self):
+        """ Converts back to a networkx graph. Missing (NaN, '' or `MISSING_INT`) attributes are left out."""
+        G = nx.Graph()
+        node_ids = np.asarray(self.node_ids).tolist()
+        node_layer = np.array(self.layers)[self.node_layer].tolist()
+        node_attrs = _to_dicts(self.node_columns, len(node_ids))
+        for d, layer in zip(node_attrs, node_layer):
+            d['layer'] = layer
+        G.add_nodes_from(zip(node_ids, node_attrs))
+        edge_attrs = _to_dicts(self.edge_columns, len(self.edge_i))
+        for d, t in zip(edge_attrs, np.asarray(self.edge_type).tolist()):
+            d['type'] = self.edge_types[t]
+        node_ids = np.asarray(node_ids, dtype=object)
+        G.add_edges_from(zip(node_ids[self.edge_i].tolist(), node_ids[self.edge_j].tolist(), edge_attrs))
+        return G
+
+    #
+    # I/O
+    #
+    def save(self, path):
+        """ Saves every array as a `.npy` file in the `path` folder."""
+        if not os.path.exists(path):
+            os.makedirs(path)
+        arrays = {
+            'layers': np.asarray(self.layers, dtype=str),
+            'layer_ptr': self.layer_ptr,
+            'node_ids': self.node_ids,
+            'node_layer': self.node_layer,
+            'edge_i': self.edge_i,
+            'edge_j': self.edge_j,
+            'edge_type': self.edge_type,
+            'edge_ptr': self.edge_ptr,
+            'indptr': self.indptr,
+            'indices': self.indices,
+            'edge_index': self.edge_index
+        }
+        arrays.update({'node-' + name: values for name, values in self.node_columns.items()})
+        arrays.update({'edge-' + name: values for name, values in self.edge_columns.items()})
+        for name, values in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), np.asarray(values))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """ Loads a graph saved with `save`. Arrays are memory-mapped unless `mmap_mode` is None."""
+        def load_array(name):
+            return np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+        files = sorted(f[:-4] for f in os.listdir(path) if f.endswith('.npy'))
+        if 'edge_ptr' not in files:
+            raise ValueError("'{path:s}' was saved without a layer index, convert it again.".format(path=path))
+        node_columns = {f[5:]: load_array(f) for f in files if f.startswith('node-')}
+        edge_columns = {f[5:]: load_array(f) for f in files if f.startswith('edge-')}
+        return cls(
+            layers=load_array('layers').tolist(), layer_ptr=load_array('layer_ptr'), node_ids=load_array('node_ids'), node_columns=node_columns,
+            edge_i=load_array('edge_i'), edge_j=load_array('edge_j'), edge_type=load_array('edge_type'), edge_columns=edge_columns,
+            indptr=load_array('indptr'), indices=load_array('indices'), edge_index=load_array('edge_index'),
+            node_layer=load_array('node_layer'), edge_ptr=load_array('edge_ptr'))
+
+
+class LayerView(object):
+    """ Read-only view of one layer of a `MultiLayerGraph`: its nodes and intra-layer edges.
+
+    Node and edge arrays are slices of the graph arrays, so nothing is copied (memory-mapped graphs stay on disk).
+    Node positions in `edges` and `adjacency` are local to the layer. Use `to_networkx` for a (copied) networkx graph.
+    """
+
+    def __init__(self, MG, layer):
+        l = MG.layers.index(layer)
+        self.graph = MG
+        self.layer = layer
+        self.node_start, self.node_end = int(MG.layer_ptr[l]), int(MG.layer_ptr[l + 1])
+        self.edge_start, self.edge_end = int(MG.edge_ptr[l]), int(MG.edge_ptr[l + 1])
+        self.node_ids = MG.node_ids[self.node_start:self.node_end]
+        self.node_columns = {name: values[self.node_start:self.node_end] for name, values in MG.node_columns.items()}
+        self.edge_columns = {name: values[self.edge_start:self.edge_end] for name, values in MG.edge_columns.items()}
+        self._adjacency = None
+
+    def number_of_nodes(self):
+        return self.node_end - self.node_start
+
+    def number_of_edges(self):
+        return self.edge_end - self.edge_start
+
+    def edges(self):
+        """ (i, j) local node positions of each intra edge."""
+        return self.graph.edge_i[self.edge_start:self.edge_end] - self.node_start, self.graph.edge_j[self.edge_start:self.edge_end] - self.node_start
+
+    def adjacency(self, weight=None):
+        """ Symmetric sparse adjacency matrix, with `weight` edge values (or ones). The unweighted one is cached."""
+        if (weight is None) and (self._adjacency is not None):
+            return self._adjacency
+        i, j = self.edges()
+        values = np.ones(len(i)) if weight is None else np.nan_to_num(np.asarray(self.edge_columns[weight], dtype=np.float64))
+        not_loop = (i != j)
+        n = self.number_of_nodes()
+        A = csr_matrix((np.concatenate([values, values[not_loop]]), (np.concatenate([i, j[not_loop]]), np.concatenate([j, i[not_loop]]))), shape=(n, n))
+        if weight is None:
+            self._adjacency = A
+        return A
+
+    def degree(self):
+        """ Number of intra edges of each node (self-loops count twice, as in networkx)."""
+        i, j = self.edges()
+        n = self.number_of_nodes()
+        return np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+
+    def connected_components(self):
+        """ (number of components, component label of each node)."""
+        return connected_components(self.adjacency(), directed=False)
+
+    def number_connected_components(self):
+        return self.connected_components()[0]
+
+    def largest_component(self):
+        """ Boolean mask of the nodes in the largest component."""
+        n_components, labels = self.connected_components()
+        if n_components == 0:
+            return np.zeros(0, dtype=bool)
+        return labels == np.argmax(np.bincount(labels))
+
+    def to_networkx(self):
+        """ Copies the layer into a networkx graph, as `MultiLayerGraph.to_networkx` does."""
+        G = nx.Graph()
+        node_ids = np.asarray(self.node_ids).tolist()
+        node_attrs = _to_dicts(self.node_columns, len(node_ids))
+        for d in node_attrs:
+            d['layer'] = self.layer
+        G.add_nodes_from(zip(node_ids, node_attrs))
+        edge_attrs = _to_dicts(self.edge_columns, self.number_of_edges())
+        for d in edge_attrs:
+            d['type'] = 'intra'
+        i, j = self.edges()
+        node_ids = np.asarray(node_ids, dtype=object)
+        G.add_edges_from(zip(node_ids[i].tolist(), node_ids[j].tolist(), edge_attrs))
+        return G
+
+
+class NetworkOverlay(object):
+    """ A network stored as node and edge bitmasks over a base `MultiLayerGraph`, e.g. a celltype network over the genome network.
+
+    node_mask, edge_mask: boolean arrays over the nodes/edges of the base graph.
+    node_columns, edge_columns: the attributes of the overlay network that differ from the base graph (e.g. the celltype TPM),
+        aligned with the selected nodes/edges. node_names, edge_names: attributes the overlay network has.
+    """
+
+    def __init__(self, node_mask, edge_mask, node_columns, edge_columns, node_names, edge_names):
+        self.node_mask = node_mask
+        self.edge_mask = edge_mask
+        self.node_columns = node_columns
+        self.edge_columns = edge_columns
+        self.node_names = list(node_names)
+        self.edge_names = list(edge_names)
+
+    @classmethod
+    def from_networkx(cls, MG, G):
+        """ Overlay of G on MG. All nodes and edges of G must be in MG."""
+        nodes = list(G.nodes())
+        node_positions = MG.node_index(nodes)
+        if (node_positions < 0).any():
+            raise ValueError('{n:,d} nodes are not in the base graph.'.format(n=(node_positions < 0).sum()))
+        dict_node_position = dict(zip(nodes, node_positions.tolist()))
+        edges = list(G.edges(data=True))
+        edge_ids = MG.edge_ids([dict_node_position[i] for i, j, d in edges], [dict_node_position[j] for i, j, d in edges])
+        if (edge_ids < 0).any():
+            raise ValueError('{n:,d} edges are not in the base graph.'.format(n=(edge_ids < 0).sum()))
+        node_mask = np.zeros(MG.number_of_nodes(), dtype=bool)
+        node_mask[node_positions] = True
+        edge_mask = np.zeros(MG.number_of_edges(), dtype=bool)
+        edge_mask[edge_ids] = True
+        # Attributes in base order, kept only when they differ from the base graph
+        node_attrs = [G.nodes[nodes[k]] for k in np.argsort(node_positions)]
+        edge_attrs = [edges[k][2] for k in np.argsort(edge_ids)]
+        node_names = [name for name in _attribute_names(node_attrs) if name != 'layer']
+        edge_names = [name for name in _attribute_names(edge_attrs) if name != 'type']
+        node_columns = _changed_columns(MG.node_columns, np.flatnonzero(node_mask), node_attrs, node_names)
+        edge_columns = _changed_columns(MG.edge_columns, np.flatnonzero(edge_mask), edge_attrs, edge_names)
+        return cls(node_mask, edge_mask, node_columns, edge_columns, node_names, edge_names)
+
+    def apply(self, MG):
+        """ The overlay network as a (new) `MultiLayerGraph`."""
+        nodes, edges = np.flatnonzero(self.node_mask), np.flatnonzero(self.edge_mask)
+        node_columns = {name: self.node_columns[name] if name in self.node_columns else np.asarray(MG.node_columns[name])[nodes] for name in self.node_names}
+        edge_columns = {name: self.edge_columns[name] if name in self.edge_columns else np.asarray(MG.edge_columns[name])[edges] for name in self.edge_names}
+        return MG.subgraph(self.node_mask, self.edge_mask, node_columns, edge_columns)
+
+    def to_networkx(self, MG):
+        return self.apply(MG).to_networkx()
+
+    #
+    # I/O
+    #
+    def save(self, path):
+        """ Saves the masks as packed bits and the columns as `.npy` files in the `path` folder."""
+        if not os.path.exists(path):
+            os.makedirs(path)
+        arrays = {
+            'shape': np.array([len(self.node_mask), len(self.edge_mask)], dtype=np.int64),
+            'node_mask': np.packbits(self.node_mask),
+            'edge_mask': np.packbits(self.edge_mask),
+            'node_names': np.asarray(self.node_names, dtype=str),
+            'edge_names': np.asarray(self.edge_names, dtype=str),
+        }
+        arrays.update({'node-' + name: values for name, values in self.node_columns.items()})
+        arrays.update({'edge-' + name: values for name, values in self.edge_columns.items()})
+        for name, values in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), np.asarray(values))
+
+    @classmethod
+    def load(cls, path):
+        def load_array(name):
+            return np.load(os.path.join(path, name + '.npy'))
+        files = sorted(f[:-4] for f in os.listdir(path) if f.endswith('.npy'))
+        n_nodes, n_edges = load_array('shape').tolist()
+        return cls(
+            node_mask=np.unpackbits(load_array('node_mask'), count=n_nodes).astype(bool),
+            edge_mask=np.unpackbits(load_array('edge_mask'), count=n_edges).astype(bool),
+            node_columns={f[5:]: load_array(f) for f in files if f.startswith('node-')},
+            edge_columns={f[5:]: load_array(f) for f in files if f.startswith('edge-')},
+            node_names=load_array('node_names').tolist(), edge_names=load_array('edge_names').tolist())
+
+
+def _attribute_names(list_attrs):
+    names = {}
+    for d in list_attrs:
+        for name in d:
+            names[name] = None
+    return list(names)
+
+
+# Missing value of integer columns
+MISSING_INT = np.iinfo(np.int64).min
+
+
+def _to_column(values):
+    """ Typed array from a list of attribute values (None for missing).
+    Missing values are NaN in float columns, '' in string columns and `MISSING_INT` in integer columns."""
+    present = [v for v in values if v is not None]
+    is_missing = (len(present) < len(values))
+    if all(isinstance(v, (bool, np.bool_)) for v in present) and not is_missing:
+        return np.array(values, dtype=bool)
+    if all(isinstance(v, (int, np.integer)) and not isinstance(v, (bool, np.bool_)) for v in present) and len(present):
+        return np.array([MISSING_INT if v is None else v for v in values], dtype=np.int64)
+    if all(isinstance(v, (int, float, np.number, bool, np.bool_)) for v in present):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.array(['' if v is None else str(v) for v in values], dtype=str)
+
+
+def _changed_columns(base_columns, positions, list_attrs, names):
+    """ Typed columns of the `names` attributes in `list_attrs` that differ from `base_columns` at `positions`."""
+    columns = {}
+    for name in names:
+        column = _to_column([d.get(name, None) for d in list_attrs])
+        if name in base_columns:
+            base = np.asarray(base_columns[name])[positions]
+            if (base.dtype.kind == column.dtype.kind) and np.array_equal(base, column, equal_nan=(column.dtype.kind == 'f')):
+                continue
+        columns[name] = column
+    return columns
+
+
+def _to_dicts(columns, n):
+    """ List of `n` attribute dicts from typed columns, leaving missing values out."""
+    dicts = [dict() for _ in range(n)]
+    for name, values in columns.items():
+        values = np.asarray(values)
+        if values.dtype.kind == 'f':
+            present = np.flatnonzero(~np.isnan(values))
+        elif values.dtype.kind == 'U':
+            present = np.flatnonzero(values != '')
+        elif values.dtype.kind == 'i':
+            present = np.flatnonzero(values != MISSING_INT)
+        else:
+            present = np.arange(n)
+        for k, v in zip(present.tolist(), values[present].tolist()):
+            dicts[k][name] = v
+    return dicts
+
+
+def get_network_path(celltype=None, network='full', threshold=0.5, path='results/network'):
+    """ Path, without extension, of a network written by the `04-network` scripts."""
+    if celltype is None:
+        return os.path.join(path, 'net-{network:s}'.format(network=network))
+    elif network == 'full':
+        return os.path.join(path, celltype, 'net-{celltype:s}-{network:s}'.format(celltype=celltype, network=network))
+    threshold_str = str(threshold).replace('.', 'p')
+    return os.path.join(path, celltype, 'net-{celltype:s}-{network:s}-{threshold:s}'.format(celltype=celltype, network=network, threshold=threshold_str))
+
+
+def load_network_overlay(celltype, network='full', threshold=0.5, path='results/network', base=None):
+    """ Celltype network as a `MultiLayerGraph`, from its overlay on the genome network store (see `09-build-network-overlays.py`).
+    Pass an already loaded `base` to avoid reloading the genome network for every overlay."""
+    if base is None:
+        base = MultiLayerGraph.load(get_network_path(network='genome-links', path=path) + '.mlgraph')
+    return NetworkOverlay.load(get_network_path(celltype, network, threshold, path) + '.overlay').apply(base)
+
+
+def load_layer_node_masks(celltypes, network='thr', threshold=0.5, layers=['HS', 'MM', 'DM'], path='results/network'):
+    """ {layer: {celltype: boolean mask}} of the nodes of celltype networks, over the same genes so they can be compared bitwise.
+
+    Masks come from the overlays on the genome network store, which need `02-build-mlayer-genome-network.py --links`,
+    `08-convert-network-to-mlgraph.py --network genome-links` and `09-build-network-overlays.py` to have run.
+    Celltypes without an overlay (or all of them, without the store) are read from their gpickle instead.
+    """
+    path_base = get_network_path(network='genome-links', path=path) + '.mlgraph'
+    base = MultiLayerGraph.load(path_base) if os.path.exists(path_base) else None
+    overlay_masks, gpickle_nodes = {}, {}
+    for celltype in celltypes:
+        rGfile = get_network_path(celltype, network, threshold, path)
+        if (base is not None) and os.path.exists(rGfile + '.overlay'):
+            overlay_masks[celltype] = NetworkOverlay.load(rGfile + '.overlay').node_mask
+        else:
+            print('> No overlay for {celltype:s}, reading {file:s}.gpickle'.format(celltype=celltype, file=rGfile))
+            G = nx.read_gpickle(rGfile + '.gpickle')
+            gpickle_nodes[celltype] = {layer: np.array([n for n, l in G.nodes(data='layer') if l == layer], dtype=str) for layer in layers}
+    #
+    data = {}
+    for layer in layers:
+        if base is not None:
+            start, end = base.layer_range(layer)
+            node_ids = np.asarray(base.node_ids[start:end])
+        else:
+            node_ids = np.unique(np.concatenate([nodes[layer] for nodes in gpickle_nodes.values()]))
+        data[layer] = {}
+        for celltype in celltypes:
+            if celltype in overlay_masks:
+                data[layer][celltype] = overlay_masks[celltype][start:end]
+            else:
+                mask = np.isin(node_ids, gpickle_nodes[celltype][layer])
+                if mask.sum() != len(gpickle_nodes[celltype][layer]):
+                    raise ValueError('{n:,d} {layer:s} nodes of {celltype:s} are not in the genome network.'.format(n=len(gpickle_nodes[celltype][layer]) - mask.sum(), layer=layer, celltype=celltype))
+                data[layer][celltype] = mask
+    return data
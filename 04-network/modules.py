@@ -0,0 +1,221 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: PCA modules (gene sets selected on pairs of PCA components, see `05-data-analysis/entropy-based-modules`)
+#    and their all-pairs proximity, with permutation significance against random modules of the same size.
+#    `ModuleRegistry` loads the module definitions (`data_{celltype}_pca_modules_{layer}.py`), resolves the genes of each module once
+#    against the PCA, distance-angle and entropy results, caches them, and indexes them by module id, gene and layer.
+#
+#
+import os
+import re
+import glob
+import importlib.util
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from pca import read_pca
+from columnar import table_file
+
+
+def module_genes(module, df_pca, df_dian, df_ent, strict=False):
+    """ Genes of a module: inside its `xvals` x `yvals` box of the `xdim` & `ydim` components, and beyond the radius of its entropy cut point.
+    With `strict`, genes on the box edges or at the cut radius are left out (as in the GOEA and gene export)."""
+    xc = module['dim-coords']['xdim']
+    yc = module['dim-coords']['ydim']
+    cx = "{xc:d}c".format(xc=xc)
+    cy = "{yc:d}c".format(yc=yc)
+    cxy = '{xc:d}c-{yc:d}c-dist'.format(xc=xc, yc=yc)  # label-1c-2c-dist
+    cxl, cxh = module['dim-coords']['xvals']
+    cyl, cyh = module['dim-coords']['yvals']
+    cutrank = module['dim-coords']['radius-rank']
+    cutradius = df_ent.loc[((df_ent['dim'] == xc) & (df_ent['cut-rank'] == cutrank)), 'radius-start'].squeeze()
+
+    if strict:
+        df_pca_tmp = df_pca.loc[
+            (
+                (df_pca[cx] > cxl) & (df_pca[cx] < cxh) & (df_pca[cy] > cyl) & (df_pca[cy] < cyh) & (df_dian[cxy] > cutradius)
+            ), ['gene', cx, cy]]
+    else:
+        df_pca_tmp = df_pca.loc[
+            (
+                (df_pca[cx] >= cxl) & (df_pca[cx] <= cxh) & (df_pca[cy] >= cyl) & (df_pca[cy] <= cyh) & (df_dian[cxy] >= cutradius)
+            ), ['gene', cx, cy]]
+    return df_pca_tmp.index.to_list()
+
+
+def membership_matrix(list_genes, genes):
+    """ Sparse (sets x genes) boolean membership matrix of a list of gene sets over the `genes` index. Genes not in it are left out."""
+    rows, cols = [], []
+    for k, set_genes in enumerate(list_genes):
+        positions = np.unique(genes.get_indexer(list(set_genes)))
+        positions = positions[positions >= 0]
+        rows.append(np.full(len(positions), k))
+        cols.append(positions)
+    rows = np.concatenate(rows) if len(rows) else np.zeros(0, dtype=np.int64)
+    cols = np.concatenate(cols) if len(cols) else np.zeros(0, dtype=np.int64)
+    return csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(len(list_genes), len(genes)))
+
+
+def jaccard_all_pairs(list_genes_i, list_genes_j):
+    """ Jaccard of every pair of gene sets (A of `list_genes_i`, B of `list_genes_j`), as a (sets i x sets j) array, from one sparse product."""
+    genes = pd.Index(pd.unique(np.array([g for set_genes in list(list_genes_i) + list(list_genes_j) for g in set_genes], dtype=object)))
+    Mi = membership_matrix(list_genes_i, genes)
+    Mj = membership_matrix(list_genes_j, genes)
+    n_inter = (Mi @ Mj.T).toarray()
+    size_i = np.asarray(Mi.sum(axis=1)).ravel()
+    size_j = np.asarray(Mj.sum(axis=1)).ravel()
+    # Pairs of empty sets are NaN
+    with np.errstate(invalid='ignore'):
+        return n_inter / (size_i[:, np.newaxis] + size_j[np.newaxis, :] - n_inter)
+
+
+def random_gene_sets(genes, sizes, n_permutations, rng):
+    """ `n_permutations` x len(`sizes`) random gene sets drawn from `genes` (without replacement within a set), in permutation order."""
+    genes = np.asarray(genes, dtype=object)
+    return [genes[rng.choice(len(genes), size=size, replace=False)] for _ in range(n_permutations) for size in sizes]
+
+
+def permutation_pvalues(func, list_genes_i, list_genes_j, observed, pool_i, n_permutations=1000, seed=1, batch_size=100):
+    """ One-sided p-values of an all-pairs proximity `observed = func(list_genes_i, list_genes_j)`.
+
+    Each module of `list_genes_i` is replaced by random modules of the same size drawn from `pool_i` (e.g. the genes of its layer)
+    and compared against the unchanged modules of `list_genes_j`. Permutations are batched, so each batch is one call of `func`.
+    Returns `(1 + #null >= observed) / (1 + n_permutations)` as a (sets i x sets j) array, NaN where `observed` is NaN.
+    """
+    rng = np.random.RandomState(seed)
+    sizes = [len(set(genes)) for genes in list_genes_i]
+    n_extreme = np.zeros(observed.shape, dtype=np.int64)
+    for start in range(0, n_permutations, batch_size):
+        n_batch = min(batch_size, n_permutations - start)
+        null = func(random_gene_sets(pool_i, sizes, n_batch, rng), list_genes_j)
+        null = null.reshape(n_batch, len(sizes), -1)
+        n_extreme += (null >= observed[np.newaxis, :, :]).sum(axis=0)
+    pvalues = (1 + n_extreme) / (1 + n_permutations)
+    pvalues[np.isnan(observed)] = np.nan
+    return pvalues
+
+
+def load_module_definitions(path='.'):
+    """ Module definitions of the `data_{celltype}_pca_modules_{layer}.py` files in `path`, as {(celltype, layer): (file, list of modules)}."""
+    definitions = {}
+    for file in sorted(glob.glob(os.path.join(path, 'data_*_pca_modules_*.py'))):
+        name = os.path.splitext(os.path.basename(file))[0]
+        celltype, layer = re.match(r'data_(\w+?)_pca_modules_(\w+)$', name).groups()
+        spec = importlib.util.spec_from_file_location(name, file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        definitions[(celltype, layer.upper())] = (file, getattr(module, name[len('data_'):]))
+    return definitions
+
+
+class ModuleRegistry(object):
+    """ PCA modules of every celltype and layer, with their genes.
+
+    The genes of the modules of a (celltype, layer) are resolved on first use with `module_genes` and kept,
+    together with the lookups by module id and by gene. With `path_cache`, they are also stored in a
+    `pca-modules-{celltype}-{network}-{threshold}-{layer}.csv.gz` file (one row per module gene), which is reused
+    until the definitions or the PCA, distance-angle or entropy results are newer.
+    With `strict`, module bounds are exclusive (see `module_genes`) and the cache file ends in `-strict.csv.gz`.
+    """
+
+    def __init__(self, network='thr', threshold=0.5, path_definitions='.', path_pca='results/pca', path_cache=None, strict=False):
+        self.network = network
+        self.threshold = threshold
+        self.strict = strict
+        self.path_pca = path_pca
+        self.path_cache = path_cache
+        self.definitions = load_module_definitions(path_definitions)
+        # Definitions by module id
+        self.dict_modules = {key: {module['id']: module for module in modules} for key, (file, modules) in self.definitions.items()}
+        # Resolved modules, {(celltype, layer): DataFrame of module genes}
+        self.dict_membership = {}
+        self.dict_genes = {}
+        self.dict_gene_modules = {}
+        self.dict_layer_genes = {}
+
+    def celltypes(self):
+        """ Celltypes with module definitions."""
+        return sorted(set(celltype for celltype, layer in self.definitions))
+
+    def layers(self, celltype):
+        """ Layers of a celltype with module definitions."""
+        return [layer for layer in ['HS', 'MM', 'DM'] if (celltype, layer) in self.definitions]
+
+    def modules(self, celltype, layer):
+        """ Module definitions of a layer, in the order of their file."""
+        return self.definitions[(celltype, layer)][1]
+
+    def module(self, celltype, layer, mid):
+        """ Definition of module `mid`."""
+        return self.dict_modules[(celltype, layer)][mid]
+
+    def genes(self, celltype, layer, mid):
+        """ Genes of module `mid`, in the order of the PCA results."""
+        self.resolve(celltype, layer)
+        return self.dict_genes[(celltype, layer)].get(mid, [])
+
+    def list_genes(self, celltype, layer):
+        """ Genes of each module of a layer, in the order of `modules`."""
+        return [self.genes(celltype, layer, module['id']) for module in self.modules(celltype, layer)]
+
+    def gene_modules(self, celltype, layer, gene):
+        """ Ids of the modules a gene belongs to."""
+        self.resolve(celltype, layer)
+        return self.dict_gene_modules[(celltype, layer)].get(gene, [])
+
+    def layer_genes(self, celltype, layer):
+        """ All genes of the PCA results of a layer (e.g. the pool of random modules)."""
+        if (celltype, layer) not in self.dict_layer_genes:
+            df_pca, _ = read_pca(celltype, self.network, self.threshold, layer, path=self.path_pca)
+            self.dict_layer_genes[(celltype, layer)] = df_pca.index
+        return self.dict_layer_genes[(celltype, layer)]
+
+    def membership(self, celltype, layer):
+        """ Module genes of a layer: a DataFrame with one row per (module, gene) and the 'id_gene', 'module-id' and 'module-name' columns."""
+        self.resolve(celltype, layer)
+        df = self.dict_membership[(celltype, layer)].copy()
+        df['module-name'] = df['module-id'].map({mid: module['name'] for mid, module in self.dict_modules[(celltype, layer)].items()})
+        return df
+
+    def _input_files(self, celltype, layer):
+        """ Files the modules of a layer are resolved from (only those that exist, for the PCA results)."""
+        threshold_str = str(self.threshold).replace('.', 'p')
+        path = os.path.join(self.path_pca, celltype, layer, 'pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}'.format(celltype=celltype, network=self.network, threshold=threshold_str, layer=layer))
+        files = [self.definitions[(celltype, layer)][0], path + '-dian.csv.gz', path + '-entropy.csv.gz']
+        files_pca = [table_file(os.path.join(self.path_pca, celltype, 'pca-{celltype:s}-s.columns'.format(celltype=celltype))), path + '-dim.csv.gz']
+        return files + [file for file in files_pca if os.path.exists(file)]
+
+    def _cache_file(self, celltype, layer):
+        threshold_str = str(self.threshold).replace('.', 'p')
+        strict_str = '-strict' if self.strict else ''
+        return os.path.join(self.path_cache, 'pca-modules-{celltype:s}-{network:s}-{threshold:s}-{layer:s}{strict:s}.csv.gz'.format(celltype=celltype, network=self.network, threshold=threshold_str, layer=layer, strict=strict_str))
+
+    def resolve(self, celltype, layer):
+        """ Genes of the modules of a layer, from the cache when it is up to date. Returns the (id_gene, module-id) DataFrame."""
+        key = (celltype, layer)
+        if key in self.dict_membership:
+            return self.dict_membership[key]
+        files = self._input_files(celltype, layer)
+        wCacheFile = self._cache_file(celltype, layer) if self.path_cache is not None else None
+        if (wCacheFile is not None) and os.path.exists(wCacheFile) and (os.path.getmtime(wCacheFile) >= max(os.path.getmtime(file) for file in files)):
+            df = pd.read_csv(wCacheFile, dtype={'id_gene': str})
+        else:
+            print('Resolving PCA modules of {celltype:s}-{layer:s}'.format(celltype=celltype, layer=layer))
+            df_pca, _ = read_pca(celltype, self.network, self.threshold, layer, path=self.path_pca)
+            self.dict_layer_genes[key] = df_pca.index
+            df_dian = pd.read_csv(files[1], index_col=0)
+            df_ent = pd.read_csv(files[2], index_col=0)
+            r = []
+            for module in self.modules(celltype, layer):
+                r.extend((gene, module['id']) for gene in module_genes(module, df_pca, df_dian, df_ent, strict=self.strict))
+            df = pd.DataFrame(r, columns=['id_gene', 'module-id'])
+            if wCacheFile is not None:
+                os.makedirs(os.path.dirname(wCacheFile), exist_ok=True)
+                df.to_csv(wCacheFile, index=False)
+        # Lookups by module id and by gene
+        self.dict_membership[key] = df
+        self.dict_genes[key] = df.groupby('module-id', sort=False)['id_gene'].apply(list).to_dict()
+        self.dict_gene_modules[key] = df.groupby('id_gene', sort=False)['module-id'].apply(list).to_dict()
+        return df
@@ -0,0 +1,150 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Persistent EggNOG (Metazoa, 33208) orthology index built by `00-build-orthology-index.py`.
+#    Family -> member proteins is stored CSR-style (`indptr`, `members`, `species`), in the order of the members file.
+#    Protein -> family is stored per species, CSR-style over `id_string` codes.
+#
+#
+import os
+import numpy as np
+import pandas as pd
+from vocabulary import load_vocabulary, dict_taxid
+
+
+layers = ['HS', 'MM', 'DM']
+
+
+class OrthologyIndex(object):
+    """ EggNOG family membership over the HS, MM & DM `id_string` vocabularies.
+
+    families: `id_eggnog` codes of each family, in file order.
+    indptr: members of family `f` are `members[indptr[f]:indptr[f + 1]]`.
+    members: `id_string` codes (in the vocabulary of their species).
+    species: species of each member, as a position in `layers`.
+    protein_indptr/protein_families: for each species, families of protein `p` are `protein_families[s][protein_indptr[s][p]:protein_indptr[s][p + 1]]`.
+    """
+
+    def __init__(self, families, indptr, members, species, protein_indptr=None, protein_families=None, path='../data'):
+        self.families = families
+        self.indptr = indptr
+        self.members = members
+        self.species = species
+        self.path = path
+        self.vocab_eggnog = load_vocabulary('EggNOG', 'id_eggnog', path=path)
+        self.vocab_string = {layer: load_vocabulary(layer, 'id_string', path=path) for layer in layers}
+        if protein_indptr is None:
+            protein_indptr, protein_families = self._build_protein_to_family()
+        self.protein_indptr = protein_indptr
+        self.protein_families = protein_families
+
+    @classmethod
+    def from_members(cls, df_members, path='../data'):
+        """ Builds the index from an EggNOG members DataFrame with `id_eggnog` and `aliases` (comma-separated) columns."""
+        vocab_eggnog = load_vocabulary('EggNOG', 'id_eggnog', path=path)
+        # One row per (family, member)
+        s = df_members['aliases'].str.split(',')
+        s.index = np.arange(len(s))
+        s = s.explode()
+        taxid = s.str.split('.', n=1).str[0]
+        #
+        list_family, list_members, list_species = [], [], []
+        for k, layer in enumerate(layers):
+            ss = s.loc[(taxid == dict_taxid[layer]).values]
+            codes = load_vocabulary(layer, 'id_string', path=path).encode(ss.values)
+            is_known = (codes >= 0)
+            list_family.append(ss.index.values[is_known])
+            list_members.append(codes[is_known])
+            list_species.append(np.full(is_known.sum(), k, dtype=np.int8))
+        family = np.concatenate(list_family)
+        # Stable sort keeps the order of the members file within each family & species
+        order = np.argsort(family, kind='stable')
+        family = family[order]
+        members = np.concatenate(list_members)[order].astype(np.int32)
+        species = np.concatenate(list_species)[order]
+        # Only families with at least one member in our species
+        has_members, family = np.unique(family, return_inverse=True)
+        families = vocab_eggnog.encode(df_members['id_eggnog'].values[has_members])
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(family, minlength=len(has_members)))]).astype(np.int64)
+        return cls(families, indptr, members, species, path=path)
+
+    def _build_protein_to_family(self):
+        family = self.member_family()
+        protein_indptr, protein_families = {}, {}
+        for k, layer in enumerate(layers):
+            is_layer = (self.species == k)
+            codes = self.members[is_layer]
+            order = np.argsort(codes, kind='stable')
+            protein_families[layer] = family[is_layer][order].astype(np.int32)
+            protein_indptr[layer] = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(self.vocab_string[layer])))]).astype(np.int64)
+        return protein_indptr, protein_families
+
+    @classmethod
+    def load(cls, path='../data', mmap_mode='r'):
+        rIndexPath = os.path.join(path, 'EggNOG', 'cache', 'orthology')
+        arrays = {name: np.load(os.path.join(rIndexPath, name + '.npy'), mmap_mode=mmap_mode) for name in ['families', 'indptr', 'members', 'species']}
+        protein_indptr = {layer: np.load(os.path.join(rIndexPath, layer + '-indptr.npy'), mmap_mode=mmap_mode) for layer in layers}
+        protein_families = {layer: np.load(os.path.join(rIndexPath, layer + '-families.npy'), mmap_mode=mmap_mode) for layer in layers}
+        return cls(protein_indptr=protein_indptr, protein_families=protein_families, path=path, **arrays)
+
+    def save(self, path=None):
+        wIndexPath = os.path.join(path or self.path, 'EggNOG', 'cache', 'orthology')
+        if not os.path.exists(wIndexPath):
+            os.makedirs(wIndexPath)
+        for name in ['families', 'indptr', 'members', 'species']:
+            np.save(os.path.join(wIndexPath, name + '.npy'), getattr(self, name))
+        for layer in layers:
+            np.save(os.path.join(wIndexPath, layer + '-indptr.npy'), self.protein_indptr[layer])
+            np.save(os.path.join(wIndexPath, layer + '-families.npy'), self.protein_families[layer])
+
+    def __len__(self):
+        return len(self.families)
+
+    def member_family(self):
+        """ Family (position in the index) of each member."""
+        return np.repeat(np.arange(len(self.families), dtype=np.int32), np.diff(self.indptr))
+
+    def families_of(self, layer, id_strings):
+        """ Returns a (id_string, id_eggnog) DataFrame with the families of each protein in `id_strings`."""
+        codes = self.vocab_string[layer].encode(list(id_strings))
+        codes = codes[codes >= 0]
+        indptr = self.protein_indptr[layer]
+        counts = indptr[codes + 1] - indptr[codes]
+        # Positions of every [indptr[p], indptr[p + 1]) range, concatenated
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = np.repeat(indptr[codes], counts) + offsets
+        return pd.DataFrame({
+            'id_string': self.vocab_string[layer].decode(np.repeat(codes, counts)),
+            'id_eggnog': self.vocab_eggnog.decode(self.families[self.protein_families[layer][positions]])
+        })
+
+    def membership(self, dict_id_strings):
+        """ Members of every family that are in `dict_id_strings` ({'HS': id_strings, 'MM': ..., 'DM': ...}).
+
+        Returns (family, member, species) arrays, where `family` is a position in the index.
+        """
+        is_wanted = np.zeros(len(self.members), dtype=bool)
+        for k, layer in enumerate(layers):
+            if layer not in dict_id_strings:
+                continue
+            is_layer = (self.species == k)
+            mask = self.vocab_string[layer].mask(list(dict_id_strings[layer]))
+            is_wanted[is_layer] = mask[self.members[is_layer]]
+        family = self.member_family()
+        return family[is_wanted], np.asarray(self.members[is_wanted]), np.asarray(self.species[is_wanted])
+
+    def query(self, dict_id_strings):
+        """ Families containing any of the proteins in `dict_id_strings` ({'HS': id_strings, 'MM': ..., 'DM': ...}), split by species.
+
+        Returns a DataFrame indexed by `id_eggnog` with one list of `id_string` per species (`id_string_HS`, `id_string_MM`, `id_string_DM`).
+        """
+        family, member, species = self.membership(dict_id_strings)
+        matched = np.unique(family)
+        df = pd.DataFrame(index=pd.Index(self.vocab_eggnog.decode(self.families[matched]), name='id_eggnog'))
+        for k, layer in enumerate(layers):
+            is_layer = (species == k)
+            s = pd.Series(self.vocab_string[layer].decode(member[is_layer]), index=family[is_layer])
+            s = s.groupby(level=0, sort=False).agg(list).reindex(matched)
+            df['id_string_' + layer] = [x if isinstance(x, list) else [] for x in s.values]
+        return df
@@ -0,0 +1,131 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: PCA of (sparse) network adjacency matrices, used by `05-calc-pca.py` and `05-calc-pca-batch.py`.
+#    `sparse_pca` computes only the requested components with a truncated SVD (ARPACK) of the implicitly centered adjacency,
+#    so the dense N x N matrix, and its centered copy, are never built. `dense_pca` is the full SVD reference.
+#
+#
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import LinearOperator, svds
+from columnar import read_table, table_file
+
+
+def _svd_flip(U, Vt):
+    """ Deterministic signs: the largest absolute value of each column of U is positive (as sklearn's `svd_flip`)."""
+    signs = np.sign(U[np.argmax(np.abs(U), axis=0), np.arange(U.shape[1])])
+    signs[signs == 0] = 1
+    return U * signs, Vt * signs[:, np.newaxis]
+
+
+def centered_operator(A):
+    """ `LinearOperator` of `A - 1 mean(A, axis=0)`, applied without building the centered (dense) matrix."""
+    A = csr_matrix(A, dtype=np.float64)
+    AT = A.T.tocsr()
+    n, m = A.shape
+    mean = np.asarray(A.mean(axis=0)).ravel()
+
+    def matvec(v):
+        v = np.asarray(v, dtype=np.float64).reshape(m, -1)
+        return A @ v - np.outer(np.ones(n), mean @ v)
+
+    def rmatvec(u):
+        u = np.asarray(u, dtype=np.float64).reshape(n, -1)
+        return AT @ u - np.outer(mean, u.sum(axis=0))
+
+    return LinearOperator((n, m), matvec=matvec, rmatvec=rmatvec, matmat=matvec, rmatmat=rmatvec, dtype=np.float64), mean
+
+
+def total_variance(A):
+    """ Sum of the column variances of `A` (times `n - 1`), i.e. the squared Frobenius norm of the centered matrix."""
+    A = csr_matrix(A, dtype=np.float64)
+    mean = np.asarray(A.mean(axis=0)).ravel()
+    return A.multiply(A).sum() - A.shape[0] * (mean @ mean)
+
+
+def dense_pca(A, n_components=None):
+    """ PCA with a full SVD of the dense centered matrix, as `sklearn.decomposition.PCA(svd_solver='full')`.
+    Returns the `n_components` first principal component scores (n x k) and their explained variance ratios."""
+    X = A.toarray() if hasattr(A, 'toarray') else np.asarray(A, dtype=np.float64)
+    X = X - X.mean(axis=0)
+    U, S, Vt = np.linalg.svd(X, full_matrices=False)
+    U, Vt = _svd_flip(U, Vt)
+    k = len(S) if n_components is None else min(n_components, len(S))
+    total = (S ** 2).sum()
+    ratio = (S[:k] ** 2) / total if total > 0 else np.zeros(k)
+    return U[:, :k] * S[:k], ratio
+
+
+def sparse_pca(A, n_components, seed=1):
+    """ PCA of a sparse matrix `A` (n x m) with a truncated SVD of its implicitly centered version.
+
+    Only `n_components` singular values/vectors are computed (ARPACK, with a `seed`ed starting vector for reproducible results).
+    Explained variance ratios use the total variance of `A`, computed from its non-zeros.
+    Falls back to `dense_pca` when `n_components` is not smaller than the smallest dimension minus one (ARPACK's limit).
+    Returns the principal component scores (n x k) and their explained variance ratios, by decreasing variance.
+    """
+    n, m = A.shape
+    if n_components >= min(n, m) - 1:
+        return dense_pca(A, n_components)
+    X, _ = centered_operator(A)
+    v0 = np.random.RandomState(seed).uniform(-1, 1, size=min(n, m))
+    U, S, Vt = svds(X, k=n_components, v0=v0, solver='arpack')
+    # svds returns increasing singular values
+    order = np.argsort(S)[::-1]
+    U, S, Vt = U[:, order], S[order], Vt[order, :]
+    U, Vt = _svd_flip(U, Vt)
+    total = total_variance(A)
+    ratio = (S ** 2) / total if total > 0 else np.zeros(len(S))
+    return U * S, ratio
+
+
+def compare_pca(scores, ratio, scores_ref, ratio_ref):
+    """ Per component gaps between two PCA results: absolute difference of explained variance ratios and
+    largest absolute difference of scores (up to sign, which is arbitrary for degenerate components)."""
+    k = min(scores.shape[1], scores_ref.shape[1])
+    gap_ratio = np.abs(ratio[:k] - ratio_ref[:k])
+    gap_same = np.abs(scores[:, :k] - scores_ref[:, :k]).max(axis=0) if len(scores) else np.zeros(k)
+    gap_flip = np.abs(scores[:, :k] + scores_ref[:, :k]).max(axis=0) if len(scores) else np.zeros(k)
+    return gap_ratio, np.minimum(gap_same, gap_flip)
+
+
+#
+# Batch results (see `05-calc-pca-batch.py`)
+#
+def layer_hash(A, node_ids, n_components):
+    """ Content hash of a layer adjacency (nodes, edges and weights) and the number of components, to cache its PCA."""
+    A = csr_matrix(A, dtype=np.float64)
+    A.sort_indices()
+    h = hashlib.sha1()
+    h.update('\t'.join(map(str, node_ids)).encode('utf-8'))
+    for array in [A.indptr.astype(np.int64), A.indices.astype(np.int64), A.data, np.array([n_components], dtype=np.int64)]:
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+
+def read_pca(celltype, network='thr', threshold=0.5, layer='HS', path='results/pca'):
+    """ PCA scores (indexed by id_gene, with 'gene' and '1c', '2c', ... columns) and explained variance ratios of a network layer.
+    Reads only the rows of the layer from the per-celltype columnar tables of `05-calc-pca-batch.py`, unless the layer is not
+    in them or the CSVs of `05-calc-pca.py` were written after it; otherwise reads the CSVs."""
+    threshold_str = str(threshold).replace('.', 'p')
+    rPCAFile = os.path.join(path, celltype, layer, 'pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-dim.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer))
+    rSFile = os.path.join(path, celltype, layer, 'pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-s.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer))
+    rTable = os.path.join(path, celltype, 'pca-{celltype:s}.columns'.format(celltype=celltype))
+    rSTable = os.path.join(path, celltype, 'pca-{celltype:s}-s.columns'.format(celltype=celltype))
+    if os.path.exists(table_file(rTable)) and os.path.exists(table_file(rSTable)):
+        filters = [('network', network), ('threshold', threshold), ('layer', layer)]
+        df_s = read_table(rSTable, filters=filters)
+        if len(df_s) and not (os.path.exists(rPCAFile) and os.path.getmtime(rPCAFile) > df_s['time'].max()):
+            df_pca = read_table(rTable, filters=filters).drop(columns=['network', 'threshold', 'layer']).set_index('id_gene')
+            # Layers computed with fewer components than others in the table
+            df_pca = df_pca.drop(columns=[c for c in df_pca.columns if (c != 'gene') and df_pca[c].isna().all()])
+            s = df_s.set_index('component')['explained_variance_ratio'].sort_index()
+            return df_pca, s
+    df_pca = pd.read_csv(rPCAFile, index_col=0, encoding='utf-8')
+    s = pd.read_csv(rSFile, index_col=0, header=0, encoding='utf-8').iloc[:, 0]
+    return df_pca, s
@@ -0,0 +1,198 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Weight-sorted index of the intra-layer edges of a MultiLayer network (HS, MM & DM).
+#    Thresholded networks (`weight >= threshold`, see `03-extract-thresholded-network.py`) are read with a binary search
+#    instead of scanning every edge and node.
+#
+#
+import numpy as np
+import pandas as pd
+
+
+class ThresholdIndex(object):
+    """ Intra-layer edges sorted by weight, for thresholding at any cutoff.
+
+    Edges of layer `l` are `edge_ptr[l]:edge_ptr[l + 1]`, sorted by increasing `edge_weight`, so the edges kept at a threshold
+    are a suffix found with a binary search. Nodes of layer `l` are `node_order[node_ptr[l]:node_ptr[l + 1]]`, sorted by
+    `node_weight`, their largest intra edge weight (-inf without intra edges). A node is kept while it has an intra edge left.
+    `core_cumsum` counts the core genes in `node_order` up to each position.
+    edge_i, edge_j and node_order are positions in `node_ids`.
+    """
+
+    def __init__(self, layers, node_ids, node_layer, node_core, edge_ptr, edge_i, edge_j, edge_weight, node_ptr, node_order, node_weight):
+        self.layers = list(layers)
+        self.node_ids = node_ids
+        self.node_layer = node_layer
+        self.node_core = node_core
+        self.edge_ptr = edge_ptr
+        self.edge_i = edge_i
+        self.edge_j = edge_j
+        self.edge_weight = edge_weight
+        self.node_ptr = node_ptr
+        self.node_order = node_order
+        self.node_weight = node_weight
+        self.core_cumsum = np.concatenate([[0], np.cumsum(node_core[node_order])])
+
+    @classmethod
+    def from_networkx(cls, G, layers=['HS', 'MM', 'DM'], weight='weight', core='core', edge_type='intra'):
+        """ Indexes the `edge_type` edges (all edges if None) of G that have a `weight` attribute. Nodes need a 'layer' attribute.
+        Edges are indexed in the layer of their first node."""
+        node_ids = np.array(list(G.nodes()), dtype=object)
+        dict_node_position = {n: p for p, n in enumerate(node_ids)}
+        dict_layer = {layer: l for l, layer in enumerate(layers)}
+        node_layer = np.array([dict_layer.get(l, -1) for n, l in G.nodes(data='layer')], dtype=np.int8)
+        node_core = np.array([d.get(core, False) == True for n, d in G.nodes(data=True)], dtype=bool)
+        #
+        edges = [(dict_node_position[i], dict_node_position[j], d[weight]) for i, j, d in G.edges(data=True) if ((edge_type is None) or (d.get('type') == edge_type)) and (weight in d)]
+        edge_i = np.array([i for i, j, w in edges], dtype=np.int64)
+        edge_j = np.array([j for i, j, w in edges], dtype=np.int64)
+        edge_weight = np.array([w for i, j, w in edges], dtype=np.float64)
+        # Edges by layer, then weight
+        edge_layer = node_layer[edge_i]
+        order = np.lexsort((edge_weight, edge_layer))
+        edge_i, edge_j, edge_weight = edge_i[order], edge_j[order], edge_weight[order]
+        edge_ptr = np.concatenate([[0], np.cumsum(np.bincount(edge_layer, minlength=len(layers)))]).astype(np.int64)
+        # Largest intra edge weight of each node
+        node_max = np.full(len(node_ids), -np.inf)
+        np.maximum.at(node_max, edge_i, edge_weight)
+        np.maximum.at(node_max, edge_j, edge_weight)
+        in_layers = np.flatnonzero(node_layer >= 0)
+        node_order = in_layers[np.lexsort((node_max[in_layers], node_layer[in_layers]))]
+        node_ptr = np.concatenate([[0], np.cumsum(np.bincount(node_layer[in_layers], minlength=len(layers)))]).astype(np.int64)
+        return cls(layers, node_ids, node_layer, node_core, edge_ptr, edge_i, edge_j, edge_weight, node_ptr, node_order, node_max[node_order])
+
+    #
+    # Binary search
+    #
+    def _edge_position(self, layer, threshold):
+        l = self.layers.index(layer)
+        start, end = self.edge_ptr[l], self.edge_ptr[l + 1]
+        return start + np.searchsorted(self.edge_weight[start:end], threshold, side='left'), end
+
+    def _node_position(self, layer, threshold):
+        l = self.layers.index(layer)
+        start, end = self.node_ptr[l], self.node_ptr[l + 1]
+        return start + np.searchsorted(self.node_weight[start:end], threshold, side='left'), end
+
+    #
+    # Queries. `threshold` may be an array; `upto` selects values below it instead of the whole suffix.
+    #
+    def edges(self, layer, threshold, upto=None):
+        """ (edge_i, edge_j, edge_weight) of the `layer` edges with `threshold <= weight (< upto)`."""
+        start, end = self._edge_position(layer, threshold)
+        if upto is not None:
+            end, _ = self._edge_position(layer, upto)
+        return self.edge_i[start:end], self.edge_j[start:end], self.edge_weight[start:end]
+
+    def nodes(self, layer, threshold, upto=None):
+        """ Positions of the `layer` nodes whose largest intra edge weight is `>= threshold (< upto)`."""
+        start, end = self._node_position(layer, threshold)
+        if upto is not None:
+            end, _ = self._node_position(layer, upto)
+        return self.node_order[start:end]
+
+    def number_of_edges(self, layer, threshold):
+        start, end = self._edge_position(layer, threshold)
+        return end - start
+
+    def number_of_nodes(self, layer, threshold):
+        start, end = self._node_position(layer, threshold)
+        return end - start
+
+    def number_of_core(self, layer, threshold):
+        start, end = self._node_position(layer, threshold)
+        return self.core_cumsum[end] - self.core_cumsum[start]
+
+    def counts(self, thresholds, layers=None):
+        """ DataFrame with the number of nodes, edges and core genes of each layer at each threshold."""
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        r = []
+        for layer in (self.layers if layers is None else layers):
+            r.append(pd.DataFrame({
+                'layer': layer,
+                'threshold': thresholds,
+                'n-nodes': self.number_of_nodes(layer, thresholds),
+                'n-edges': self.number_of_edges(layer, thresholds),
+                'n-core': self.number_of_core(layer, thresholds)
+            }))
+        return pd.concat(r, ignore_index=True)
+
+    #
+    # networkx
+    #
+    def iter_thresholded(self, G, thresholds):
+        """ Thresholds G in place for each of the (increasing) `thresholds`, yielding `(threshold, G)`.
+
+        Intra edges with `weight < threshold` are removed, then nodes left without intra edges, as `03-extract-thresholded-network.py` does.
+        Only the edges and nodes dropped since the previous threshold are touched. Export or copy G before the next iteration.
+        """
+        lower = -np.inf
+        for threshold in sorted(thresholds):
+            for layer in self.layers:
+                edge_i, edge_j, _ = self.edges(layer, lower, upto=threshold)
+                G.remove_edges_from(zip(self.node_ids[edge_i], self.node_ids[edge_j]))
+                G.remove_nodes_from(self.node_ids[self.nodes(layer, lower, upto=threshold)])
+            lower = threshold
+            yield threshold, G
+
+
+def threshold_sweep(index, layer, thresholds=None):
+    """ Connected components of a `layer` of `index` at every threshold, in one pass.
+
+    Edges are added by decreasing weight into a union-find, and statistics are recorded at each of the `thresholds`
+    (defaults to every distinct edge weight). Only nodes with an intra edge left are counted, as in thresholded networks.
+    Ties for the largest component go to the component that reached that size first.
+    Returns a DataFrame by decreasing threshold with the number of nodes, edges, components, nodes and edges in the largest component and core genes.
+    """
+    edge_i, edge_j, edge_weight = index.edges(layer, -np.inf)
+    if thresholds is None:
+        thresholds = np.unique(edge_weight)[::-1]
+    else:
+        thresholds = np.sort(np.asarray(thresholds, dtype=np.float64))[::-1]
+    # Number of edges (by decreasing weight) with weight >= each threshold
+    n_added = len(edge_weight) - np.searchsorted(edge_weight, thresholds, side='left')
+    edge_i = edge_i[::-1].tolist()
+    edge_j = edge_j[::-1].tolist()
+    #
+    parent, size, n_component_edges = {}, {}, {}
+
+    def find(n):
+        while parent[n] != n:
+            parent[n] = parent[parent[n]]
+            n = parent[n]
+        return n
+
+    n_nodes, n_unions = 0, 0
+    largest = None
+    r = []
+    e = 0
+    for n_edges in n_added.tolist():
+        for i, j in zip(edge_i[e:n_edges], edge_j[e:n_edges]):
+            for n in (i, j):
+                if n not in parent:
+                    parent[n], size[n], n_component_edges[n] = n, 1, 0
+                    n_nodes += 1
+                    if largest is None:
+                        largest = n
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                if size[ri] < size[rj]:
+                    ri, rj = rj, ri
+                parent[rj] = ri
+                size[ri] += size[rj]
+                n_component_edges[ri] += n_component_edges[rj]
+                n_unions += 1
+            n_component_edges[ri] += 1
+            if size[ri] > size[largest] or parent[largest] != largest:
+                largest = ri
+        e = n_edges
+        if largest is None:
+            r.append((n_nodes, n_edges, 0, 0, 0))
+        else:
+            r.append((n_nodes, n_edges, n_nodes - n_unions, size[largest], n_component_edges[largest]))
+    df = pd.DataFrame(r, columns=['n-nodes', 'n-edges', 'n-components', 'n-nodes-largest-component', 'n-edges-largest-component'])
+    df.insert(0, 'threshold', thresholds)
+    df['n-core'] = index.number_of_core(layer, thresholds)
+    return df
@@ -1,9 +1,13 @@
 import os
 import gzip
 from io import StringIO
+import numpy as np
 import pandas as pd
 import networkx as nx
+from scipy.sparse import csr_matrix
 from collections import defaultdict, Counter
+from vocabulary import load_vocabulary, dict_taxid
+from mlgraph import MultiLayerGraph
 
 
 def transpose_variable_across_layers(G, variable, combination='sum'):
@@ -26,12 +30,15 @@ def transpose_variable_across_layers(G, variable, combination='sum'):
     return G
 
 
-def get_network_layer(G, layer=''):
-    return G.subgraph([n for n, d in G.nodes(data=True) if (d.get('layer') == layer)]).copy()
+def get_network_layer(G, layer='', copy=True):
+    """ Subgraph of a layer. With `copy=False` a read-only view is returned instead; nodes, edges and attributes are not copied."""
+    Gl = G.subgraph([n for n, l in G.nodes(data='layer') if (l == layer)])
+    return Gl.copy() if copy else Gl
 
 
-def get_network_by_attribute(G, attribute='', value=''):
-    return G.subgraph([n for n, d in G.nodes(data=True) if (d.get(attribute) == value)]).copy()
+def get_network_by_attribute(G, attribute='', value='', copy=True):
+    Ga = G.subgraph([n for n, d in G.nodes(data=True) if (d.get(attribute) == value)])
+    return Ga.copy() if copy else Ga
 
 
 def get_network_largest_connected_component(G):
@@ -39,19 +46,236 @@ def get_network_largest_connected_component(G):
     return G.subgraph(largest_cc).copy()
 
 
-def open_undefined_last_column_files(filepath, skiprows=0, n_fixed_cols=None, sep='\t', *args, **kwargs):
-    """ Some StringDB files need manual parsing to be loaded as a pandas DataFrame."""
+def get_network_adjacency(G, edge_type=None, weight=None):
+    """ Symmetric sparse adjacency between the nodes of G, in `G.nodes()` order. Use `edge_type` ('intra' or 'cross') to select edges.
+    Entries are the number of edges or, with `weight`, the edge attribute (1 if missing, as `nx.to_numpy_matrix`)."""
+    dict_node_position = {n: p for p, n in enumerate(G.nodes())}
+    edges = [(dict_node_position[i], dict_node_position[j], 1 if weight is None else d.get(weight, 1)) for i, j, d in G.edges(data=True) if (edge_type is None) or (d.get('type') == edge_type)]
+    i = np.array([i for i, j, w in edges], dtype=np.int64)
+    j = np.array([j for i, j, w in edges], dtype=np.int64)
+    w = np.array([w for i, j, w in edges], dtype=np.int32 if weight is None else np.float64)
+    not_loop = (i != j)
+    n = len(dict_node_position)
+    return csr_matrix((np.concatenate([w, w[not_loop]]), (np.concatenate([i, j[not_loop]]), np.concatenate([j, i[not_loop]]))), shape=(n, n))
+
+
+def get_conserved_nodes(G, layers=['HS', 'MM', 'DM'], min_layers=2):
+    """ Nodes with cross edges to at least `min_layers` distinct layers, and still with an intra edge once the other nodes are removed.
+
+    Distinct neighbor layers are counted with one sparse product of the cross adjacency and a node x layer indicator matrix.
+    Intra edges left are the row counts of the intra adjacency restricted to the kept nodes.
+    """
+    nodes = np.array(list(G.nodes()), dtype=object)
+    dict_layer = {layer: l for l, layer in enumerate(layers)}
+    node_layer = np.array([dict_layer.get(l, -1) for n, l in G.nodes(data='layer')], dtype=np.int64)
+    in_layers = np.flatnonzero(node_layer >= 0)
+    L = csr_matrix((np.ones(len(in_layers), dtype=np.int32), (in_layers, node_layer[in_layers])), shape=(len(nodes), len(layers)))
+    # Number of distinct layers reached by cross edges
+    n_layers = ((get_network_adjacency(G, edge_type='cross') @ L) > 0).sum(axis=1).A1
+    is_conserved = (n_layers >= min_layers)
+    # Intra edges among the conserved nodes
+    has_intra = (get_network_adjacency(G, edge_type='intra') @ is_conserved.astype(np.int32)) > 0
+    return nodes[is_conserved & has_intra].tolist()
+
+
+def iter_undefined_last_column_files(filepath, skiprows=0, n_fixed_cols=None, sep='\t', chunksize=500000, row_filter=None, *args, **kwargs):
+    """ Streams some StringDB/EggNOG files that need manual parsing as pandas DataFrame chunks.
+
+    Each line is split on `sep` and only the first `n_fixed_cols` columns plus the last column are kept.
+    Lines are buffered `chunksize` at a time and parsed with `pd.read_csv`, so memory is bounded by the chunk size.
+    If `row_filter` is given, it is called with the list of fields of each line (the last one still holds the line break)
+    and only lines for which it returns True are parsed.
+    If no `names` are given, the first line is taken as header and reused for every chunk.
+    """
+    nrows = kwargs.pop('nrows', None)
     with gzip.open(filepath, 'rt') as f:
-        ios = u''
         # Skip header
         for i in range(skiprows):
             _ = f.readline()
+        header = []
+        if kwargs.get('names') is None:
+            # Header is reduced to the same columns as the rows
+            sline = f.readline().split(sep)
+            header = [u'\t'.join(sline[:n_fixed_cols]) + u'\t' + sline[-1]]
+        buffer = []
+        n_rows = 0
         # Loop file content
-        for i, line in enumerate(f, start=0):
+        for line in f:
             sline = line.split(sep)
-            ios += u'\t'.join(sline[:n_fixed_cols]) + u'\t' + sline[-1]
+            if (row_filter is not None) and (not row_filter(sline)):
+                continue
+            buffer.append(u'\t'.join(sline[:n_fixed_cols]) + u'\t' + sline[-1])
+            n_rows += 1
+            if (nrows is not None) and (n_rows >= nrows):
+                break
+            if len(buffer) >= chunksize:
+                yield pd.read_csv(StringIO(u''.join(header + buffer)), sep='\t', encoding='utf-8', *args, **kwargs)
+                buffer = []
+        if len(buffer):
+            yield pd.read_csv(StringIO(u''.join(header + buffer)), sep='\t', encoding='utf-8', *args, **kwargs)
+
+
+def open_undefined_last_column_files(filepath, skiprows=0, n_fixed_cols=None, sep='\t', chunksize=500000, row_filter=None, *args, **kwargs):
+    """ Some StringDB files need manual parsing to be loaded as a pandas DataFrame.
+    Parsing is done in chunks, see `iter_undefined_last_column_files`."""
+    chunks = list(iter_undefined_last_column_files(filepath, skiprows, n_fixed_cols, sep, chunksize, row_filter, *args, **kwargs))
+    if not len(chunks):
+        return pd.DataFrame(columns=kwargs.get('names'))
+    return pd.concat(chunks, axis='index', ignore_index=(kwargs.get('index_col') is None))
+
+
+def load_string_links(specie, id_strings=None, columns=None, decode=True, path='../data'):
+    """ Loads a StringDB link table of `specie` ('HS', 'MM' or 'DM') from the columnar cache written by `00-cache-stringdb-links.py`.
+
+    Columns are memory-mapped `.npy` files, so only `protein1`, `protein2` and the requested evidence `columns` are read.
+    If `id_strings` is given, only links with both proteins in it are kept; the filter is applied on the integer codes.
+    If `decode` is False, `protein1`/`protein2` are returned as `id_string` codes (see `vocabulary.py`).
+    """
+    vocab_string = load_vocabulary(specie, 'id_string', path=path)
+    rCachePath = os.path.join(path, 'StringDB', dict_taxid[specie], 'cache', 'links')
+    protein1 = np.load(os.path.join(rCachePath, 'protein1.npy'), mmap_mode='r')
+    protein2 = np.load(os.path.join(rCachePath, 'protein2.npy'), mmap_mode='r')
+    if columns is None:
+        columns = [f[:-4] for f in sorted(os.listdir(rCachePath)) if f.endswith('.npy') and f not in ['protein1.npy', 'protein2.npy']]
+    #
+    if id_strings is not None:
+        is_wanted = vocab_string.mask(list(id_strings))
+        mask = is_wanted[protein1] & is_wanted[protein2]
+    else:
+        mask = slice(None)
+    #
+    data = {
+        'protein1': np.asarray(protein1[mask]),
+        'protein2': np.asarray(protein2[mask])
+    }
+    if decode:
+        data['protein1'] = vocab_string.decode(data['protein1'])
+        data['protein2'] = vocab_string.decode(data['protein2'])
+    for column in columns:
+        data[column] = np.load(os.path.join(rCachePath, column + '.npy'), mmap_mode='r')[mask]
+    return pd.DataFrame(data)
+
+
+def load_intra_edges(specie, dict_id_string_to_id_gene, columns=['textmining', 'database', 'experiments', 'coexpression', 'neighborhood', 'fusion', 'cooccurence', 'combined_score'], path='../data'):
+    """ Loads the StringDB links between the genes of one layer as typed numpy columns.
+
+    `dict_id_string_to_id_gene` maps each wanted `id_string` to its `id_gene`. Link ends are mapped with an array lookup over `id_string` codes.
+    Returns (id_gene_i, id_gene_j, dict_columns), where `dict_columns` holds the uint16 evidence `columns` plus a float64 `weight` (combined_score / 1000).
+    A 0 evidence score means the channel is missing for that edge.
+    """
+    vocab_string = load_vocabulary(specie, 'id_string', path=path)
+    id_strings = list(dict_id_string_to_id_gene.keys())
+    codes = vocab_string.encode(id_strings)
+    id_genes = np.array(list(dict_id_string_to_id_gene.values()), dtype=object)
+    # id_string code -> id_gene position
+    lookup = np.full(len(vocab_string), -1, dtype=np.int64)
+    lookup[codes[codes >= 0]] = np.arange(len(id_strings))[codes >= 0]
+    #
+    df_links = load_string_links(specie, id_strings=id_strings, columns=columns, decode=False, path=path)
+    id_gene_i = id_genes[lookup[df_links['protein1'].values]]
+    id_gene_j = id_genes[lookup[df_links['protein2'].values]]
+    dict_columns = {column: df_links[column].values for column in columns}
+    dict_columns['weight'] = dict_columns['combined_score'] / 1000
+    return id_gene_i, id_gene_j, dict_columns
+
+
+def edge_tuples_from_columns(id_i, id_j, dict_columns, **kwargs):
+    """ Returns a list of networkx (i, j, attrs) tuples from edge columns. Zero (missing) values are left out of `attrs`, extra `kwargs` are added to every edge.
+    Values keep the type of their column: integer columns give ints, float columns give floats."""
+    attrs = [dict() for _ in range(len(id_i))]
+    for name, values in dict_columns.items():
+        # Only visit non-zero entries of each column
+        nonzero = np.flatnonzero(values)
+        for k, v in zip(nonzero.tolist(), np.asarray(values)[nonzero].tolist()):
+            attrs[k][name] = v
+    for d in attrs:
+        d.update(kwargs)
+    return list(zip(id_i.tolist(), id_j.tolist(), attrs))
+
+
+def build_layer(specie, celltype, minTPM=None, links=True):
+    """ Per-species work of the network builds, so layers can be built in parallel (e.g. in a `multiprocessing.Pool`).
+
+    Reads the FPKM table of `specie` & `celltype`, keeps genes with TPM >= `minTPM` (if given) and, if `links`, loads their StringDB links.
+    `celltype` may be a list, in which case the union of genes is used.
+    A gene in more than one row (or table) is one node with the last non-null value of each attribute, as networkx `add_nodes_from` does.
+    Returns a dict with the node DataFrame (`nodes`, indexed by id_gene), the `id_string` -> `id_gene` map (`dict_id_string_to_id_gene`),
+    the bag of `id_string` (`set_id_strings`) and the intra edges as (id_gene_i, id_gene_j, dict_columns) (`edges`, None if not `links`).
+    """
+    celltypes = [celltype] if isinstance(celltype, str) else celltype
+    df = pd.concat([
+        pd.read_csv("../02-core_genes/results/FPKM/{specie:s}/{specie:s}-FPKM-{celltype:s}.csv.gz".format(specie=specie, celltype=celltype), index_col='id_gene', usecols=['id_string', 'id_gene', 'gene', 'FPKM', 'TPM', 'biotype'])
+        for celltype in celltypes])
+    df = df.rename(columns={'gene': 'label'})  # Rename
+    # Only TPM >= minTPM
+    if minTPM is not None:
+        df = df.loc[(df['TPM'] >= minTPM), :]
+    # Map id_string -> id_gene
+    dict_id_string_to_id_gene = df.explode('id_string').reset_index().set_index('id_string')['id_gene'].to_dict()
+    # Bag of String (some genes have >1 id_string)
+    set_id_strings = set(np.hstack(df['id_string'].dropna()))
+    # logFPKM
+    df['logFPKM'] = np.log2(df['FPKM'] + 1)
+    df = df.drop(['FPKM'], axis='columns')
+    # Identify layer
+    df['layer'] = specie
+    # One node per gene
+    if df.index.has_duplicates:
+        df = df.groupby(level=0, sort=False).last()
+    #
+    edges = load_intra_edges(specie, dict_id_string_to_id_gene) if links else None
+    return {
+        'nodes': df,
+        'dict_id_string_to_id_gene': dict_id_string_to_id_gene,
+        'set_id_strings': set_id_strings,
+        'edges': edges
+    }
+
+
+def node_tuples_from_dataframe(df):
+    """ Returns a list of networkx (id, attrs) tuples from a node DataFrame, leaving null values out of `attrs`."""
+    attrs = [{k: v for k, v in m.items() if pd.notnull(v)} for m in df.to_dict(orient='records')]
+    return list(zip(df.index.to_list(), attrs))
+
+
+def family_membership_matrix(orthology, layer, dict_id_string_to_id_gene, id_genes):
+    """ Binary sparse (EggNOG family x gene) matrix of one layer, with columns in the order of `id_genes`.
+
+    Genes are mapped to families through their `id_string` (`dict_id_string_to_id_gene`). Genes not in `id_genes` are left out.
+    """
+    id_strings = list(dict_id_string_to_id_gene.keys())
+    codes = orthology.vocab_string[layer].encode(id_strings)
+    positions = pd.Index(id_genes).get_indexer(list(dict_id_string_to_id_gene.values()))
+    is_valid = (codes >= 0) & (positions >= 0)
+    # id_string code -> gene column
+    lookup = np.full(len(orthology.vocab_string[layer]), -1, dtype=np.int64)
+    lookup[codes[is_valid]] = positions[is_valid]
+    #
+    family, member, species = orthology.membership({layer: id_strings})
+    gene = lookup[member]
+    family, gene = family[gene >= 0], gene[gene >= 0]
+    M = csr_matrix((np.ones(len(family), dtype=np.int32), (family, gene)), shape=(len(orthology), len(id_genes)))
+    # A gene with more than one id_string in the same family counts once
+    M.data[:] = 1
+    return M
+
+
+def cross_edge_arrays(orthology, dict_layers):
+    """ Cross-layer homology edges as coordinate arrays.
 
-        return pd.read_csv(StringIO(ios), sep='\t', encoding='utf-8', *args, **kwargs)
+    `dict_layers` maps each layer to (`dict_id_string_to_id_gene`, `id_genes`), where `id_genes` are the layer node ids.
+    Genes in different layers are linked if they share an EggNOG family: the edges of a layer pair are the nonzeros of `M_i^T M_j`,
+    where `M` is the family x gene membership matrix of each layer, and the values count the families supporting the edge.
+    Returns {(layer_i, layer_j): (id_gene_i, id_gene_j, n_families)} for the HS-MM, HS-DM & MM-DM pairs.
+    """
+    dict_M = {layer: family_membership_matrix(orthology, layer, dict_id_string_to_id_gene, id_genes) for layer, (dict_id_string_to_id_gene, id_genes) in dict_layers.items()}
+    dict_cross = {}
+    for layer_i, layer_j in [('HS', 'MM'), ('HS', 'DM'), ('MM', 'DM')]:
+        C = (dict_M[layer_i].T @ dict_M[layer_j]).tocoo()
+        id_genes_i = np.asarray(dict_layers[layer_i][1], dtype=object)
+        id_genes_j = np.asarray(dict_layers[layer_j][1], dtype=object)
+        dict_cross[(layer_i, layer_j)] = (id_genes_i[C.row], id_genes_j[C.col], C.data)
+    return dict_cross
 
 
 def ensurePathExists(path):
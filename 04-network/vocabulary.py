@@ -0,0 +1,76 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Integer interning of StringDB protein ids (`id_string`), Ensembl gene ids (`id_gene`) and EggNOG families (`id_eggnog`).
+#    Vocabularies are built once by `00-build-vocabulary.py` and stored under `data/StringDB/<taxid>/cache/vocabulary/`.
+#    Codes are the position of the id in the sorted vocabulary, so they are stable for a given StringDB/EggNOG version.
+#
+#
+import os
+import numpy as np
+
+
+dict_taxid = {'HS': '9606', 'MM': '10090', 'DM': '7227'}
+dict_gene_prefix = {'HS': 'ENSG', 'MM': 'ENSMUSG', 'DM': 'FBgn'}
+
+
+class Vocabulary(object):
+    """ A sorted array of unique ids, where the code of an id is its position in the array."""
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    @classmethod
+    def from_values(cls, values):
+        return cls(np.unique(np.asarray(list(values), dtype=str)))
+
+    @classmethod
+    def load(cls, filepath, mmap_mode='r'):
+        return cls(np.load(filepath, mmap_mode=mmap_mode))
+
+    def save(self, filepath):
+        np.save(filepath, np.asarray(self.ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, value):
+        return self.encode([value])[0] >= 0
+
+    def encode(self, values, missing=-1):
+        """ Returns the int32 codes of `values`. Ids not in the vocabulary get `missing`."""
+        values = np.asarray(values, dtype=str)
+        if not len(self.ids):
+            return np.full(values.shape, missing, dtype=np.int32)
+        codes = np.searchsorted(self.ids, values).clip(max=(len(self.ids) - 1)).astype(np.int32)
+        codes[self.ids[codes] != values] = missing
+        return codes
+
+    def decode(self, codes):
+        """ Returns the ids of `codes`."""
+        return self.ids[np.asarray(codes)]
+
+    def mask(self, values):
+        """ Boolean lookup table over all codes, True for codes of `values`. Use it as `mask[codes]` to filter code arrays."""
+        codes = self.encode(values)
+        is_in = np.zeros(len(self.ids), dtype=bool)
+        is_in[codes[codes >= 0]] = True
+        return is_in
+
+
+def get_vocabulary_path(specie, path='../data'):
+    if specie == 'EggNOG':
+        return os.path.join(path, 'EggNOG', 'cache', 'vocabulary')
+    return os.path.join(path, 'StringDB', dict_taxid[specie], 'cache', 'vocabulary')
+
+
+def load_vocabulary(specie, name='id_string', path='../data', mmap_mode='r'):
+    """ Loads the `name` vocabulary ('id_string' or 'id_gene') of `specie` ('HS', 'MM' or 'DM'). Use specie='EggNOG' for 'id_eggnog'."""
+    return Vocabulary.load(os.path.join(get_vocabulary_path(specie, path), name + '.npy'), mmap_mode=mmap_mode)
+
+
+def load_string_gene_map(specie, path='../data'):
+    """ Returns the (id_string code, id_gene code) alias pairs of `specie`. Some genes have more than one id_string."""
+    pairs = np.load(os.path.join(get_vocabulary_path(specie, path), 'id_string-id_gene.npy'))
+    return pairs[:, 0], pairs[:, 1]
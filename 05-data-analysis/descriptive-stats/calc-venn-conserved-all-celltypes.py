@@ -10,26 +10,30 @@ import pandas as pd
 pd.set_option('display.max_rows', 100)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
-import networkx as nx
+import numpy as np
 #import matplotlib as mpl
 #mpl.rcParams['font.family'] = 'Helvetica'
 #mpl.rcParams['mathtext.fontset'] = 'cm'
 #mpl.rcParams['mathtext.rm'] = 'serif'
 #import matplotlib.pyplot as plt
 #from matplotlib_venn import venn2
-from utils import get_network_layer, ensurePathExists
+import sys
+sys.path.append('../../04-network')
+from utils import ensurePathExists
+from mlgraph import load_layer_node_masks
 from itertools import combinations
 
 
-def venn_count(named_sets):
-    """ From: https://stackoverflow.com/questions/15553728/counting-intersections-for-all-combinations-in-a-list-of-sets """
-    names = set(named_sets)
-    for i in range(1, len(named_sets) + 1):
-        for to_intersect in combinations(sorted(named_sets), i):
+def venn_count(named_masks):
+    """ Size of every region of the Venn diagram of sets given as boolean masks over the same genes.
+    From: https://stackoverflow.com/questions/15553728/counting-intersections-for-all-combinations-in-a-list-of-sets """
+    names = set(named_masks)
+    for i in range(1, len(named_masks) + 1):
+        for to_intersect in combinations(sorted(named_masks), i):
             others = names.difference(to_intersect)
-            intersected = set.intersection(*(named_sets[k] for k in to_intersect))
-            unioned = set.union(*(named_sets[k] for k in others)) if others else set()
-            yield to_intersect, others, len(intersected - unioned)
+            intersected = np.logical_and.reduce([named_masks[k] for k in to_intersect])
+            unioned = np.logical_or.reduce([named_masks[k] for k in others]) if others else False
+            yield to_intersect, others, np.count_nonzero(intersected & ~unioned)
 
 
 if __name__ == '__main__':
@@ -39,6 +43,13 @@ if __name__ == '__main__':
     threshold = 0.5
     threshold_str = str(threshold).replace('.', 'p')
 
+    # Celltype networks as bitmasks over the genome network, from their overlays (run `04-network/02-build-mlayer-genome-network.py --links`,
+    # `08-convert-network-to-mlgraph.py --network genome-links` and `09-build-network-overlays.py` first) or else their gpickles
+    path_net = '../../04-network/results/network'
+    print('Loading celltype networks')
+    masks_t = load_layer_node_masks(celltypes, 'thr', threshold, layers, path=path_net)
+    masks_c = load_layer_node_masks(celltypes, 'conserved', threshold, layers, path=path_net)
+
     #
     # Conserved
     #
@@ -50,16 +61,8 @@ if __name__ == '__main__':
     }
     print('-- Conserved --')
     for celltype in celltypes:
-        print('Loading {celltype:s} {network:s} {threshold:s}'.format(celltype=celltype, network='conserved', threshold=threshold_str))
-
-        path_net = '../../04-network/results/network/{celltype:s}/'.format(celltype=celltype)
-        rGc_file_gpickle = path_net + 'net-{celltype:s}-{network:s}-{threshold:s}.gpickle'.format(celltype=celltype, network='conserved', threshold=threshold_str)
-        Gc = nx.read_gpickle(rGc_file_gpickle)
-
         for layer in layers:
-            print('Separating layer {layer:s}'.format(layer=layer))
-            Gcl = get_network_layer(Gc, layer)
-            conserved_genes = set(Gcl.nodes())
+            conserved_genes = masks_c[layer][celltype]
 
             data[layer][celltype] = conserved_genes
 
@@ -76,22 +79,10 @@ if __name__ == '__main__':
     #
     print('-- Non-Conserved --')
     for celltype in celltypes:
-        print('Loading {celltype:s} (non-){network:s} {threshold:s}'.format(celltype=celltype, network='conserved', threshold=threshold_str))
-
-        path_net = '../../04-network/results/network/{celltype:s}/'.format(celltype=celltype)
-        rGt_file_gpickle = path_net + 'net-{celltype:s}-{network:s}-{threshold:s}.gpickle'.format(celltype=celltype, network='thr', threshold=threshold_str)
-        rGc_file_gpickle = path_net + 'net-{celltype:s}-{network:s}-{threshold:s}.gpickle'.format(celltype=celltype, network='conserved', threshold=threshold_str)
-        Gt = nx.read_gpickle(rGt_file_gpickle)
-        Gc = nx.read_gpickle(rGc_file_gpickle)
-
         for layer in layers:
-            print('Separating layer {layer:s}'.format(layer=layer))
-            Gtl = get_network_layer(Gt, layer)
-            Gcl = get_network_layer(Gc, layer)
-            
-            conserved_genes = set(Gcl.nodes())
-            threshold_genes = set(Gtl.nodes())
-            non_conserved_genes = threshold_genes.difference(conserved_genes)
+            conserved_genes = masks_c[layer][celltype]
+            threshold_genes = masks_t[layer][celltype]
+            non_conserved_genes = threshold_genes & ~conserved_genes
 
             data[layer][celltype] = non_conserved_genes
 
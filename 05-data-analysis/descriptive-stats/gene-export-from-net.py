@@ -40,7 +40,7 @@ if __name__ == '__main__':
         for layer in layers:
 
             print('Separate layer {layer:s}'.format(layer=layer))
-            Gl = get_network_layer(G, layer)
+            Gl = get_network_layer(G, layer, copy=False)
 
             df = pd.DataFrame.from_dict(dict(Gl.nodes(data=True)), orient='index')
 
@@ -0,0 +1,68 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: Oct 18, 2026
+#
+# Description: Reads the full MultiLayer network (HS, MM & DM) of each celltype and computes, at every edge weight threshold,
+#    the number of nodes, edges, components, largest component size and core genes (see `threshold.threshold_sweep`).
+#    Gives whole curves for the choice of the network threshold.
+#
+#
+import pandas as pd
+pd.set_option('display.max_rows', 100)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+import networkx as nx
+import sys
+sys.path.append('../../04-network')
+from utils import ensurePathExists
+from threshold import ThresholdIndex, threshold_sweep
+import argparse
+
+
+if __name__ == '__main__':
+
+    #
+    # Args
+    #
+    parser = argparse.ArgumentParser()
+    celltypes = ['spermatocyte', 'spermatogonia', 'spermatid', 'enterocyte', 'neuron', 'muscle']
+    parser.add_argument("--celltype", default=celltypes, type=str, nargs='+', choices=celltypes, help="Cell type(s). Defaults to all six.")
+    parser.add_argument("--weight", default='weight', type=str, help="Edge attribute to threshold. Defaults to 'weight'.")
+    parser.add_argument("--format", default='csv', type=str, choices=['csv', 'parquet'], help="Output format. Defaults to 'csv'.")
+    args = parser.parse_args()
+    #
+    network = 'full'
+    weight = args.weight
+    layers = ['HS', 'MM', 'DM']
+
+    r = []
+    for celltype in args.celltype:
+
+        print('Loading {celltype:s} network'.format(celltype=celltype))
+        rGfile_gpickle = '../../04-network/results/network/{celltype:s}/net-{celltype:s}-{network:s}.gpickle'.format(celltype=celltype, network=network)
+        G = nx.read_gpickle(rGfile_gpickle)
+
+        print('Indexing edges by {weight:s}'.format(weight=weight))
+        index = ThresholdIndex.from_networkx(G, weight=weight)
+
+        for layer in layers:
+            print('Sweeping {layer:s} layer'.format(layer=layer))
+            df = threshold_sweep(index, layer)
+            df.insert(0, 'celltype', celltype)
+            df.insert(1, 'species', layer)
+            r.append(df)
+
+    df_sweep = pd.concat(r, ignore_index=True)
+    print(df_sweep.groupby(['celltype', 'species']).first())
+
+    wFile = 'results/stats-{network:s}-network-threshold-sweep-{weight:s}'.format(network=network, weight=weight)
+    if args.format == 'parquet':
+        wFile += '.parquet'
+        ensurePathExists(wFile)
+        df_sweep.to_parquet(wFile, index=False)
+    else:
+        wFile += '.csv.gz'
+        ensurePathExists(wFile)
+        df_sweep.to_csv(wFile, index=False)
+
+    print('Done.')
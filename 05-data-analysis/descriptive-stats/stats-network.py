@@ -5,12 +5,17 @@
 # Description: Reads a MultiLayer network (HS, MM & DM) and prints information.
 #
 #
+import numpy as np
 import pandas as pd
 pd.set_option('display.max_rows', 100)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
 import networkx as nx
+import sys
+sys.path.append('../../04-network')
 from utils import get_network_layer, get_network_by_attribute, ensurePathExists
+from threshold import ThresholdIndex, threshold_sweep
+from homology import HomologIndex
 from tabulate import tabulate
 from itertools import combinations
 
@@ -37,7 +42,7 @@ if __name__ == '__main__':
 
         for layer in ['HS', 'MM', 'DM']:
             print('Separate {layer:s} layer'.format(layer=layer))
-            Gt = get_network_layer(G, layer)
+            Gt = get_network_layer(G, layer, copy=False)
 
             # Number of nodes/edges
             n_nodes = Gt.number_of_nodes()
@@ -75,37 +80,21 @@ if __name__ == '__main__':
             rGfile_gpickle = path_net + 'net-{celltype:s}-{network:s}.gpickle'.format(celltype=celltype, network=network)
         G = nx.read_gpickle(rGfile_gpickle)
 
+        # Edges with each evidence channel, indexed by its score
+        weights = ['combined_score', 'textmining', 'database', 'experiments', 'coexpression', 'cooccurence', 'fusion', 'neighborhood']
+        indexes = {weight: ThresholdIndex.from_networkx(G, weight=weight) for weight in weights}
+
         for layer in ['HS', 'MM', 'DM']:
             print('Separate {layer:s} layer'.format(layer=layer))
-            Gt = get_network_layer(G, layer)
 
-            # Number of nodes/edges
-            n_nodes = Gt.number_of_nodes()
-            n_edges = Gt.number_of_edges()
-            # Number of components (islands)
-            n_components = nx.number_connected_components(Gt)
-            # Largest Component
-            Gtlc = max(nx.connected_component_subgraphs(Gt), key=len)
-            n_nodes_largest_component = Gtlc.number_of_nodes()
-            n_edges_largest_component = Gtlc.number_of_edges()
-
-            for weight in ['combined_score', 'textmining', 'database', 'experiments', 'coexpression', 'cooccurence', 'fusion', 'neighborhood']:
-
-                edges = [(i, j) for i, j, d in Gt.edges(data=True) if weight in d]
-                Gtw = Gt.edge_subgraph(edges).copy()
-                # Number of nodes/edges
-                n_nodes = Gtw.number_of_nodes()
-                n_edges = Gtw.number_of_edges()
-                # Number of components (islands)
-                n_components = nx.number_connected_components(Gtw)
-                # Largest Component
-                if n_edges > 0:
-                    Gtlc = max(nx.connected_component_subgraphs(Gtw), key=len)
-                    n_nodes_largest_component = Gtlc.number_of_nodes()
-                    n_edges_largest_component = Gtlc.number_of_edges()
-                else:
-                    n_nodes_largest_component = 0
-                    n_edges_largest_component = 0
+            for weight in weights:
+                # Nodes/edges, number of components (islands) and largest component of the edges with this channel
+                s = threshold_sweep(indexes[weight], layer, thresholds=[-np.inf]).iloc[0]
+                n_nodes = int(s['n-nodes'])
+                n_edges = int(s['n-edges'])
+                n_components = int(s['n-components'])
+                n_nodes_largest_component = int(s['n-nodes-largest-component'])
+                n_edges_largest_component = int(s['n-edges-largest-component'])
 
                 r.append((celltype, layer, weight, n_nodes, n_edges, n_components, n_nodes_largest_component, n_edges_largest_component))
 
@@ -140,14 +129,17 @@ if __name__ == '__main__':
         G = nx.read_gpickle(rGfile_gpickle)
 
         print('Separate Layers')
-        HSG = get_network_layer(G, 'HS')
-        MMG = get_network_layer(G, 'MM')
-        DMG = get_network_layer(G, 'DM')
+        HSG = get_network_layer(G, 'HS', copy=False)
+        MMG = get_network_layer(G, 'MM', copy=False)
+        DMG = get_network_layer(G, 'DM', copy=False)
+
+        print('Indexing homologs')
+        homologs = HomologIndex.from_networkx(G)
 
         print("Select nodes where biotype='{biotype:s}'".format(biotype=biotype))
-        HSG = get_network_by_attribute(HSG, attribute='biotype', value=biotype)
-        MMG = get_network_by_attribute(MMG, attribute='biotype', value=biotype)
-        DMG = get_network_by_attribute(DMG, attribute='biotype', value=biotype)
+        HSG = get_network_by_attribute(HSG, attribute='biotype', value=biotype, copy=False)
+        MMG = get_network_by_attribute(MMG, attribute='biotype', value=biotype, copy=False)
+        DMG = get_network_by_attribute(DMG, attribute='biotype', value=biotype, copy=False)
 
         # Pairs
         for (layer_i, Gi), (layer_j, Gj) in combinations([('HS', HSG), ('MM', MMG), ('DM', DMG)], 2):
@@ -157,22 +149,10 @@ if __name__ == '__main__':
             genes_i = [*Gi.nodes()]
             genes_j = [*Gj.nodes()]
 
-            genes_ij = genes_i + genes_j
-
-            # Only genes between these species
-            Gtmp = nx.subgraph(G, genes_ij).copy()
-
-            # Remove intra edges
-            remove_intra_edges = [(i, j) for i, j, d in Gtmp.edges(data=True) if d.get('type', None) == 'intra']
-            Gtmp.remove_edges_from(remove_intra_edges)
-
-            # Remove isolates
-            remove_isolates_nodes = list(nx.isolates(Gtmp))
-            Gtmp.remove_nodes_from(remove_isolates_nodes)
-
             # Keep only homolgos
-            Gitmp = nx.subgraph(Gi, Gtmp).copy()
-            Gjtmp = nx.subgraph(Gj, Gtmp).copy()
+            homologs_i, homologs_j = homologs.homologs(layer_i, genes_i, layer_j, genes_j)
+            Gitmp = nx.subgraph(Gi, homologs_i)
+            Gjtmp = nx.subgraph(Gj, homologs_j)
 
             # Number of nodes/edges
             n_nodes_i = Gitmp.number_of_nodes()
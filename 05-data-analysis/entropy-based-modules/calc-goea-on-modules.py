@@ -9,20 +9,15 @@ import pandas as pd
 pd.set_option('display.max_rows', 100)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
+import sys
+sys.path.append('../../04-network')
 from utils import ensurePathExists
+from modules import ModuleRegistry
 #
 from goatools import obo_parser
 from goatools.anno.gaf_reader import GafReader
 from goatools.goea.go_enrichment_ns import GOEnrichmentStudyNS
 #
-from data_spermatocyte_pca_modules_dm import spermatocyte_pca_modules_dm
-from data_spermatocyte_pca_modules_mm import spermatocyte_pca_modules_mm
-from data_spermatocyte_pca_modules_hs import spermatocyte_pca_modules_hs
-#
-from data_enterocyte_pca_modules_dm import enterocyte_pca_modules_dm
-from data_enterocyte_pca_modules_mm import enterocyte_pca_modules_mm
-from data_enterocyte_pca_modules_hs import enterocyte_pca_modules_hs
-#
 from pybiomart import Dataset
 #
 import argparse
@@ -79,19 +74,8 @@ if __name__ == '__main__':
     annotation_reactome = '../../data/GeneOntology/reactome.gaf'
     ontology = '../../data/GeneOntology/go-basic.obo'
 
-    data = {
-        'spermatocyte': {
-            'HS': spermatocyte_pca_modules_hs,
-            'MM': spermatocyte_pca_modules_mm,
-            'DM': spermatocyte_pca_modules_dm,
-        },
-        'enterocyte': {
-            'HS': enterocyte_pca_modules_hs,
-            'MM': enterocyte_pca_modules_mm,
-            'DM': enterocyte_pca_modules_dm,
-        }
-    }
-    modules = data[celltype][layer]
+    registry = ModuleRegistry(network, threshold, path_pca='../../04-network/results/pca', path_cache='results/pca-modules', strict=True)
+    modules = registry.modules(celltype, layer)
 
     # for specie in species
     print('Calculating GOEA on {celltype:s} {network:s} {threshold:.1f} {layer:s}'.format(celltype=celltype, network=network, threshold=threshold, layer=layer))
@@ -165,17 +149,8 @@ if __name__ == '__main__':
     # Gene Ontology Enrichment Analysis (GOEA)
     goea = GOEnrichmentStudyNS(pop=pop, ns2assoc=ns2assoc_combined, godag=godag, propagate_counts=True, alpha=0.05, methods=['fdr_bh'])
 
-    # Load PCA
-    rPCAFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-dim.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
-    rDiAnFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-dian.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
-    rEntFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-entropy.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
-    #
     wCSVFile = 'results/goea/{celltype:s}/goea-{celltype:s}-{network:s}-{threshold:s}-{layer:s}.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
 
-    df_pca = pd.read_csv(rPCAFile, index_col=0)
-    df_dian = pd.read_csv(rDiAnFile, index_col=0)
-    df_ent = pd.read_csv(rEntFile, index_col=0)
-
     ldfS = []
     for module in modules:
 
@@ -183,32 +158,18 @@ if __name__ == '__main__':
         mname = module['name']
 
         print("Computing Module {mid:d}".format(mid=mid))
-        #
-        xc = module['dim-coords']['xdim']
-        yc = module['dim-coords']['ydim']
-        ld1 = '{xc:d}c'.format(xc=xc)  # label 1 component
-        ld2 = '{yc:d}c'.format(yc=yc)  # label 2 component
-        l12d = '{xc:d}c-{yc:d}c-dist'.format(xc=xc, yc=yc)  # label-1c-2c-dist
-
-        x0, x1 = module['dim-coords']['xvals']
-        y0, y1 = module['dim-coords']['yvals']
-        cut_rank = module['dim-coords']['radius-rank']
-
-        # Radius of the circle
-        cut_radius = df_ent.loc[((df_ent['dim'] == xc) & (df_ent['cut-rank'] == cut_rank)), 'radius-start'].squeeze()
-
-        # Select genes in module
-        df_pca_tmp = df_pca.loc[((df_pca[ld1] > x0) & (df_pca[ld1] < x1) & (df_pca[ld2] > y0) & (df_pca[ld2] < y1) & (df_dian[l12d] > cut_radius)), :]
+        # Genes in module
+        idx_genes = pd.Index(registry.genes(celltype, layer, mid))
         if layer == 'DM':
-            genes_flybase = set(df_pca_tmp.index.tolist())
-            genes_uniprot = set(df_pca_tmp.index.map(dfQ['UniProtKB/Swiss-Prot ID'].dropna().to_dict()).dropna().tolist())
+            genes_flybase = set(idx_genes.tolist())
+            genes_uniprot = set(idx_genes.map(dfQ['UniProtKB/Swiss-Prot ID'].dropna().to_dict()).dropna().tolist())
             genes = genes_flybase.union(genes_uniprot)
         elif layer == 'MM':
-            genes_mgi = set(df_pca_tmp.index.map(dfQ['MGI ID'].dropna().to_dict()).to_list())
-            genes_uniprot = set(df_pca_tmp.index.map(dfQ['UniProtKB/Swiss-Prot ID'].dropna().to_dict()).dropna().to_list())
+            genes_mgi = set(idx_genes.map(dfQ['MGI ID'].dropna().to_dict()).to_list())
+            genes_uniprot = set(idx_genes.map(dfQ['UniProtKB/Swiss-Prot ID'].dropna().to_dict()).dropna().to_list())
             genes = genes_mgi.union(genes_uniprot)
         elif layer == 'HS':
-            genes = set(df_pca_tmp.index.map(dfQ['UniProtKB/Swiss-Prot ID'].dropna().to_dict()).dropna().tolist())
+            genes = set(idx_genes.map(dfQ['UniProtKB/Swiss-Prot ID'].dropna().to_dict()).dropna().tolist())
 
         # Run Comparison (only keep GO significant and from 'Biological Process')
         print("> Runnin GOEA test")
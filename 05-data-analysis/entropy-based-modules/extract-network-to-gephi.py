@@ -14,14 +14,9 @@ import networkx as nx
 from matplotlib import colors
 from utils import get_network_layer, get_network_largest_connected_component, ensurePathExists
 import argparse
-#
-from data_spermatocyte_pca_modules_dm import spermatocyte_pca_modules_dm
-from data_spermatocyte_pca_modules_mm import spermatocyte_pca_modules_mm
-from data_spermatocyte_pca_modules_hs import spermatocyte_pca_modules_hs
-#
-from data_enterocyte_pca_modules_dm import enterocyte_pca_modules_dm
-from data_enterocyte_pca_modules_mm import enterocyte_pca_modules_mm
-from data_enterocyte_pca_modules_hs import enterocyte_pca_modules_hs
+import sys
+sys.path.append('../../04-network')
+from modules import ModuleRegistry
 
 
 cmap_meanfertrate = colors.LinearSegmentedColormap.from_list(name='cmap-mean-fert-rate', colors=['#d62728', '#1f77b4'], N=256)
@@ -67,29 +62,7 @@ if __name__ == '__main__':
     remove_isolates = args.remove_isolates
     only_largest_component = args.only_largest_component
     #
-    placeholder = {'HS': None, 'MM': None, 'DM': None}
-    data = {
-        'spermatocyte': {
-            'PCA': dict(placeholder),
-            'distance-angle': dict(placeholder),
-            'entropy': dict(placeholder),
-            'modules': {
-                'HS': spermatocyte_pca_modules_hs,
-                'MM': spermatocyte_pca_modules_mm,
-                'DM': spermatocyte_pca_modules_dm,
-            },
-        },
-        'enterocyte': {
-            'PCA': dict(placeholder),
-            'distance-angle': dict(placeholder),
-            'entropy': dict(placeholder),
-            'modules': {
-                'HS': enterocyte_pca_modules_hs,
-                'MM': enterocyte_pca_modules_mm,
-                'DM': enterocyte_pca_modules_dm,
-            }
-        }
-    }
+    registry = ModuleRegistry(network, threshold, path_pca='../../04-network/results/pca', path_cache='results/pca-modules')
 
     #
     print('Reading Network')
@@ -131,44 +104,14 @@ if __name__ == '__main__':
 
         # Add Module Information
         if add_modules:
-            print('Load PCA Results ({layer:s})'.format(layer=layer))
-
-            rPCAFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-dim.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
-            rDiAnFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-dian.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
-            rEntFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-entropy.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
-
-            df_pca = pd.read_csv(rPCAFile, index_col=0)
-            df_dian = pd.read_csv(rDiAnFile, index_col=0)
-            df_ent = pd.read_csv(rEntFile, index_col=0)
-
-            modules = data[celltype]['modules'][layer]
-            #
-            rPCAFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-dim.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
-            dfPCA = pd.read_csv(rPCAFile, index_col=0, encoding='utf-8')
-
-            # Extract Component Modules
-            for module in modules:
+            print('Load PCA modules ({layer:s})'.format(layer=layer))
+            for module in registry.modules(celltype, layer):
 
                 mid = module['id']
                 mname = module['name']
                 print("Identifying module: M{mid:d} {mname:s} ".format(mid=mid, mname=mname))
 
-                xc = module['dim-coords']['xdim']
-                yc = module['dim-coords']['ydim']
-                cx = "{xc:d}c".format(xc=xc)
-                cy = "{yc:d}c".format(yc=yc)
-                cxy = '{xc:d}c-{yc:d}c-dist'.format(xc=xc, yc=yc)  # label-1c-2c-dist
-                cxl, cxh = module['dim-coords']['xvals']
-                cyl, cyh = module['dim-coords']['yvals']
-                cutrank = module['dim-coords']['radius-rank']
-                cutradius = df_ent.loc[((df_ent['dim'] == xc) & (df_ent['cut-rank'] == cutrank)), 'radius-start'].squeeze()
-
-                df_pca_tmp = df_pca.loc[
-                    (
-                        (df_pca[cx] >= cxl) & (df_pca[cx] <= cxh) & (df_pca[cy] >= cyl) & (df_pca[cy] <= cyh) & (df_dian[cxy] >= cutradius)
-                    ), ['gene', cx, cy]].copy()
-
-                component_ids = {g: True for g in df_pca_tmp.index.tolist()}
+                component_ids = {g: True for g in registry.genes(celltype, layer, mid)}
                 net_attribute_name = 'module-pca-{layer:s}-{mid:d}'.format(layer=layer, mid=mid)
                 nx.set_node_attributes(Gt, values=component_ids, name=net_attribute_name)
 
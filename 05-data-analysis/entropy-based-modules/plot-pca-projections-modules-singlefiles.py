@@ -59,6 +59,8 @@ def plot_pca(celltype='spermatocyte', network='thr', threshold=0.5, layer='DM',
     # Plot Variance
     s_cumsum = s.cumsum()
     n_eigen_95 = s_cumsum[(s_cumsum < 0.95)].shape[0]
+    # Only the first `--components` ratios are stored by `05-calc-pca.py`
+    str_eigen_95 = ('{:,d}' if s_cumsum.iloc[-1] >= 0.95 else '>{:,d}').format(n_eigen_95)
 
     n = 9
     ind = np.arange(n)
@@ -75,7 +77,7 @@ def plot_pca(celltype='spermatocyte', network='thr', threshold=0.5, layer='DM',
     title = '{species:s}'.format(species=species_name[layer])
     ax.set_title(title)
 
-    ax.annotate('95% with {:,d}\nsingular vectors'.format(n_eigen_95), xy=(0.97, 0.97), xycoords="axes fraction", ha='right', va='top', fontsize='small')
+    ax.annotate('95% with {:s}\nsingular vectors'.format(str_eigen_95), xy=(0.97, 0.97), xycoords="axes fraction", ha='right', va='top', fontsize='small')
     ax.set_xlabel('Components')
     ax.set_ylabel('Variance')
     ax.grid(axis='y')
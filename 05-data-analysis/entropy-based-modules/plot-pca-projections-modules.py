@@ -27,30 +27,25 @@ import matplotlib.patches as mp
 import shapely.geometry as sg
 import descartes
 from cycler import cycler
-#
-from data_spermatocyte_pca_modules_dm import spermatocyte_pca_modules_dm
-from data_spermatocyte_pca_modules_mm import spermatocyte_pca_modules_mm
-from data_spermatocyte_pca_modules_hs import spermatocyte_pca_modules_hs
-#
-from data_enterocyte_pca_modules_dm import enterocyte_pca_modules_dm
-from data_enterocyte_pca_modules_mm import enterocyte_pca_modules_mm
-from data_enterocyte_pca_modules_hs import enterocyte_pca_modules_hs
+import sys
+sys.path.append('../../04-network')
+from modules import ModuleRegistry
 
 
-def plot_pca(celltype='spermatocyte', network='thr', threshold=0.5, layer='DM', modules=[]):
+def plot_pca(registry, celltype='spermatocyte', layer='DM'):
     """ Plot PCA """
+    network, threshold = registry.network, registry.threshold
+    modules = registry.modules(celltype, layer)
     threshold_str = str(threshold).replace('.', 'p')
     #
     print('Plotting PCA for {celltype:s}-{network:s}-{threshold:s}-{layer:s}'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer))
     rPCAFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-dim.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
-    rDiAnFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-dian.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
     rEntFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-entropy.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
     rSFile = '../../04-network/results/pca/{celltype:s}/{layer:s}/pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-s.csv.gz'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
 
     wIMGFile = 'images/pca-entropy/{celltype:s}/{layer:s}/img-pca-{celltype:s}-{network:s}-{threshold:s}-{layer:s}-modules.pdf'.format(celltype=celltype, network=network, threshold=threshold_str, layer=layer)
 
     df_pca = pd.read_csv(rPCAFile, index_col=0)
-    df_dian = pd.read_csv(rDiAnFile, index_col=0)
     df_ent = pd.read_csv(rEntFile, index_col=0)
     s = pd.read_csv(rSFile, squeeze=True, index_col=0, header=0, encoding='utf-8')
 
@@ -66,6 +61,8 @@ def plot_pca(celltype='spermatocyte', network='thr', threshold=0.5, layer='DM',
     # Plot Variance
     s_cumsum = s.cumsum()
     n_eigen_95 = s_cumsum[(s_cumsum < 0.95)].shape[0]
+    # Only the first `--components` ratios are stored by `05-calc-pca.py`
+    str_eigen_95 = ('{:,d}' if s_cumsum.iloc[-1] >= 0.95 else '>{:,d}').format(n_eigen_95)
 
     n = 9
     ind = np.arange(n)
@@ -78,7 +75,7 @@ def plot_pca(celltype='spermatocyte', network='thr', threshold=0.5, layer='DM',
     ax1.set_xticklabels(xticklabels)
 
     ax1.set_title('Explained variance ratio')
-    ax1.annotate('95% with {:,d}\nsingular vectors'.format(n_eigen_95), xy=(0.97, 0.97), xycoords="axes fraction", ha='right', va='top', fontsize='small')
+    ax1.annotate('95% with {:s}\nsingular vectors'.format(str_eigen_95), xy=(0.97, 0.97), xycoords="axes fraction", ha='right', va='top', fontsize='small')
     ax1.set_xlabel('Components')
     ax1.set_ylabel('Variance')
     ax1.grid(axis='y')
@@ -139,10 +136,6 @@ def plot_pca(celltype='spermatocyte', network='thr', threshold=0.5, layer='DM',
                 mid = module['id']
                 mname = module['name']
                 #
-                cx = '{xc:d}c'.format(xc=xc)  # label 1 component
-                cy = '{yc:d}c'.format(yc=yc)  # label 2 component
-                cxy = '{xc:d}c-{yc:d}c-dist'.format(xc=xc, yc=yc)  # label-1c-2c-dist
-                #
                 facecolor = module.get('facecolor', 'black')
                 edgecolor = module.get('edgecolor', 'none')
                 hatch = module.get('hatch', None)
@@ -150,15 +143,8 @@ def plot_pca(celltype='spermatocyte', network='thr', threshold=0.5, layer='DM',
                 cyl, cyh = module['dim-coords']['yvals']
                 cut_rank = module['dim-coords']['radius-rank']
                 sg_circle = sg_circles[cut_rank]
-                # Radius of the circle
-                cut_radius = df_ent.loc[((df_ent['dim'] == xc) & (df_ent['cut-rank'] == cut_rank)), 'radius-start'].squeeze()
-
-                # Select points in module
-                df_pca_tmp = df_pca.loc[
-                    (
-                        (df_pca[cx] >= cxl) & (df_pca[cx] <= cxh) & (df_pca[cy] >= cyl) & (df_pca[cy] <= cyh) & (df_dian[cxy] >= cut_radius)
-                    ), ['gene', cx, cy]].copy()
-                n = df_pca_tmp.shape[0]
+                # Genes in module
+                n = len(registry.genes(celltype, layer, mid))
 
                 name = "M{mid:d}-{mname:s} (n={n:,d})".format(mid=mid, mname=mname, n=n)
                 # name loc
@@ -205,23 +191,10 @@ if __name__ == '__main__':
     threshold = 0.5
     # layer = 'HS'
 
-    data = {
-        'spermatocyte': {
-            'HS': spermatocyte_pca_modules_hs,
-            'MM': spermatocyte_pca_modules_mm,
-            'DM': spermatocyte_pca_modules_dm,
-        },
-        'enterocyte': {
-            'HS': enterocyte_pca_modules_hs,
-            'MM': enterocyte_pca_modules_mm,
-            'DM': enterocyte_pca_modules_dm,
-        }
-    }
-    # modules = data[celltype][layer]
-
-    #plot_pca(celltype, network, threshold, layer, modules)
+    registry = ModuleRegistry(network, threshold, path_pca='../../04-network/results/pca', path_cache='results/pca-modules')
+
+    # plot_pca(registry, celltype, layer)
 
     for celltype in ['spermatocyte', 'enterocyte']:
         for layer in ['HS', 'MM', 'DM']:
-            modules = data[celltype][layer]
-            plot_pca(celltype, network, threshold, layer, modules)
+            plot_pca(registry, celltype, layer)
@@ -76,7 +76,7 @@ if __name__ == '__main__':
         """
         # Data for last axes
         var_ratios[layer]['first9'] = s[:9].sum()
-        var_ratios[layer]['others'] = s[9:].sum()
+        var_ratios[layer]['others'] = 1 - s[:9].sum()
         """
         n = 9
         ind = np.arange(n)
@@ -10,7 +10,10 @@ pd.set_option('display.max_rows', 100)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
 import networkx as nx
+import sys
+sys.path.append('../../04-network')
 from utils import ensurePathExists, get_network_layer
+from homology import HomologIndex
 from itertools import combinations
 import argparse
 
@@ -43,9 +46,12 @@ if __name__ == '__main__':
     G.remove_nodes_from(remove_non_protein_coding)
 
     print('Separate Layers')
-    HSG = get_network_layer(G, 'HS')
-    MMG = get_network_layer(G, 'MM')
-    DMG = get_network_layer(G, 'DM')
+    HSG = get_network_layer(G, 'HS', copy=False)
+    MMG = get_network_layer(G, 'MM', copy=False)
+    DMG = get_network_layer(G, 'DM', copy=False)
+
+    print('Indexing homologs')
+    homologs = HomologIndex.from_networkx(G)
 
     r = []
     for (layer_i, Gi), (layer_j, Gj) in combinations([('HS', HSG), ('MM', MMG), ('DM', DMG)], 2):
@@ -54,25 +60,8 @@ if __name__ == '__main__':
         genes_i = [*Gi.nodes()]
         genes_j = [*Gj.nodes()]
 
-        genes_ij = genes_i + genes_j
-
-        # Only genes in this modules
-        Gtmp = nx.subgraph(G, genes_ij).copy()
-
-        # Remove intra edges
-        remove_intra_edges = [(i, j) for i, j, d in Gtmp.edges(data=True) if d.get('type', None) == 'intra']
-        Gtmp.remove_edges_from(remove_intra_edges)
-
-        # Remove isolates
-        remove_isolates_nodes = list(nx.isolates(Gtmp))
-        Gtmp.remove_nodes_from(remove_isolates_nodes)
-
-        a = set(genes_i)
-        b = set(genes_j)
-        a_union_b = a.union(b)
-        a_inter_b = set(Gtmp.nodes())
-
-        dist = len(a_inter_b) / len(a_union_b)
+        # Genes with a homolog in the other layer over all genes
+        dist = homologs.jaccard(layer_i, [genes_i], layer_j, [genes_j])[0]
         r.append((layer_i, layer_j, dist))
 
     dfR = pd.DataFrame(r, columns=['layer-i', 'layer-j', 'similarity'])
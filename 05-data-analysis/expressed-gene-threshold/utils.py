@@ -2,8 +2,10 @@ import os
 import networkx as nx
 
 
-def get_network_layer(G, layer=''):
-    return G.subgraph([n for n, d in G.nodes(data=True) if (d.get('layer') == layer)]).copy()
+def get_network_layer(G, layer='', copy=True):
+    """ Subgraph of a layer. With `copy=False` a read-only view is returned instead; nodes, edges and attributes are not copied."""
+    Gl = G.subgraph([n for n, l in G.nodes(data='layer') if (l == layer)])
+    return Gl.copy() if copy else Gl
 
 
 def ensurePathExists(path):
@@ -16,7 +16,10 @@ import matplotlib as mpl
 mpl.rcParams['font.family'] = 'Helvetica'
 mpl.rcParams['mathtext.fontset'] = 'cm'
 import matplotlib.pyplot as plt
+import sys
+sys.path.append('../../04-network')
 from utils import get_network_layer
+from threshold import ThresholdIndex
 import argparse
 
 
@@ -32,40 +35,24 @@ if __name__ == '__main__':
     rGfile_gpickle = 'results/net-{celltype:s}.gpickle'.format(celltype=celltype)
     G = nx.read_gpickle(rGfile_gpickle)
 
-    DMG = get_network_layer(G, 'DM')
-
-    core_DM = nx.get_node_attributes(DMG, name='core')
-    gene_DM = nx.get_node_attributes(DMG, name='label')
-    df_DM_m = pd.DataFrame(data={'gene': gene_DM, 'core': core_DM})
-    df_DM_m['core'] = df_DM_m['core'].fillna(False)
+    DMG = get_network_layer(G, 'DM', copy=False)
 
     r = []
-    Gt = DMG.copy()
     r.append([
         None,
-        Gt.number_of_nodes(),
-        Gt.number_of_edges(),
-        len([i for i, d in Gt.nodes(data=True) if d.get('core', False) == True])
+        DMG.number_of_nodes(),
+        DMG.number_of_edges(),
+        len([i for i, d in DMG.nodes(data=True) if d.get('core', False) == True])
     ])
-    for threshold in np.linspace(0.0, 1, 20, False):
-        print('Threshold: {:.2f}'.format(threshold))
-
-        # Remove Edges
-        edges_to_remove = [(i, j) for i, j, d in Gt.edges(data=True) if d['weight'] < threshold]
-        Gt.remove_edges_from(edges_to_remove)
-
-        # Remove Isolates
-        nodes_to_remove = list(nx.isolates(Gt))
-        Gt.remove_nodes_from(nodes_to_remove)
-        #
-        r.append([
-            threshold,
-            Gt.number_of_nodes(),
-            Gt.number_of_edges(),
-            len([i for i, d in Gt.nodes(data=True) if d.get('core', False) == True])
-        ])
-
-    dfR = pd.DataFrame(r, columns=['threshold', 'n-nodes', 'n-edges', 'n-core'])
+    dfN = pd.DataFrame(r, columns=['threshold', 'n-nodes', 'n-edges', 'n-core'])
+
+    # Edges with weight < threshold and then isolates are removed, read from the weight-sorted index
+    print('Indexing edges by weight')
+    index = ThresholdIndex.from_networkx(DMG, edge_type=None)
+    if index.edge_ptr[-1] != DMG.number_of_edges():
+        raise ValueError('Only {n:,d} of {m:,d} DM edges have a weight.'.format(n=index.edge_ptr[-1], m=DMG.number_of_edges()))
+    dfT = index.counts(np.linspace(0.0, 1, 20, False), layers=['DM'])
+    dfR = pd.concat([dfN, dfT.drop(columns='layer')], ignore_index=True)
 
     print("Plot")
     fig, ax = plt.subplots(nrows=1, ncols=1, figsize=(5, 4))
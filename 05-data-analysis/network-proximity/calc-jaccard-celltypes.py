@@ -9,8 +9,11 @@ import pandas as pd
 pd.set_option('display.max_rows', 100)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
-import networkx as nx
-from utils import ensurePathExists, get_network_layer
+import numpy as np
+import sys
+sys.path.append('../../04-network')
+from utils import ensurePathExists
+from mlgraph import load_layer_node_masks
 from itertools import combinations
 
 
@@ -20,7 +23,6 @@ if __name__ == '__main__':
     #
     network = 'thr'
     threshold = 0.5
-    threshold_str = str(threshold).replace('.', 'p')
     #
     layers = ['HS', 'MM', 'DM']
 
@@ -36,18 +38,14 @@ if __name__ == '__main__':
         }
     }
 
-    for celltype in celltypes:
-        print("Loading celltype: {celltype:s}".format(celltype=celltype))
-        #
-        rGfile = '../../04-network/results/network/{celltype:s}/net-{celltype:s}-{network:s}-{threshold:s}.gpickle'.format(celltype=celltype, network=network, threshold=threshold_str)
-        G = nx.read_gpickle(rGfile)
-        #
-        for layer in layers:
-            print('Separate layer {layer:s}'.format(layer=layer))
-            Gl = get_network_layer(G, layer)
-            #
+    # Celltype networks as bitmasks over the genome network, from their overlays (run `04-network/02-build-mlayer-genome-network.py --links`,
+    # `08-convert-network-to-mlgraph.py --network genome-links` and `09-build-network-overlays.py` first) or else their gpickles
+    print('Loading celltype networks')
+    masks = load_layer_node_masks(celltypes, network, threshold, layers, path='../../04-network/results/network')
+    for layer in layers:
+        for celltype in celltypes:
             data[layer][celltype] = {
-                'graph': Gl
+                'node_mask': masks[layer][celltype]
             }
 
     # Compute Jaccard
@@ -56,20 +54,11 @@ if __name__ == '__main__':
 
         for layer in layers:
 
-            G_i = data[layer][celltype_i]['graph']
-            G_j = data[layer][celltype_j]['graph']
-
-            genes_i = G_i.nodes()
-            genes_j = G_j.nodes()
+            a = data[layer][celltype_i]['node_mask']
+            b = data[layer][celltype_j]['node_mask']
 
-            # JAccard
-            a = set(genes_i)
-            b = set(genes_j)
-            #
-            a_union_b = a.union(b)
-            a_inter_b = a.intersection(b)
-            #
-            prox = len(a_inter_b) / len(a_union_b)
+            # Jaccard
+            prox = np.count_nonzero(a & b) / np.count_nonzero(a | b)
             r.append((celltype_i, celltype_j, layer, prox))
     df = pd.DataFrame(r, columns=['celltype_i', 'celltype_j', 'layer', 'proximity'])
 
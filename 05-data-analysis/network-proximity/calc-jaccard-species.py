@@ -10,7 +10,10 @@ pd.set_option('display.max_rows', 100)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
 import networkx as nx
+import sys
+sys.path.append('../../04-network')
 from utils import ensurePathExists, get_network_layer
+from homology import HomologIndex
 from itertools import combinations
 
 
@@ -33,12 +36,13 @@ if __name__ == '__main__':
         G = nx.read_gpickle(rGfile)
         #
         data[celltype] = {
-            'graph': G
+            'graph': G,
+            'homologs': HomologIndex.from_networkx(G)
         }
         #
         for layer in layers:
             print('Separate layer {layer:s}'.format(layer=layer))
-            Gl = get_network_layer(G, layer)
+            Gl = get_network_layer(G, layer, copy=False)
             #
             data[celltype][layer] = {
                 'graph': Gl
@@ -50,32 +54,15 @@ if __name__ == '__main__':
 
         for celltype in celltypes:
 
-            G = data[celltype]['graph']
+            homologs = data[celltype]['homologs']
             G_i = data[celltype][layer_i]['graph']
             G_j = data[celltype][layer_j]['graph']
 
             genes_i = list(G_i.nodes())
             genes_j = list(G_j.nodes())
-            genes_ij = genes_i + genes_j
-            #
-            G_tmp = nx.subgraph(G, genes_ij).copy()
-
-            # Remove intra edges
-            remove_intra_edges = [(i, j) for i, j, d in G_tmp.edges(data=True) if d.get('type', None) == 'intra']
-            G_tmp.remove_edges_from(remove_intra_edges)
-
-            # Remove isolates
-            remove_isolates_nodes = list(nx.isolates(G_tmp))
-            G_tmp.remove_nodes_from(remove_isolates_nodes)
 
-            # Jaccard
-            a = set(genes_i)
-            b = set(genes_j)
-            #
-            a_union_b = a.union(b)
-            a_inter_b = set(G_tmp.nodes())
-            #
-            prox = len(a_inter_b) / len(a_union_b)
+            # Jaccard: genes with a homolog in the other layer over all genes
+            prox = homologs.jaccard(layer_i, [genes_i], layer_j, [genes_j])[0]
             r.append((layer_i, layer_j, celltype, prox))
     df = pd.DataFrame(r, columns=['layer_i', 'layer_j', 'celltype', 'proximity'])
 